@@ -9,12 +9,11 @@ This server exposes different tools based on the current mode:
 Mode is controlled via a config file that can be toggled from the Streamlit dashboard.
 """
 
+import functools
 import json
 import os
 import sys
 from pathlib import Path
-from typing import Optional
-import numpy as np
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
@@ -23,6 +22,10 @@ from mcp.server import Server
 from mcp.types import Tool, TextContent
 import mcp.server.stdio
 
+from scripts.explanation_generator import explain_finding, explain_incident
+from scripts.log_index import FILTERS, compact_events
+from scripts.scenario_context import ContextReloader
+
 # Configuration
 DATA_DIR = Path(os.environ.get("DATA_DIR", Path(__file__).parent.parent.parent / "data"))
 SCENARIO_DIR = DATA_DIR / "scenarios" / "default_attack"
@@ -31,6 +34,10 @@ MODE_FILE = DATA_DIR / "current_mode.txt"
 # Initialize server
 server = Server("unified-soc")
 
+# Scenario artifacts are loaded once and rebuilt in the background when the
+# pipeline rewrites them; each tool call reads `scenario.context`.
+scenario = ContextReloader(SCENARIO_DIR).start()
+
 
 def get_current_mode() -> str:
     """Get the current SOC mode from config file."""
@@ -39,56 +46,20 @@ def get_current_mode() -> str:
     return "loglm"  # Default to LogLM mode
 
 
-def load_alerts():
-    """Load rules-only alerts."""
-    alerts_file = SCENARIO_DIR / "rules_output" / "alerts.json"
-    if alerts_file.exists():
-        with open(alerts_file) as f:
-            return json.load(f)
-    return []
-
-
-def load_findings():
-    """Load LogLM findings."""
-    findings_file = SCENARIO_DIR / "loglm_output" / "findings.json"
-    if findings_file.exists():
-        with open(findings_file) as f:
-            return json.load(f)
-    return []
-
-
-def load_incidents():
-    """Load LogLM incidents."""
-    incidents_file = SCENARIO_DIR / "loglm_output" / "incidents.json"
-    if incidents_file.exists():
-        with open(incidents_file) as f:
-            return json.load(f)
-    return []
-
-
-def load_embeddings():
-    """Load embeddings for similarity search."""
-    embeddings_file = SCENARIO_DIR / "loglm_output" / "embeddings.json"
-    if embeddings_file.exists():
-        with open(embeddings_file) as f:
-            return json.load(f)
-    return {}
-
+def hydrate_first_event(context, finding):
+    """First raw event of a finding, for generating its explanation."""
+    events = context.raw_events(finding.get("event_ids", [])[:1], finding.get("raw_event"))
+    return events[0] if events else None
 
-def load_evaluation():
-    """Load evaluation results."""
-    eval_file = SCENARIO_DIR / "evaluation_results.json"
-    if eval_file.exists():
-        with open(eval_file) as f:
-            return json.load(f)
-    return {}
 
-
-def cosine_similarity(a, b):
-    """Calculate cosine similarity between two vectors."""
-    a = np.array(a)
-    b = np.array(b)
-    return np.dot(a, b) / (np.linalg.norm(a) * np.linalg.norm(b))
+def with_explanation(context, finding):
+    """Copy of a finding for responses, with its explanation generated on demand."""
+    f_copy = {k: v for k, v in finding.items() if k not in ["embedding", "raw_event"]}
+    if "explanation" not in f_copy:
+        f_copy["explanation"] = explain_finding(
+            finding, hydrate=functools.partial(hydrate_first_event, context), scope=context.generation
+        )
+    return f_copy
 
 
 # ============================================================
@@ -108,7 +79,7 @@ async def list_tools():
         ),
         Tool(
             name="get_raw_logs",
-            description="Get raw log events from the scenario",
+            description="Get raw log events from the scenario in time order, filtered by time window, host, IP, port or service. Use `around` with a finding's timestamp to see the events surrounding it, and `cursor` to page through results.",
             inputSchema={
                 "type": "object",
                 "properties": {
@@ -117,10 +88,55 @@ async def list_tools():
                         "enum": ["conn", "dns", "all"],
                         "description": "Type of logs to retrieve"
                     },
+                    "start": {
+                        "type": "string",
+                        "description": "Earliest timestamp, inclusive (ISO 8601)"
+                    },
+                    "end": {
+                        "type": "string",
+                        "description": "Latest timestamp, exclusive (ISO 8601)"
+                    },
+                    "around": {
+                        "type": "string",
+                        "description": "Return the events centered on this timestamp (ISO 8601): half before it, half at or after it"
+                    },
+                    "ip": {
+                        "type": "string",
+                        "description": "Source or destination IP"
+                    },
+                    "src_ip": {
+                        "type": "string",
+                        "description": "Source IP (id.orig_h)"
+                    },
+                    "dst_ip": {
+                        "type": "string",
+                        "description": "Destination IP (id.resp_h)"
+                    },
+                    "hostname": {
+                        "type": "string",
+                        "description": "Hostname of the originating host"
+                    },
+                    "port": {
+                        "type": "integer",
+                        "description": "Destination port (id.resp_p)"
+                    },
+                    "service": {
+                        "type": "string",
+                        "description": "Zeek service, e.g. dns, ssl, smb"
+                    },
                     "limit": {
                         "type": "integer",
                         "description": "Maximum number of logs to return",
                         "default": 100
+                    },
+                    "cursor": {
+                        "type": "string",
+                        "description": "next_cursor from a previous call, to fetch the following page"
+                    },
+                    "compact": {
+                        "type": "boolean",
+                        "description": "Return logs as a column list and one row of values per event",
+                        "default": False
                     }
                 }
             }
@@ -167,6 +183,11 @@ async def list_tools():
                         "alert_id": {
                             "type": "string",
                             "description": "The alert ID"
+                        },
+                        "include_raw_event": {
+                            "type": "boolean",
+                            "description": "Attach the raw log event that triggered the alert",
+                            "default": False
                         }
                     },
                     "required": ["alert_id"]
@@ -208,13 +229,18 @@ async def list_tools():
             ),
             Tool(
                 name="get_finding_details",
-                description="Get details for a specific finding including MITRE predictions",
+                description="Get details for a specific finding including MITRE predictions and an AI-generated explanation",
                 inputSchema={
                     "type": "object",
                     "properties": {
                         "finding_id": {
                             "type": "string",
                             "description": "The finding ID"
+                        },
+                        "include_raw_events": {
+                            "type": "boolean",
+                            "description": "Attach the raw log events behind the finding",
+                            "default": False
                         }
                     },
                     "required": ["finding_id"]
@@ -227,7 +253,7 @@ async def list_tools():
             ),
             Tool(
                 name="get_incident_details",
-                description="Get details for a specific incident including all related findings",
+                description="Get details for a specific incident including all related findings and an incident summary",
                 inputSchema={
                     "type": "object",
                     "properties": {
@@ -239,6 +265,28 @@ async def list_tools():
                     "required": ["incident_id"]
                 }
             ),
+            Tool(
+                name="find_similar_incidents",
+                description="Find incidents whose centroid embedding is similar to an incident or a finding. Use this to link new activity to known campaigns.",
+                inputSchema={
+                    "type": "object",
+                    "properties": {
+                        "incident_id": {
+                            "type": "string",
+                            "description": "Incident to compare against"
+                        },
+                        "finding_id": {
+                            "type": "string",
+                            "description": "Finding to compare against (used when no incident_id is given)"
+                        },
+                        "k": {
+                            "type": "integer",
+                            "description": "Number of incidents to return",
+                            "default": 3
+                        }
+                    }
+                }
+            ),
             Tool(
                 name="nearest_neighbors",
                 description="Find similar findings using embedding similarity. This enables hunting for related threats.",
@@ -276,6 +324,7 @@ async def list_tools():
 async def call_tool(name: str, arguments: dict):
     """Handle tool calls."""
     mode = get_current_mode()
+    context = scenario.context
     
     # Common tools
     if name == "get_soc_mode":
@@ -295,31 +344,43 @@ async def call_tool(name: str, arguments: dict):
         log_type = arguments.get("log_type", "all")
         limit = arguments.get("limit", 100)
         
-        logs = []
-        if log_type in ["conn", "all"]:
-            conn_file = SCENARIO_DIR / "raw_logs" / "zeek_conn.json"
-            if conn_file.exists():
-                with open(conn_file) as f:
-                    logs.extend(json.load(f))
+        log_type = None if log_type == "all" else log_type
+        filters = {field: arguments.get(field) for field in FILTERS}
+        filters["log_type"] = log_type
         
-        if log_type in ["dns", "all"]:
-            dns_file = SCENARIO_DIR / "raw_logs" / "zeek_dns.json"
-            if dns_file.exists():
-                with open(dns_file) as f:
-                    logs.extend(json.load(f))
+        try:
+            logs, next_cursor = context.log_index.query(
+                filters,
+                start=arguments.get("start"),
+                end=arguments.get("end"),
+                around=arguments.get("around"),
+                limit=limit,
+                cursor=arguments.get("cursor"),
+            )
+        except ValueError as e:
+            return [TextContent(type="text", text=f"Invalid get_raw_logs arguments: {e}")]
         
-        logs.sort(key=lambda x: x.get("ts", ""))
-        return [TextContent(
-            type="text",
-            text=json.dumps({
-                "total_logs": len(logs),
-                "returned": min(limit, len(logs)),
-                "logs": logs[:limit]
-            }, indent=2)
-        )]
+        result = {
+            "total_logs": context.log_index.count(log_type),
+            "returned": len(logs),
+            "next_cursor": next_cursor,
+        }
+        if arguments.get("compact", False):
+            result["logs"] = compact_events(logs)
+            return [TextContent(type="text", text=json.dumps(result, separators=(",", ":")))]
+        result["logs"] = logs
+        return [TextContent(type="text", text=json.dumps(result, indent=2))]
     
     elif name == "get_evaluation_metrics":
-        eval_results = load_evaluation()
+        # Copied so the cached results keep their curves
+        eval_results = {
+            key: dict(value) if isinstance(value, dict) else value
+            for key, value in context.evaluation.items()
+        }
+        # Full threshold curves are for the dashboard; the best operating point stays
+        for method in ("rules_only", "loglm"):
+            if isinstance(eval_results.get(method), dict):
+                eval_results[method].pop("threshold_curve", None)
         return [TextContent(
             type="text",
             text=json.dumps(eval_results, indent=2)
@@ -327,7 +388,7 @@ async def call_tool(name: str, arguments: dict):
     
     # Rules-only tools
     elif name == "list_alerts" and mode == "rules_only":
-        alerts = load_alerts()
+        alerts = context.alerts
         severity = arguments.get("severity")
         rule_name = arguments.get("rule_name")
         limit = arguments.get("limit", 50)
@@ -344,30 +405,30 @@ async def call_tool(name: str, arguments: dict):
                 "total_alerts": len(alerts),
                 "returned": min(limit, len(alerts)),
                 "note": "These are uncorrelated alerts. You must manually investigate to determine if they are related.",
-                "alerts": alerts[:limit]
+                "alerts": [{k: v for k, v in a.items() if k != "raw_event"} for a in alerts[:limit]]
             }, indent=2)
         )]
     
     elif name == "get_alert_details" and mode == "rules_only":
-        alerts = load_alerts()
         alert_id = arguments.get("alert_id")
-        alert = next((a for a in alerts if a.get("id") == alert_id), None)
+        alert = context.alerts_by_id.get(alert_id)
         
         if alert:
-            return [TextContent(type="text", text=json.dumps(alert, indent=2))]
+            alert_copy = {k: v for k, v in alert.items() if k != "raw_event"}
+            if arguments.get("include_raw_event", False):
+                raw_events = context.raw_events([alert.get("event_id")], alert.get("raw_event"))
+                alert_copy["raw_event"] = raw_events[0] if raw_events else None
+            return [TextContent(type="text", text=json.dumps(alert_copy, indent=2))]
         return [TextContent(type="text", text=f"Alert {alert_id} not found")]
     
     elif name == "get_rule_statistics" and mode == "rules_only":
-        stats_file = SCENARIO_DIR / "rules_output" / "rule_stats.json"
-        if stats_file.exists():
-            with open(stats_file) as f:
-                stats = json.load(f)
-            return [TextContent(type="text", text=json.dumps(stats, indent=2))]
+        if context.rule_stats is not None:
+            return [TextContent(type="text", text=json.dumps(context.rule_stats, indent=2))]
         return [TextContent(type="text", text="No rule statistics available")]
     
     # LogLM tools
     elif name == "list_findings" and mode == "loglm":
-        findings = load_findings()
+        findings = context.findings
         severity = arguments.get("severity")
         technique = arguments.get("technique")
         limit = arguments.get("limit", 50)
@@ -397,17 +458,18 @@ async def call_tool(name: str, arguments: dict):
         )]
     
     elif name == "get_finding_details" and mode == "loglm":
-        findings = load_findings()
         finding_id = arguments.get("finding_id")
-        finding = next((f for f in findings if f.get("id") == finding_id), None)
+        finding = context.findings_by_id.get(finding_id)
         
         if finding:
-            f_copy = {k: v for k, v in finding.items() if k != "embedding"}
+            f_copy = with_explanation(context, finding)
+            if arguments.get("include_raw_events", False):
+                f_copy["raw_events"] = context.raw_events(finding.get("event_ids", []), finding.get("raw_event"))
             return [TextContent(type="text", text=json.dumps(f_copy, indent=2))]
         return [TextContent(type="text", text=f"Finding {finding_id} not found")]
     
     elif name == "list_incidents" and mode == "loglm":
-        incidents = load_incidents()
+        incidents = context.incidents
         
         # Clean up for response
         incidents_clean = []
@@ -426,50 +488,72 @@ async def call_tool(name: str, arguments: dict):
         )]
     
     elif name == "get_incident_details" and mode == "loglm":
-        incidents = load_incidents()
         incident_id = arguments.get("incident_id")
-        incident = next((i for i in incidents if i.get("id") == incident_id), None)
+        incident = context.incidents_by_id.get(incident_id)
         
         if incident:
-            # Get related findings
-            findings = load_findings()
-            related = [f for f in findings if f.get("id") in incident.get("finding_ids", [])]
+            related = context.related_findings(incident)
             
             inc_copy = {k: v for k, v in incident.items() if k != "embedding"}
+            inc_copy["explanation"] = explain_incident(incident, related, scope=context.generation)
             inc_copy["related_findings"] = [
-                {k: v for k, v in f.items() if k not in ["embedding", "raw_event"]}
+                with_explanation(context, f)
                 for f in related[:20]  # Limit to 20 findings
             ]
             
             return [TextContent(type="text", text=json.dumps(inc_copy, indent=2))]
         return [TextContent(type="text", text=f"Incident {incident_id} not found")]
     
-    elif name == "nearest_neighbors" and mode == "loglm":
+    elif name == "find_similar_incidents" and mode == "loglm":
+        incident_id = arguments.get("incident_id")
         finding_id = arguments.get("finding_id")
-        k = arguments.get("k", 5)
-        
-        embeddings = load_embeddings()
-        findings = load_findings()
+        k = arguments.get("k", 3)
         
-        if finding_id not in embeddings:
-            return [TextContent(type="text", text=f"Finding {finding_id} not found")]
+        index = context.incident_index
+        if incident_id:
+            query = index.vector(incident_id)
+            if query is None:
+                return [TextContent(type="text", text=f"Incident {incident_id} not found")]
+        elif finding_id:
+            query = context.finding_vector(finding_id)
+            if query is None:
+                return [TextContent(type="text", text=f"Finding {finding_id} not found")]
+        else:
+            return [TextContent(type="text", text="Provide incident_id or finding_id")]
         
-        target_embedding = embeddings[finding_id]
+        similar = []
+        for iid, sim in index.search(query, k=k, exclude=incident_id):
+            inc = context.incidents_by_id.get(iid, {})
+            similar.append({
+                "incident_id": iid,
+                "similarity": round(sim, 4),
+                "title": inc.get("title"),
+                "severity": inc.get("severity"),
+                "finding_count": inc.get("finding_count"),
+            })
         
-        # Calculate similarities
-        similarities = []
-        for fid, emb in embeddings.items():
-            if fid != finding_id:
-                sim = cosine_similarity(target_embedding, emb)
-                similarities.append((fid, sim))
+        return [TextContent(
+            type="text",
+            text=json.dumps({
+                "query_incident": incident_id,
+                "query_finding": None if incident_id else finding_id,
+                "similar_incidents": similar,
+                "note": "Similarity between incident centroids (mean LogLM embedding of member findings)."
+            }, indent=2)
+        )]
+    
+    elif name == "nearest_neighbors" and mode == "loglm":
+        finding_id = arguments.get("finding_id")
+        k = arguments.get("k", 5)
         
-        # Sort by similarity
-        similarities.sort(key=lambda x: x[1], reverse=True)
+        similarities = context.similar_findings(finding_id, k=k)
+        if similarities is None:
+            return [TextContent(type="text", text=f"Finding {finding_id} not found")]
         
         # Get top k neighbors
         neighbors = []
         for fid, sim in similarities[:k]:
-            finding = next((f for f in findings if f.get("id") == fid), None)
+            finding = context.findings_by_id.get(fid)
             if finding:
                 neighbors.append({
                     "finding_id": fid,
@@ -489,22 +573,18 @@ async def call_tool(name: str, arguments: dict):
         )]
     
     elif name == "technique_rollup" and mode == "loglm":
-        stats_file = SCENARIO_DIR / "loglm_output" / "technique_stats.json"
-        if stats_file.exists():
-            with open(stats_file) as f:
-                stats = json.load(f)
+        if context.technique_stats is not None:
             return [TextContent(
                 type="text",
                 text=json.dumps({
-                    "techniques": stats,
+                    "techniques": context.technique_stats,
                     "note": "MITRE ATT&CK techniques detected across all findings"
                 }, indent=2)
             )]
         return [TextContent(type="text", text="No technique statistics available")]
     
     elif name == "get_attack_narrative" and mode == "loglm":
-        incidents = load_incidents()
-        main_incident = next((i for i in incidents if i.get("severity") == "critical"), None)
+        main_incident = next((i for i in context.incidents if i.get("severity") == "critical"), None)
         
         if main_incident:
             narrative = {
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Behavioral Baselines
+
+Learns what "normal" looks like for every host and every (host, destination)
+pair from the connection feed itself, instead of from ground-truth labels:
+- Bytes and duration: streaming mean/variance (Welford) on log scale
+- Connection rate: exponentially weighted inter-arrival time
+- Destination cardinality per host: HyperLogLog sketch
+- Time-of-day: 24-bin histogram
+
+Every update is O(1) per event and state lives in preallocated NumPy arrays,
+so baselines can follow the full sensor feed. Snapshots are compact `.npz`
+files that carry a timestamp watermark, so a restarted process continues
+from the snapshot without rescanning history:
+
+    python scripts/baselines.py                      # build from the scenario
+    python scripts/baselines.py --snapshot baselines.npz --update new_conn.json
+"""
+
+import argparse
+import hashlib
+import math
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from scripts.log_io import load_log, read_events
+    from scripts.log_merge import merge_sorted, sorted_run
+except ImportError:
+    from log_io import load_log, read_events
+    from log_merge import merge_sorted, sorted_run
+
+SCENARIO_DIR = Path(__file__).parent.parent / "data" / "scenarios" / "default_attack"
+SNAPSHOT_VERSION = 2
+
+# Observations required before deviations from an entity's baseline count
+MIN_OBSERVATIONS = 10
+
+# Smoothing factor for the inter-arrival EWMA
+GAP_ALPHA = 0.1
+
+# HyperLogLog precision: 2^10 one-byte registers per host (~3% error)
+HLL_PRECISION = 10
+HLL_REGISTERS = 1 << HLL_PRECISION
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def parse_ts(ts: str) -> Tuple[float, int]:
+    """Return (epoch seconds, hour of day) for an ISO timestamp."""
+    dt = datetime.fromisoformat(ts.replace("Z", ""))
+    return (dt - EPOCH).total_seconds(), dt.hour
+
+
+def _hash64(value: str) -> int:
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+def hll_estimate(registers: np.ndarray) -> float:
+    """Cardinality estimate from a row of HyperLogLog registers."""
+    m = registers.shape[-1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    estimate = alpha * m * m / np.sum(np.exp2(-registers.astype(np.float64)))
+    zeros = int(np.count_nonzero(registers == 0))
+    if estimate <= 2.5 * m and zeros:
+        return m * math.log(m / zeros)  # linear counting for small sets
+    return float(estimate)
+
+
+class EntityStats:
+    """Growable columnar statistics for one kind of entity."""
+
+    FLOAT_FIELDS = ("first_ts", "last_ts", "gap_ewma",
+                    "bytes_n", "bytes_mean", "bytes_m2",
+                    "dur_n", "dur_mean", "dur_m2")
+
+    def __init__(self, capacity: int = 1024, extra_width: int = 0):
+        self.keys: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.count = np.zeros(capacity, dtype=np.int64)
+        self.floats = {name: np.zeros(capacity, dtype=np.float64) for name in self.FLOAT_FIELDS}
+        self.tod = np.zeros((capacity, 24), dtype=np.uint32)
+        self.extra_width = extra_width
+        self.extra = np.zeros((capacity, extra_width), dtype=np.uint8) if extra_width else None
+
+    def __len__(self) -> int:
+        return len(self.keys)
+
+    def _grow(self) -> None:
+        capacity = len(self.count) * 2
+        self.count = np.resize(self.count, capacity)
+        self.count[len(self.keys):] = 0
+        for name, values in self.floats.items():
+            grown = np.zeros(capacity, dtype=np.float64)
+            grown[:len(values)] = values
+            self.floats[name] = grown
+        tod = np.zeros((capacity, 24), dtype=np.uint32)
+        tod[:len(self.tod)] = self.tod
+        self.tod = tod
+        if self.extra is not None:
+            extra = np.zeros((capacity, self.extra_width), dtype=np.uint8)
+            extra[:len(self.extra)] = self.extra
+            self.extra = extra
+
+    def row(self, key: str, create: bool = False) -> Optional[int]:
+        row = self.rows.get(key)
+        if row is None and create:
+            if len(self.keys) == len(self.count):
+                self._grow()
+            row = len(self.keys)
+            self.rows[key] = row
+            self.keys.append(key)
+        return row
+
+    def observe(self, row: int, ts: float, hour: int, log_bytes: Optional[float], log_dur: Optional[float]) -> None:
+        """Fold one event into the entity's statistics."""
+        f = self.floats
+        n = self.count[row]
+        if n == 0:
+            f["first_ts"][row] = ts
+        else:
+            gap = max(ts - f["last_ts"][row], 0.0)
+            f["gap_ewma"][row] = gap if n == 1 else (1 - GAP_ALPHA) * f["gap_ewma"][row] + GAP_ALPHA * gap
+        f["last_ts"][row] = max(ts, f["last_ts"][row])
+        self.count[row] = n + 1
+        self.tod[row, hour] += 1
+        if log_bytes is not None:
+            _welford(f["bytes_n"], f["bytes_mean"], f["bytes_m2"], row, log_bytes)
+        if log_dur is not None:
+            _welford(f["dur_n"], f["dur_mean"], f["dur_m2"], row, log_dur)
+
+    def zscore(self, row: int, prefix: str, value: Optional[float]) -> float:
+        f = self.floats
+        n = f[f"{prefix}_n"][row]
+        if value is None or n < MIN_OBSERVATIONS:
+            return 0.0
+        std = math.sqrt(f[f"{prefix}_m2"][row] / (n - 1))
+        return abs(value - f[f"{prefix}_mean"][row]) / max(std, 0.1)
+
+    def state(self, prefix: str) -> Dict[str, np.ndarray]:
+        n = len(self.keys)
+        state = {
+            f"{prefix}_keys": np.array(self.keys, dtype=str),
+            f"{prefix}_count": self.count[:n],
+            f"{prefix}_tod": self.tod[:n],
+        }
+        for name, values in self.floats.items():
+            state[f"{prefix}_{name}"] = values[:n]
+        if self.extra is not None:
+            state[f"{prefix}_extra"] = self.extra[:n]
+        return state
+
+    @classmethod
+    def from_state(cls, state, prefix: str, extra_width: int = 0) -> "EntityStats":
+        keys = [str(k) for k in state[f"{prefix}_keys"]]
+        stats = cls(capacity=max(len(keys) * 2, 1024), extra_width=extra_width)
+        n = len(keys)
+        stats.keys = keys
+        stats.rows = {k: i for i, k in enumerate(keys)}
+        stats.count[:n] = state[f"{prefix}_count"]
+        stats.tod[:n] = state[f"{prefix}_tod"]
+        for name in cls.FLOAT_FIELDS:
+            stats.floats[name][:n] = state[f"{prefix}_{name}"]
+        if extra_width:
+            stats.extra[:n] = state[f"{prefix}_extra"]
+        return stats
+
+
+def _welford(n_arr: np.ndarray, mean_arr: np.ndarray, m2_arr: np.ndarray, row: int, value: float) -> None:
+    n = n_arr[row] + 1
+    delta = value - mean_arr[row]
+    mean = mean_arr[row] + delta / n
+    m2_arr[row] += delta * (value - mean)
+    mean_arr[row] = mean
+    n_arr[row] = n
+
+
+def _event_measures(event: Dict) -> Tuple[Optional[float], Optional[float]]:
+    """Log-scaled total bytes and duration, or None for events without them."""
+    if "orig_bytes" in event or "resp_bytes" in event:
+        log_bytes = math.log1p((event.get("orig_bytes") or 0) + (event.get("resp_bytes") or 0))
+    else:
+        log_bytes = None
+    log_dur = math.log1p(event["duration"]) if event.get("duration") is not None else None
+    return log_bytes, log_dur
+
+
+class BaselineStore:
+    """Per-host and per-(host, destination) behavioral baselines."""
+
+    def __init__(self):
+        self.hosts = EntityStats(extra_width=HLL_REGISTERS)
+        self.pairs = EntityStats()
+        self.watermark = float("-inf")
+        # Ids of the events at exactly the watermark, so later events sharing it are not skipped
+        self.watermark_ids = set()
+        self.events_seen = 0
+
+    @staticmethod
+    def _keys(event: Dict) -> Tuple[str, str]:
+        src = event.get("id.orig_h", "")
+        dst = event.get("query") or event.get("id.resp_h", "")
+        return src, f"{src}|{dst}"
+
+    def destination_cardinality(self, host: str) -> float:
+        """Approximate number of distinct destinations contacted by a host."""
+        row = self.hosts.row(host)
+        if row is None:
+            return 0.0
+        return hll_estimate(self.hosts.extra[row])
+
+    def score(self, event: Dict) -> Dict[str, float]:
+        """
+        Score an event against the baselines learned so far.
+
+        Returns:
+            Component deviations and a combined anomaly_score in [0, 1)
+        """
+        host_key, pair_key = self._keys(event)
+        ts, hour = parse_ts(event["ts"])
+        log_bytes, log_dur = _event_measures(event)
+
+        host = self.hosts.row(host_key)
+        pair = self.pairs.row(pair_key)
+        host_n = int(self.hosts.count[host]) if host is not None else 0
+
+        bytes_z = duration_z = tod_rarity = rate_ratio = 0.0
+        new_destination = 0.0
+        if host is not None and host_n >= MIN_OBSERVATIONS:
+            bytes_z = self.hosts.zscore(host, "bytes", log_bytes)
+            duration_z = self.hosts.zscore(host, "dur", log_dur)
+            p_hour = (self.hosts.tod[host, hour] + 1) / (host_n + 24)
+            tod_rarity = max(0.0, -math.log(p_hour) / math.log(24) - 1.0)
+            new_destination = 1.0 if pair is None else 0.0
+
+        if pair is not None:
+            bytes_z = max(bytes_z, self.pairs.zscore(pair, "bytes", log_bytes))
+            duration_z = max(duration_z, self.pairs.zscore(pair, "dur", log_dur))
+            if self.pairs.count[pair] >= MIN_OBSERVATIONS:
+                gap = max(ts - self.pairs.floats["last_ts"][pair], 1.0)
+                expected = max(self.pairs.floats["gap_ewma"][pair], 1.0)
+                rate_ratio = abs(math.log(gap / expected))
+
+        deviation = max(bytes_z, duration_z) / 3 + tod_rarity + 0.5 * new_destination + rate_ratio / 4
+        return {
+            "bytes_z": round(bytes_z, 3),
+            "duration_z": round(duration_z, 3),
+            "time_of_day_rarity": round(tod_rarity, 3),
+            "new_destination": bool(new_destination),
+            "rate_deviation": round(rate_ratio, 3),
+            "anomaly_score": round(1 - math.exp(-deviation), 3),
+        }
+
+    def update(self, event: Dict) -> None:
+        """Fold one event into the host and pair baselines (O(1))."""
+        host_key, pair_key = self._keys(event)
+        ts, hour = parse_ts(event["ts"])
+        log_bytes, log_dur = _event_measures(event)
+
+        host = self.hosts.row(host_key, create=True)
+        self.hosts.observe(host, ts, hour, log_bytes, log_dur)
+        pair = self.pairs.row(pair_key, create=True)
+        self.pairs.observe(pair, ts, hour, log_bytes, log_dur)
+
+        h = _hash64(pair_key.split("|", 1)[1])
+        register = h >> (64 - HLL_PRECISION)
+        rest = h & ((1 << (64 - HLL_PRECISION)) - 1)
+        rank = (64 - HLL_PRECISION) - rest.bit_length() + 1
+        if rank > self.hosts.extra[host, register]:
+            self.hosts.extra[host, register] = rank
+
+        if ts > self.watermark:
+            self.watermark = ts
+            self.watermark_ids = set()
+        if ts == self.watermark:
+            self.watermark_ids.add(event["id"])
+        self.events_seen += 1
+
+    def seen(self, event: Dict) -> bool:
+        """True if the event is already folded in: before the watermark, or at it and among its ids."""
+        ts = parse_ts(event["ts"])[0]
+        return ts < self.watermark or (ts == self.watermark and event["id"] in self.watermark_ids)
+
+    def score_and_update(self, events: Iterable[Dict], skip_seen: bool = False) -> Dict[str, Dict[str, float]]:
+        """
+        Score each event against the baseline, then learn from it.
+
+        Events must arrive in time order. With skip_seen, events already
+        folded in (see seen) are ignored so replays do not double count.
+        """
+        scores = {}
+        for event in events:
+            if skip_seen and self.seen(event):
+                continue
+            scores[event["id"]] = self.score(event)
+            self.update(event)
+        return scores
+
+    def save(self, path: Path) -> None:
+        """Write a compressed snapshot."""
+        state = {
+            "version": np.array(SNAPSHOT_VERSION),
+            "watermark": np.array(self.watermark),
+            "watermark_ids": np.array(sorted(self.watermark_ids), dtype=str),
+            "events_seen": np.array(self.events_seen),
+        }
+        state.update(self.hosts.state("host"))
+        state.update(self.pairs.state("pair"))
+        np.savez_compressed(path, **state)
+
+    @classmethod
+    def load(cls, path: Path) -> "BaselineStore":
+        """Restore a snapshot written by save()."""
+        with np.load(path) as state:
+            if int(state["version"]) != SNAPSHOT_VERSION:
+                raise ValueError(f"Unsupported baseline snapshot version {int(state['version'])}")
+            store = cls()
+            store.hosts = EntityStats.from_state(state, "host", extra_width=HLL_REGISTERS)
+            store.pairs = EntityStats.from_state(state, "pair")
+            store.watermark = float(state["watermark"])
+            store.watermark_ids = set(state["watermark_ids"].tolist())
+            store.events_seen = int(state["events_seen"])
+        return store
+
+    def summary(self) -> Dict:
+        return {
+            "hosts": len(self.hosts),
+            "pairs": len(self.pairs),
+            "events_seen": self.events_seen,
+            "watermark": (EPOCH + timedelta(seconds=self.watermark)).isoformat() if self.events_seen else None,
+        }
+
+
+def build_baselines(*logs: List[Dict]) -> Tuple[BaselineStore, Dict[str, Dict[str, float]]]:
+    """Run the baseline stage over the events of one or more logs, merged in time order."""
+    store = BaselineStore()
+    return store, store.score_and_update(merge_sorted(*(sorted_run(log) for log in logs)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build or update behavioral baselines")
+    parser.add_argument("--snapshot", type=Path, default=SCENARIO_DIR / "loglm_output" / "baselines.npz")
+    parser.add_argument("--update", type=Path, nargs="*",
+                        help="Fold these log files into an existing snapshot instead of rebuilding")
+    args = parser.parse_args()
+
+    if args.update:
+        store = BaselineStore.load(args.snapshot)
+        events = merge_sorted(*(sorted_run(read_events(path)) for path in args.update))
+        scores = store.score_and_update(events, skip_seen=True)
+    else:
+        store, scores = build_baselines(*(load_log(SCENARIO_DIR / "raw_logs", log_type) for log_type in ("conn", "dns")))
+
+    store.save(args.snapshot)
+    summary = store.summary()
+    print(f"Scored {len(scores)} events; baselines for {summary['hosts']} hosts, "
+          f"{summary['pairs']} host/destination pairs")
+    print(f"Snapshot: {args.snapshot} (watermark {summary['watermark']})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Batch Evaluation
+
+Runs rules detection, LogLM detection and evaluation over every scenario
+under a root directory and reports how the metrics vary across them:
+- Scenarios are discovered as directories holding ground_truth.json and
+  a raw_logs/zeek_conn log in any format log_io reads
+- Each scenario runs in its own worker process (ProcessPoolExecutor)
+- Per-scenario results are cached under a fingerprint of the input files,
+  the pipeline source and the embedding model version, so unchanged
+  scenarios are not re-run
+- The report has mean, variance, min and max of every metric, plus
+  detection latency quantiles from the merged per-scenario sketches
+- The run can act as a regression gate (minimum LogLM metrics, or no drop
+  from a baseline report beyond a tolerance)
+
+    python scripts/batch_evaluate.py --root data/scenarios --workers 8
+    python scripts/batch_evaluate.py --baseline batch_report.json --tolerance 0.01
+"""
+
+import argparse
+import contextlib
+import hashlib
+import io
+import json
+import os
+import sys
+import time
+import traceback
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    from scripts.embedding_backend import get_provider
+    from scripts.evaluate import LATENCY_SKETCH_FILE, latency_summary
+    from scripts.log_io import find_log
+    from scripts.quantile_sketch import KeyedSketches
+except ImportError:
+    from embedding_backend import get_provider
+    from evaluate import LATENCY_SKETCH_FILE, latency_summary
+    from log_io import find_log
+    from quantile_sketch import KeyedSketches
+
+SCENARIOS_ROOT = Path(__file__).parent.parent / "data" / "scenarios"
+CACHE_DIR_NAME = ".batch_cache"
+REPORT_FILE = "batch_report.json"
+
+# Modules whose source determines detection and evaluation results
+PIPELINE_MODULES = [
+    "rules_detection.py",
+    "loglm_detection.py",
+    "evaluate.py",
+    "baselines.py",
+    "beacon_detection.py",
+    "dns_features.py",
+    "lateral_graph.py",
+    "incident_state.py",
+    "embedding_backend.py",
+    "embedding_cache.py",
+    "embedding_quantization.py",
+    "event_store.py",
+    "quantile_sketch.py",
+    "ground_truth.py",
+    "log_io.py",
+    "log_merge.py",
+]
+
+# Scenario files whose content determines the results (raw logs are
+# looked up by type, whatever their format)
+INPUT_FILES = ["ground_truth.json"]
+INPUT_LOGS = ["conn", "dns"]
+
+# Per-method metrics gathered from evaluation_results.json
+METHOD_METRICS = ["precision", "recall", "f1_score", "false_positive_rate", "evasive_detection_rate",
+                  "mttd_minutes", "detections", "best_f1_score"]
+
+
+def discover_scenarios(root: Path) -> List[Path]:
+    """Scenario directories below root, sorted; hidden directories are skipped."""
+    root = Path(root)
+    found = []
+    for gt_file in root.rglob("ground_truth.json"):
+        scenario = gt_file.parent
+        relative = scenario.relative_to(root).parts
+        if any(part.startswith(".") for part in relative):
+            continue
+        if find_log(scenario / "raw_logs", "conn") is not None:
+            found.append(scenario)
+    return sorted(found)
+
+
+def pipeline_version() -> str:
+    """Digest of the pipeline source and embedding model version."""
+    h = hashlib.sha256(get_provider().model_version.encode())
+    scripts_dir = Path(__file__).parent
+    for name in PIPELINE_MODULES:
+        h.update(b"\0" + name.encode() + b"\0")
+        h.update((scripts_dir / name).read_bytes())
+    return h.hexdigest()
+
+
+def scenario_fingerprint(scenario_dir: Path, version: str) -> str:
+    """Cache key for one scenario: its input files plus the pipeline version."""
+    h = hashlib.sha256(version.encode())
+    raw_dir = Path(scenario_dir) / "raw_logs"
+    logs = [find_log(raw_dir, log_type) for log_type in INPUT_LOGS]
+    inputs = [Path(scenario_dir) / name for name in INPUT_FILES] + [path for path in logs if path is not None]
+    for path in inputs:
+        name = path.relative_to(scenario_dir).as_posix()
+        h.update(b"\0" + name.encode() + b"\0")
+        if path.exists():
+            with open(path, "rb") as f:
+                for chunk in iter(lambda: f.read(1 << 20), b""):
+                    h.update(chunk)
+    return h.hexdigest()
+
+
+def summarize_results(results: Dict) -> Dict:
+    """Flat per-method metrics from an evaluation_results.json dict."""
+    summary = {}
+    for method, count_key in (("rules_only", "alert_count"), ("loglm", "finding_count")):
+        r = results[method]
+        best = r.get("best_operating_point") or {}
+        summary[method] = {
+            **{k: r["metrics"][k] for k in ("precision", "recall", "f1_score", "false_positive_rate")},
+            "evasive_detection_rate": r["evasion_analysis"]["evasive_detection_rate"],
+            "mttd_minutes": r["mttd"]["overall"]["mttd_minutes"],
+            "detections": r[count_key],
+            "best_f1_score": best.get("f1_score"),
+            "best_threshold": best.get("thresholds"),
+        }
+    summary["comparison"] = dict(results["comparison"])
+    return summary
+
+
+def run_scenario(scenario_dir: str) -> Dict:
+    """
+    Run rules, LogLM and evaluation on one scenario (worker process entry point).
+
+    Pipeline output is suppressed; failures are returned, not raised, so
+    one broken scenario does not stop the batch.
+    """
+    try:
+        from scripts.evaluate import run_evaluation
+        from scripts.loglm_detection import generate_loglm_output
+        from scripts.rules_detection import generate_rules_output
+    except ImportError:
+        from evaluate import run_evaluation
+        from loglm_detection import generate_loglm_output
+        from rules_detection import generate_rules_output
+
+    start = time.perf_counter()
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            generate_rules_output(scenario_dir)
+            generate_loglm_output(scenario_dir)
+            results = run_evaluation(scenario_dir=scenario_dir)
+    except Exception:
+        return {"scenario": scenario_dir, "status": "error", "error": traceback.format_exc()}
+    sketch_file = Path(scenario_dir) / LATENCY_SKETCH_FILE
+    latency_sketches = {}
+    if sketch_file.exists():
+        with open(sketch_file) as f:
+            latency_sketches = json.load(f)
+    return {
+        "scenario": scenario_dir,
+        "status": "ok",
+        "seconds": round(time.perf_counter() - start, 2),
+        **summarize_results(results),
+        "latency_sketches": latency_sketches,
+    }
+
+
+def _stats(values: List[float]) -> Optional[Dict]:
+    values = np.array([v for v in values if v is not None], dtype=np.float64)
+    if len(values) == 0:
+        return None
+    return {
+        "mean": round(float(values.mean()), 4),
+        "variance": round(float(values.var(ddof=1 if len(values) > 1 else 0)), 6),
+        "std": round(float(values.std(ddof=1 if len(values) > 1 else 0)), 4),
+        "min": round(float(values.min()), 4),
+        "max": round(float(values.max()), 4),
+        "n": int(len(values)),
+    }
+
+
+def aggregate(runs: List[Dict]) -> Dict:
+    """Mean, variance, std, min and max of every metric across successful runs."""
+    ok = [r for r in runs if r["status"] == "ok"]
+    report = {
+        method: {metric: _stats([r[method][metric] for r in ok]) for metric in METHOD_METRICS}
+        for method in ("rules_only", "loglm")
+    }
+    comparison_keys = ok[0]["comparison"].keys() if ok else []
+    report["comparison"] = {key: _stats([r["comparison"][key] for r in ok]) for key in comparison_keys}
+
+    # Latency quantiles over all scenarios' events, from the merged sketches
+    report["detection_latency"] = {}
+    for method in ("rules_only", "loglm"):
+        merged = KeyedSketches()
+        for r in ok:
+            if method in r.get("latency_sketches", {}):
+                merged.merge(KeyedSketches.from_dict(r["latency_sketches"][method]))
+        report["detection_latency"][method] = latency_summary(merged)
+    return report
+
+
+def run_batch(scenarios: List[Path], cache_dir: Path, workers: Optional[int] = None,
+              use_cache: bool = True) -> List[Dict]:
+    """
+    Evaluate scenarios, reusing cached results whose fingerprint still matches.
+
+    Returns:
+        One result dict per scenario, in the order given
+    """
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    version = pipeline_version()
+    fingerprints = {str(s): scenario_fingerprint(s, version) for s in scenarios}
+
+    results: Dict[str, Dict] = {}
+    pending = []
+    for scenario, fingerprint in fingerprints.items():
+        cached = cache_dir / f"{fingerprint}.json"
+        if use_cache and cached.exists():
+            with open(cached) as f:
+                results[scenario] = {**json.load(f), "scenario": scenario, "cached": True}
+        else:
+            pending.append(scenario)
+    print(f"{len(scenarios)} scenarios: {len(scenarios) - len(pending)} cached, {len(pending)} to run")
+
+    if pending:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = {pool.submit(run_scenario, scenario): scenario for scenario in pending}
+            for done, future in enumerate(as_completed(futures), 1):
+                result = future.result()
+                scenario = futures[future]
+                results[scenario] = {**result, "cached": False}
+                if result["status"] == "ok":
+                    with open(cache_dir / f"{fingerprints[scenario]}.json", "w") as f:
+                        json.dump(result, f, indent=2)
+                    status = f"LogLM F1 {result['loglm']['f1_score']:.3f}, rules F1 {result['rules_only']['f1_score']:.3f}"
+                else:
+                    status = "FAILED"
+                print(f"  [{done}/{len(pending)}] {scenario}: {status}")
+
+    return [results[str(s)] for s in scenarios]
+
+
+def check_gates(report: Dict, runs: List[Dict], min_f1: Optional[float] = None,
+                min_recall: Optional[float] = None, baseline: Optional[Dict] = None,
+                tolerance: float = 0.0) -> List[str]:
+    """
+    Regression gate.
+
+    Returns:
+        Failure messages; empty when every gate passes
+    """
+    failures = [f"{r['scenario']}: pipeline error" for r in runs if r["status"] != "ok"]
+    ok = [r for r in runs if r["status"] == "ok"]
+    for metric, floor in (("f1_score", min_f1), ("recall", min_recall)):
+        if floor is None:
+            continue
+        for r in ok:
+            if r["loglm"][metric] < floor:
+                failures.append(f"{r['scenario']}: LogLM {metric} {r['loglm'][metric]:.4f} < {floor}")
+    if baseline:
+        for metric in ("precision", "recall", "f1_score", "evasive_detection_rate"):
+            old = (baseline["loglm"].get(metric) or {}).get("mean")
+            new = (report["loglm"].get(metric) or {}).get("mean")
+            if old is not None and new is not None and new < old - tolerance:
+                failures.append(f"mean LogLM {metric} dropped from {old:.4f} to {new:.4f}")
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate every scenario under a directory in parallel")
+    parser.add_argument("--root", type=Path, default=SCENARIOS_ROOT, help="Directory to search for scenarios")
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--cache-dir", type=Path, default=None,
+                        help=f"Per-scenario result cache (default: <root>/{CACHE_DIR_NAME})")
+    parser.add_argument("--no-cache", action="store_true", help="Re-run every scenario")
+    parser.add_argument("--output", type=Path, default=None, help=f"Report path (default: <root>/{REPORT_FILE})")
+    parser.add_argument("--min-f1", type=float, default=None, help="Fail if any scenario's LogLM F1 is lower")
+    parser.add_argument("--min-recall", type=float, default=None, help="Fail if any scenario's LogLM recall is lower")
+    parser.add_argument("--baseline", type=Path, default=None, help="Earlier report to compare mean metrics against")
+    parser.add_argument("--tolerance", type=float, default=0.0, help="Allowed drop in mean metrics vs. the baseline")
+    args = parser.parse_args()
+
+    scenarios = discover_scenarios(args.root)
+    if not scenarios:
+        print(f"No scenarios found under {args.root}")
+        sys.exit(1)
+
+    print("=" * 60)
+    print("Batch Evaluation")
+    print("=" * 60)
+    start = time.perf_counter()
+    runs = run_batch(scenarios, args.cache_dir or args.root / CACHE_DIR_NAME,
+                     workers=args.workers or os.cpu_count(), use_cache=not args.no_cache)
+    report = aggregate(runs)
+    elapsed = time.perf_counter() - start
+
+    output = args.output or args.root / REPORT_FILE
+    with open(output, "w") as f:
+        json.dump({"scenarios": len(runs), "summary": report, "runs": runs}, f, indent=2)
+
+    print(f"\n{len(runs)} scenarios in {elapsed:.1f}s "
+          f"({sum(1 for r in runs if r.get('cached'))} from cache)")
+    print("-" * 60)
+    print(f"{'Metric':<25} {'Rules-Only (mean ± std)':<25} {'LogLM (mean ± std)':<25}")
+    print("-" * 60)
+    for metric in METHOD_METRICS:
+        cells = []
+        for method in ("rules_only", "loglm"):
+            s = report[method][metric]
+            cells.append(f"{s['mean']:.4f} ± {s['std']:.4f}" if s else "n/a")
+        print(f"{metric:<25} {cells[0]:<25} {cells[1]:<25}")
+    cells = []
+    for method in ("rules_only", "loglm"):
+        overall = report["detection_latency"][method]["overall"]
+        cells.append(f"{overall['p50']} / {overall['p90']} / {overall['p99']}" if overall and overall["count"] else "n/a")
+    print(f"{'latency p50/p90/p99 min':<25} {cells[0]:<25} {cells[1]:<25}")
+    print(f"\nReport saved to: {output}")
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline) as f:
+            baseline = json.load(f)["summary"]
+    failures = check_gates(report, runs, min_f1=args.min_f1, min_recall=args.min_recall,
+                           baseline=baseline, tolerance=args.tolerance)
+    if failures:
+        print(f"\nRegression gate FAILED ({len(failures)}):")
+        for failure in failures:
+            print(f"  {failure}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
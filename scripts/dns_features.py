@@ -0,0 +1,292 @@
+#!/usr/bin/env python3
+"""
+DNS Tunneling Features
+
+Extracts lexical and behavioral features from `zeek_dns` queries for
+tunneling and DNS C2 detection:
+- Shannon entropy and character-class ratios of the leftmost label
+- Label count and longest label length
+- Bigram rarity against the bigram distribution of the observed traffic
+- Unique subdomains seen per registered domain
+
+Queries are dictionary-encoded: each distinct query name is assigned a code
+once and its lexical features are computed once, in batches, over a byte
+matrix of the new names. Later batches only look up codes, so the cost
+follows the number of distinct names rather than the query volume.
+
+    python scripts/dns_features.py
+"""
+
+import argparse
+from pathlib import Path
+from typing import Dict, Iterable, List
+
+import numpy as np
+
+try:
+    from scripts.log_io import load_log
+except ImportError:
+    from log_io import load_log
+
+SCENARIO_DIR = Path(__file__).parent.parent / "data" / "scenarios" / "default_attack"
+
+# Per-name feature columns, in matrix order
+FEATURE_NAMES = [
+    "length",
+    "label_count",
+    "max_label_length",
+    "subdomain_length",
+    "entropy",
+    "digit_ratio",
+    "hex_ratio",
+    "hyphen_ratio",
+    "bigram_rarity",
+]
+COLUMN = {name: i for i, name in enumerate(FEATURE_NAMES)}
+
+# Names scoring at or above this are treated as likely tunneling
+TUNNELING_THRESHOLD = 0.6
+
+# Longest possible DNS name
+MAX_NAME_LENGTH = 253
+
+_DIGITS = np.zeros(256, dtype=bool)
+_DIGITS[ord("0"):ord("9") + 1] = True
+_HEX = _DIGITS.copy()
+_HEX[ord("a"):ord("f") + 1] = True
+
+
+def registered_domain(query: str) -> str:
+    """Last two labels of a DNS name ("a1b2.status.example.net" -> "example.net")."""
+    labels = query.rstrip(".").split(".")
+    return ".".join(labels[-2:])
+
+
+def _byte_matrix(strings: List[str]) -> np.ndarray:
+    """Lower-cased names as a zero-padded (n, width) uint8 matrix."""
+    width = max((len(s) for s in strings), default=1) or 1
+    encoded = np.array([s.lower().encode("ascii", "replace")[:MAX_NAME_LENGTH] for s in strings],
+                       dtype=f"S{min(width, MAX_NAME_LENGTH)}")
+    return encoded.view(np.uint8).reshape(len(strings), -1)
+
+
+def lexical_features(names: List[str], bigram_logp: np.ndarray) -> np.ndarray:
+    """
+    Compute lexical features for a batch of query names.
+
+    Args:
+        names: Distinct query names
+        bigram_logp: (65536,) log2 probabilities of byte bigrams
+
+    Returns:
+        (len(names), len(FEATURE_NAMES)) float32 matrix
+    """
+    n = len(names)
+    features = np.zeros((n, len(FEATURE_NAMES)), dtype=np.float32)
+    if n == 0:
+        return features
+
+    full = _byte_matrix(names)
+    valid = full != 0
+    is_dot = full == ord(".")
+    features[:, COLUMN["length"]] = valid.sum(axis=1)
+    features[:, COLUMN["label_count"]] = is_dot.sum(axis=1) + 1
+
+    # Label lengths: characters per (row, label number) cell
+    label_no = np.cumsum(is_dot, axis=1)
+    rows = np.broadcast_to(np.arange(n)[:, None], full.shape)
+    chars = valid & ~is_dot
+    n_labels = int(label_no.max()) + 1
+    label_lengths = np.bincount((rows * n_labels + label_no)[chars], minlength=n * n_labels)
+    features[:, COLUMN["max_label_length"]] = label_lengths.reshape(n, n_labels).max(axis=1)
+
+    # The subdomain is everything left of the registered domain; encoded
+    # payloads sit in its leftmost label, so character statistics use that
+    subdomains = [name[:max(len(name) - len(registered_domain(name)) - 1, 0)] for name in names]
+    features[:, COLUMN["subdomain_length"]] = [len(s) - s.count(".") for s in subdomains]
+    sub = _byte_matrix([s.split(".", 1)[0] for s in subdomains])
+    sub_valid = sub != 0
+    sub_len = sub_valid.sum(axis=1)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        denom = np.maximum(sub_len, 1)
+        features[:, COLUMN["digit_ratio"]] = (_DIGITS[sub] & sub_valid).sum(axis=1) / denom
+        features[:, COLUMN["hex_ratio"]] = (_HEX[sub] & sub_valid).sum(axis=1) / denom
+        features[:, COLUMN["hyphen_ratio"]] = ((sub == ord("-")) & sub_valid).sum(axis=1) / denom
+
+        # Shannon entropy of the label's character distribution
+        sub_rows = np.broadcast_to(np.arange(n)[:, None], sub.shape)
+        counts = np.bincount((sub_rows * 256 + sub)[sub_valid], minlength=n * 256).reshape(n, 256)
+        p = counts / denom[:, None]
+        features[:, COLUMN["entropy"]] = -np.sum(np.where(p > 0, p * np.log2(p), 0.0), axis=1)
+
+        # Mean surprisal of the label's bigrams
+        if sub.shape[1] > 1:
+            pair_valid = sub_valid[:, :-1] & sub_valid[:, 1:]
+            codes = sub[:, :-1].astype(np.int32) * 256 + sub[:, 1:]
+            surprisal = np.where(pair_valid, -bigram_logp[codes], 0.0)
+            features[:, COLUMN["bigram_rarity"]] = surprisal.sum(axis=1) / np.maximum(pair_valid.sum(axis=1), 1)
+    return features
+
+
+def tunneling_score(features: np.ndarray, unique_subdomains: np.ndarray) -> np.ndarray:
+    """
+    Combine feature columns into a tunneling score in [0, 1].
+
+    Each term saturates at a level typical of encoded payloads: high
+    entropy, hex-like alphabets, long labels, rare bigrams, and a
+    registered domain that keeps receiving never-before-seen subdomains.
+    """
+    f = features
+    has_sub = f[:, COLUMN["subdomain_length"]] >= 4
+    entropy = np.clip((f[:, COLUMN["entropy"]] - 2.5) / 1.5, 0.0, 1.0)
+    encoded = np.where(f[:, COLUMN["digit_ratio"]] > 0, f[:, COLUMN["hex_ratio"]], 0.0)
+    length = np.clip((f[:, COLUMN["max_label_length"]] - 12) / 28, 0.0, 1.0)
+    rarity = np.clip((f[:, COLUMN["bigram_rarity"]] - 10.0) / 4.0, 0.0, 1.0)
+    spread = np.clip(np.log2(np.maximum(unique_subdomains, 1)) / 5.0, 0.0, 1.0)
+
+    score = 0.15 * entropy + 0.3 * encoded + 0.1 * length + 0.15 * rarity + 0.3 * spread
+    return np.where(has_sub, score, 0.0).astype(np.float32)
+
+
+class DnsFeatureExtractor:
+    """
+    Dictionary-encoded DNS feature extraction with a per-name feature cache.
+
+    The dictionary, cached features and per-registered-domain subdomain
+    counts persist across batches, so a long-running process only pays the
+    lexical extraction cost once per distinct name.
+    """
+
+    def __init__(self, capacity: int = 4096):
+        self.codes: Dict[str, int] = {}
+        self.names: List[str] = []
+        self.features = np.zeros((capacity, len(FEATURE_NAMES)), dtype=np.float32)
+        self.domain_codes: Dict[str, int] = {}
+        self.name_domain = np.zeros(capacity, dtype=np.int64)
+        self.domain_subdomains = np.zeros(1024, dtype=np.int64)
+        self.bigram_counts = np.ones(65536, dtype=np.float64)  # add-one smoothing
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _reserve(self, size: int) -> None:
+        if size > len(self.features):
+            capacity = max(size, 2 * len(self.features))
+            grown = np.zeros((capacity, len(FEATURE_NAMES)), dtype=np.float32)
+            grown[:len(self.names)] = self.features[:len(self.names)]
+            self.features = grown
+            self.name_domain = np.resize(self.name_domain, capacity)
+
+    def _domain_code(self, domain: str) -> int:
+        code = self.domain_codes.get(domain)
+        if code is None:
+            code = len(self.domain_codes)
+            self.domain_codes[domain] = code
+            if code == len(self.domain_subdomains):
+                self.domain_subdomains = np.concatenate([self.domain_subdomains, np.zeros_like(self.domain_subdomains)])
+        return code
+
+    def _observe_bigrams(self, names: np.ndarray, counts: np.ndarray) -> None:
+        """Fold the batch's bigrams, weighted by query volume, into the reference distribution."""
+        matrix = _byte_matrix(list(names))
+        if matrix.shape[1] < 2:
+            return
+        valid = (matrix[:, :-1] != 0) & (matrix[:, 1:] != 0)
+        codes = matrix[:, :-1].astype(np.int32) * 256 + matrix[:, 1:]
+        weights = np.broadcast_to(counts[:, None], codes.shape)
+        self.bigram_counts += np.bincount(codes[valid], weights=weights[valid], minlength=65536)
+
+    def encode(self, queries: Iterable[str]) -> np.ndarray:
+        """
+        Map queries to dictionary codes, extracting features for new names.
+
+        Returns:
+            int64 code per query
+        """
+        queries = np.asarray(list(queries), dtype=object)
+        uniques, inverse, counts = np.unique(queries.astype(str), return_inverse=True, return_counts=True)
+        self._observe_bigrams(uniques, counts)
+
+        new = [name for name in uniques if name not in self.codes]
+        if new:
+            start = len(self.names)
+            self._reserve(start + len(new))
+            logp = np.log2(self.bigram_counts / self.bigram_counts.sum())
+            self.features[start:start + len(new)] = lexical_features(new, logp)
+            for offset, name in enumerate(new):
+                self.codes[name] = start + offset
+                self.names.append(name)
+                domain = self._domain_code(registered_domain(name))
+                self.name_domain[start + offset] = domain
+                self.domain_subdomains[domain] += 1
+
+        unique_codes = np.fromiter((self.codes[name] for name in uniques), dtype=np.int64, count=len(uniques))
+        return unique_codes[inverse.reshape(-1)]
+
+    def unique_subdomains(self, codes: np.ndarray) -> np.ndarray:
+        """Distinct names seen so far under each code's registered domain."""
+        return self.domain_subdomains[self.name_domain[codes]]
+
+    def score(self, codes: np.ndarray) -> np.ndarray:
+        """Tunneling score per code."""
+        return tunneling_score(self.features[codes], self.unique_subdomains(codes))
+
+    def score_query(self, query: str) -> float:
+        """Tunneling score of an already-encoded query name (0 if unseen)."""
+        code = self.codes.get(query)
+        if code is None:
+            return 0.0
+        return float(self.score(np.array([code]))[0])
+
+    def features_for(self, query: str) -> Dict[str, float]:
+        """Feature dict for an already-encoded query name."""
+        code = self.codes[query]
+        row = {name: round(float(self.features[code, i]), 3) for i, name in enumerate(FEATURE_NAMES)}
+        row["unique_subdomains"] = int(self.domain_subdomains[self.name_domain[code]])
+        row["tunneling_score"] = round(float(self.score(np.array([code]))[0]), 3)
+        return row
+
+
+def score_dns_events(events: List[Dict], extractor: DnsFeatureExtractor = None) -> Dict[str, Dict[str, float]]:
+    """
+    Extract features for every DNS event in one batch.
+
+    Returns:
+        Event id -> feature dict (including tunneling_score)
+    """
+    extractor = extractor or DnsFeatureExtractor()
+    dns_events = [e for e in events if e.get("query")]
+    if not dns_events:
+        return {}
+    extractor.encode(e["query"] for e in dns_events)
+    by_name = {name: extractor.features_for(name) for name in {e["query"] for e in dns_events}}
+    return {e["id"]: by_name[e["query"]] for e in dns_events}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract DNS tunneling features from zeek_dns")
+    parser.add_argument("--threshold", type=float, default=TUNNELING_THRESHOLD)
+    args = parser.parse_args()
+
+    dns_events = load_log(SCENARIO_DIR / "raw_logs", "dns")
+
+    extractor = DnsFeatureExtractor()
+    codes = extractor.encode(e["query"] for e in dns_events)
+    scores = extractor.score(codes)
+
+    print("=" * 60)
+    print(f"DNS queries: {len(dns_events)} ({len(extractor)} distinct names, "
+          f"{len(extractor.domain_codes)} registered domains)")
+    print(f"Above tunneling threshold {args.threshold}: {int((scores >= args.threshold).sum())}")
+    print("=" * 60)
+    ranked = sorted(extractor.codes.values(), key=lambda c: -extractor.score(np.array([c]))[0])
+    for code in ranked[:15]:
+        name = extractor.names[code]
+        row = extractor.features_for(name)
+        print(f"  {row['tunneling_score']:.2f}  {name}  (entropy {row['entropy']}, "
+              f"rarity {row['bigram_rarity']}, {row['unique_subdomains']} subdomains)")
+
+
+if __name__ == "__main__":
+    main()
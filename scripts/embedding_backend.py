@@ -0,0 +1,281 @@
+#!/usr/bin/env python3
+"""
+Embedding Backend
+
+Pluggable source of event embeddings for the LogLM pipeline:
+- EmbeddingProvider: batched `embed_batch(events, contexts)` returning a
+  float32 (N, dim) matrix; providers only implement one batch call
+- LocalEmbeddingProvider: deterministic offline stand-in for the LogLM
+  model; the same event and context always give the same vector
+- EmbeddingDispatcher: splits work into batches and sends them with
+  bounded concurrency over a bounded queue (backpressure), retrying
+  batches that fail with EmbeddingBackendError
+
+Providers are looked up by name (LOGLM_EMBEDDING_PROVIDER), so a remote
+LogLM service is added with register_provider() and selected by
+configuration; batch size and concurrency come from
+LOGLM_EMBEDDING_BATCH_SIZE and LOGLM_EMBEDDING_CONCURRENCY.
+
+    python scripts/embedding_backend.py --events 100000
+"""
+
+import argparse
+import asyncio
+import hashlib
+import itertools
+import os
+import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+try:
+    from scripts.event_store import canonical_event_bytes
+except ImportError:
+    from event_store import canonical_event_bytes
+
+DEFAULT_PROVIDER = os.environ.get("LOGLM_EMBEDDING_PROVIDER", "local")
+DEFAULT_BATCH_SIZE = int(os.environ.get("LOGLM_EMBEDDING_BATCH_SIZE", "256"))
+DEFAULT_CONCURRENCY = int(os.environ.get("LOGLM_EMBEDDING_CONCURRENCY", "4"))
+
+# Retries per batch before the error is raised, and the first backoff delay
+MAX_RETRIES = 3
+RETRY_BACKOFF_SECONDS = 0.5
+
+
+class EmbeddingBackendError(Exception):
+    """A batch request failed in a way that is worth retrying."""
+
+
+class EmbeddingProvider(ABC):
+    """Source of event embeddings."""
+
+    name = "base"
+    dim = 768
+    # Largest batch the provider accepts in one request
+    max_batch_size = 1024
+
+    @property
+    def model_version(self) -> str:
+        """Identifies the vectors this provider returns; used in cache keys."""
+        return self.name
+
+    @abstractmethod
+    async def embed_batch(self, events: Sequence[Dict], contexts: Sequence[str]) -> np.ndarray:
+        """
+        Embed one batch.
+
+        Args:
+            events: Raw events
+            contexts: One context string per event (e.g. the top technique)
+
+        Returns:
+            float32 array of shape (len(events), dim)
+
+        Raises:
+            EmbeddingBackendError: Transient failure; the batch is retried
+        """
+
+    def embed(self, events: Sequence[Dict], contexts: Optional[Sequence[str]] = None) -> np.ndarray:
+        """Embed all events with the default dispatcher settings."""
+        return EmbeddingDispatcher(self).embed(events, contexts)
+
+    async def close(self) -> None:
+        """Release connections; called once the dispatcher is done."""
+
+
+class LocalEmbeddingProvider(EmbeddingProvider):
+    """
+    Deterministic stand-in for the LogLM model.
+
+    Events that share a context, destination and service get the same base
+    direction, so similar activity clusters together. A small per-event
+    offset, seeded from the event content, separates individual events.
+    """
+
+    name = "local"
+
+    def __init__(self, dim: int = 768, base_scale: float = 0.3, noise_scale: float = 0.1):
+        self.dim = dim
+        self.base_scale = base_scale
+        self.noise_scale = noise_scale
+        self._bases: Dict[int, np.ndarray] = {}
+
+    @property
+    def model_version(self) -> str:
+        return f"local-sim-2/{self.dim}"
+
+    def _base(self, event: Dict, context: str) -> np.ndarray:
+        seed_str = f"{context}_{event.get('id.resp_h', '')}_{event.get('service', '')}"
+        seed = int(hashlib.md5(seed_str.encode()).hexdigest()[:8], 16)
+        base = self._bases.get(seed)
+        if base is None:
+            base = np.random.RandomState(seed).randn(self.dim) * self.base_scale
+            self._bases[seed] = base
+        return base
+
+    def embed_sync(self, events: Sequence[Dict], contexts: Sequence[str]) -> np.ndarray:
+        out = np.empty((len(events), self.dim), dtype=np.float64)
+        for i, (event, context) in enumerate(zip(events, contexts)):
+            seed = int.from_bytes(hashlib.sha1(canonical_event_bytes(event)).digest()[:8], "little")
+            noise = np.random.default_rng(seed).standard_normal(self.dim) * self.noise_scale
+            out[i] = self._base(event, context) + noise
+        out /= np.linalg.norm(out, axis=1, keepdims=True)
+        return out.astype(np.float32)
+
+    async def embed_batch(self, events: Sequence[Dict], contexts: Sequence[str]) -> np.ndarray:
+        return self.embed_sync(events, contexts)
+
+
+class EmbeddingDispatcher:
+    """Sends embedding batches to a provider with bounded concurrency and retries."""
+
+    def __init__(self, provider: EmbeddingProvider, batch_size: int = DEFAULT_BATCH_SIZE,
+                 concurrency: int = DEFAULT_CONCURRENCY, max_pending: Optional[int] = None,
+                 max_retries: int = MAX_RETRIES, backoff: float = RETRY_BACKOFF_SECONDS,
+                 timeout: Optional[float] = None):
+        """
+        Args:
+            provider: Embedding provider
+            batch_size: Events per request (capped at provider.max_batch_size)
+            concurrency: Requests in flight at once
+            max_pending: Batches queued ahead of the workers; the producer
+                waits when the queue is full (default 2 x concurrency)
+            max_retries: Retries per batch on EmbeddingBackendError or timeout
+            backoff: First retry delay in seconds, doubled on each retry
+            timeout: Per-request timeout in seconds
+        """
+        self.provider = provider
+        self.batch_size = max(1, min(batch_size, provider.max_batch_size))
+        self.concurrency = max(1, concurrency)
+        self.max_pending = max_pending or 2 * self.concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.stats = {"batches": 0, "events": 0, "retries": 0}
+
+    async def _send(self, events: List[Dict], contexts: List[str]) -> np.ndarray:
+        for attempt in range(self.max_retries + 1):
+            try:
+                request = self.provider.embed_batch(events, contexts)
+                vectors = await (asyncio.wait_for(request, self.timeout) if self.timeout else request)
+            except (EmbeddingBackendError, asyncio.TimeoutError):
+                if attempt == self.max_retries:
+                    raise
+                self.stats["retries"] += 1
+                await asyncio.sleep(self.backoff * 2 ** attempt)
+                continue
+            vectors = np.asarray(vectors, dtype=np.float32)
+            if vectors.shape != (len(events), self.provider.dim):
+                raise ValueError(f"{self.provider.name} returned shape {vectors.shape} "
+                                 f"for a batch of {len(events)}")
+            return vectors
+
+    async def embed_async(self, events: Iterable[Dict], contexts: Optional[Iterable[str]] = None) -> np.ndarray:
+        """
+        Embed events, preserving input order.
+
+        Events are read lazily, so at most max_pending batches of input are
+        held ahead of the requests in flight.
+        """
+        contexts = itertools.repeat("") if contexts is None else contexts
+        pairs = iter(zip(events, contexts))
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.max_pending)
+        results: Dict[int, np.ndarray] = {}
+
+        async def produce():
+            for seq in itertools.count():
+                batch = list(itertools.islice(pairs, self.batch_size))
+                if not batch:
+                    break
+                await queue.put((seq, batch))
+            for _ in range(self.concurrency):
+                await queue.put(None)
+
+        async def work():
+            while True:
+                item = await queue.get()
+                if item is None:
+                    return
+                seq, batch = item
+                batch_events, batch_contexts = map(list, zip(*batch))
+                results[seq] = await self._send(batch_events, batch_contexts)
+                self.stats["batches"] += 1
+                self.stats["events"] += len(batch)
+
+        tasks = [asyncio.create_task(produce())] + [asyncio.create_task(work()) for _ in range(self.concurrency)]
+        try:
+            await asyncio.gather(*tasks)
+        except BaseException:
+            for task in tasks:
+                task.cancel()
+            raise
+        finally:
+            await self.provider.close()
+
+        if not results:
+            return np.zeros((0, self.provider.dim), dtype=np.float32)
+        return np.concatenate([results[i] for i in range(len(results))])
+
+    def embed(self, events: Iterable[Dict], contexts: Optional[Iterable[str]] = None) -> np.ndarray:
+        """Blocking embed_async; safe to call from inside a running event loop."""
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return asyncio.run(self.embed_async(events, contexts))
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            return pool.submit(asyncio.run, self.embed_async(events, contexts)).result()
+
+
+PROVIDERS: Dict[str, Callable[..., EmbeddingProvider]] = {
+    "local": LocalEmbeddingProvider,
+}
+
+
+def register_provider(name: str, factory: Callable[..., EmbeddingProvider]) -> None:
+    """Make a provider available to get_provider() under `name`."""
+    PROVIDERS[name] = factory
+
+
+def get_provider(name: Optional[str] = None, **kwargs) -> EmbeddingProvider:
+    """
+    Instantiate a provider by name (default: LOGLM_EMBEDDING_PROVIDER or "local").
+
+    Raises:
+        ValueError: Unknown provider name
+    """
+    name = name or DEFAULT_PROVIDER
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown embedding provider '{name}'. Available: {', '.join(sorted(PROVIDERS))}")
+    return PROVIDERS[name](**kwargs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark an embedding provider")
+    parser.add_argument("--provider", default=None)
+    parser.add_argument("--events", type=int, default=10000)
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--concurrency", type=int, default=DEFAULT_CONCURRENCY)
+    args = parser.parse_args()
+
+    provider = get_provider(args.provider)
+    events = [
+        {"id": f"evt_{i}", "id.resp_h": f"10.0.{i % 7}.{i % 13}", "service": "ssl", "orig_bytes": i}
+        for i in range(args.events)
+    ]
+    dispatcher = EmbeddingDispatcher(provider, batch_size=args.batch_size, concurrency=args.concurrency)
+    start = time.perf_counter()
+    vectors = dispatcher.embed(events, ["T1071.001"] * len(events))
+    elapsed = time.perf_counter() - start
+
+    print("=" * 60)
+    print(f"Provider: {provider.name} ({provider.model_version})")
+    print("=" * 60)
+    print(f"Embedded {len(vectors)} events in {elapsed:.2f}s "
+          f"({len(vectors) / max(elapsed, 1e-9):.0f} events/s, {dispatcher.stats['batches']} batches)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Embedding Cache
+
+Persists event embeddings across pipeline runs so re-runs, backfills and
+replays only embed events the model has not seen:
+- Keys are SHA-1 digests of the model version, an optional context string
+  and the canonical event content (see event_store.canonical_event_bytes)
+- Vectors live in a memory-mapped float32 matrix (`vectors.npy`); a
+  key -> row index (`index.npz`) maps digests to rows
+- The matrix grows by doubling up to a fixed row capacity; once full, the
+  least recently used rows are evicted and reused
+
+Changing the model version changes every key, so stale vectors are never
+returned and simply age out of the cache.
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from scripts.event_store import canonical_event_bytes
+except ImportError:
+    from event_store import canonical_event_bytes
+
+VECTORS_FILE = "vectors.npy"
+INDEX_FILE = "index.npz"
+META_FILE = "meta.json"
+
+DEFAULT_CAPACITY = 100000
+INITIAL_ROWS = 1024
+
+KEY_BYTES = hashlib.sha1().digest_size
+
+
+class EmbeddingCache:
+    """Memory-mapped, size-bounded embedding cache keyed by content digest."""
+
+    def __init__(self, directory: Path, dim: int, capacity: int = DEFAULT_CAPACITY, model_version: str = ""):
+        """
+        Open the cache in `directory`, creating it if needed.
+
+        An existing cache keeps its own capacity; one written with a
+        different dimension is discarded and recreated.
+
+        Args:
+            directory: Cache directory
+            dim: Embedding dimension
+            capacity: Maximum number of cached vectors
+            model_version: Folded into every key
+        """
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.dim = dim
+        self.model_version = model_version
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+        meta = self._read_meta()
+        if meta and meta["dim"] == dim and (self.directory / INDEX_FILE).exists():
+            self.capacity = meta["capacity"]
+            self.clock = meta["clock"]
+            self.vectors = np.load(self.directory / VECTORS_FILE, mmap_mode="r+")
+            with np.load(self.directory / INDEX_FILE) as index:
+                keys = [bytes(k) for k in index["keys"]]
+                rows, last_used = index["rows"], index["last_used"]
+        else:
+            self.capacity = capacity
+            self.clock = 0
+            self.vectors = self._create_matrix(min(INITIAL_ROWS, capacity))
+            keys = []
+            rows = np.array([], dtype=np.int64)
+            last_used = np.array([], dtype=np.int64)
+
+        n_rows = len(self.vectors)
+        self.rows: Dict[bytes, int] = dict(zip(keys, rows.tolist()))
+        self.row_keys: List[Optional[bytes]] = [None] * n_rows
+        self.last_used = np.zeros(n_rows, dtype=np.int64)
+        for key, row, used in zip(keys, rows.tolist(), last_used.tolist()):
+            self.row_keys[row] = key
+            self.last_used[row] = used
+        self.free = sorted(set(range(n_rows)) - set(self.rows.values()), reverse=True)
+
+    def _create_matrix(self, n_rows: int, existing: Optional[np.ndarray] = None) -> np.ndarray:
+        """Write a new vectors file with n_rows rows, copying any existing rows."""
+        tmp = self.directory / (VECTORS_FILE + ".tmp.npy")
+        matrix = np.lib.format.open_memmap(tmp, mode="w+", dtype=np.float32, shape=(n_rows, self.dim))
+        if existing is not None:
+            matrix[:len(existing)] = existing
+            matrix.flush()
+            del existing
+        del matrix
+        os.replace(tmp, self.directory / VECTORS_FILE)
+        return np.load(self.directory / VECTORS_FILE, mmap_mode="r+")
+
+    def _grow(self, needed: int) -> None:
+        """Extend the matrix (up to capacity) so at least `needed` more rows are free."""
+        old = len(self.vectors)
+        n_rows = min(self.capacity, max(2 * old, old + needed))
+        if n_rows == old:
+            return
+        self.vectors.flush()
+        self.vectors = self._create_matrix(n_rows, existing=self.vectors)
+        self.row_keys.extend([None] * (n_rows - old))
+        self.last_used = np.concatenate([self.last_used, np.zeros(n_rows - old, dtype=np.int64)])
+        self.free = list(range(n_rows - 1, old - 1, -1)) + self.free
+
+    def _read_meta(self) -> Optional[Dict]:
+        path = self.directory / META_FILE
+        if not path.exists():
+            return None
+        with open(path) as f:
+            return json.load(f)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def key(self, event: Dict, context: str = "") -> bytes:
+        """Cache key for an event embedded under this model version and context."""
+        h = hashlib.sha1(self.model_version.encode())
+        h.update(b"\0" + context.encode() + b"\0")
+        h.update(canonical_event_bytes(event))
+        return h.digest()
+
+    def get_many(self, keys: Sequence[bytes]) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Look up vectors.
+
+        Returns:
+            (float32 matrix with one row per key, boolean hit mask); rows of
+            missing keys are zero
+        """
+        self.clock += 1
+        out = np.zeros((len(keys), self.dim), dtype=np.float32)
+        rows = np.array([self.rows.get(k, -1) for k in keys], dtype=np.int64)
+        hit = rows >= 0
+        out[hit] = self.vectors[rows[hit]]
+        self.last_used[rows[hit]] = self.clock
+        self.hits += int(hit.sum())
+        self.misses += int((~hit).sum())
+        return out, hit
+
+    def _allocate(self, n: int) -> np.ndarray:
+        """Rows for n new entries, growing the matrix or evicting least recently used rows."""
+        if n > len(self.free):
+            self._grow(n - len(self.free))
+        rows = [self.free.pop() for _ in range(min(n, len(self.free)))]
+        self.last_used[rows] = self.clock
+        shortfall = n - len(rows)
+        if shortfall > 0:
+            # Rows touched in the current access are not eligible
+            candidates = np.flatnonzero(self.last_used < self.clock)
+            victims = candidates[np.argsort(self.last_used[candidates], kind="stable")[:shortfall]]
+            for row in victims.tolist():
+                del self.rows[self.row_keys[row]]
+                self.row_keys[row] = None
+            self.evictions += len(victims)
+            rows.extend(victims.tolist())
+        return np.array(rows, dtype=np.int64)
+
+    def put_many(self, keys: Sequence[bytes], vectors: np.ndarray) -> None:
+        """Store vectors; keys beyond what the cache can hold are dropped."""
+        seen = set()
+        new = []
+        for i, k in enumerate(keys):
+            if k not in self.rows and k not in seen:
+                seen.add(k)
+                new.append((i, k))
+        rows = self._allocate(len(new))
+        for (i, key), row in zip(new, rows.tolist()):
+            self.rows[key] = row
+            self.row_keys[row] = key
+        if len(rows):
+            idx = np.array([i for i, _ in new[:len(rows)]], dtype=np.int64)
+            self.vectors[rows] = vectors[idx]
+            self.last_used[rows] = self.clock
+
+    def get_or_compute(self, keys: Sequence[bytes], compute: Callable[[np.ndarray], np.ndarray]) -> np.ndarray:
+        """
+        Return vectors for all keys, computing only the misses.
+
+        Args:
+            keys: Cache keys
+            compute: Called once with the indices (into keys) of the distinct
+                misses; returns their vectors as an (n, dim) array
+        """
+        out, hit = self.get_many(keys)
+        missing = np.flatnonzero(~hit)
+        if len(missing):
+            # Compute each distinct missing key once
+            first: Dict[bytes, int] = {}
+            for i in missing.tolist():
+                first.setdefault(keys[i], i)
+            computed = np.asarray(compute(np.array(list(first.values()), dtype=np.int64)), dtype=np.float32)
+            position = {key: j for j, key in enumerate(first)}
+            out[missing] = computed[[position[keys[i]] for i in missing.tolist()]]
+            self.put_many(list(first), computed)
+        return out
+
+    def flush(self) -> None:
+        """Write the index and flush vectors to disk."""
+        self.vectors.flush()
+        occupied = [row for row, key in enumerate(self.row_keys) if key is not None]
+        tmp_index = self.directory / (INDEX_FILE + ".tmp.npz")
+        # Raw digest bytes; fixed-width "S" strings would drop trailing NULs
+        keys = b"".join(self.row_keys[r] for r in occupied)
+        np.savez(
+            tmp_index,
+            keys=np.frombuffer(keys, dtype=np.uint8).reshape(len(occupied), KEY_BYTES),
+            rows=np.array(occupied, dtype=np.int64),
+            last_used=self.last_used[occupied],
+        )
+        os.replace(tmp_index, self.directory / INDEX_FILE)
+        with open(self.directory / META_FILE, "w") as f:
+            json.dump({"dim": self.dim, "capacity": self.capacity, "clock": self.clock,
+                       "model_version": self.model_version}, f, indent=2)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "entries": len(self.rows),
+            "capacity": self.capacity,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+        }
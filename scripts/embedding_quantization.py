@@ -0,0 +1,453 @@
+#!/usr/bin/env python3
+"""
+Quantized Embedding Store
+
+Compresses LogLM embeddings so that the full finding corpus fits in RAM:
+- int8 scalar quantization (per-dimension scale/offset, 8x smaller than float64)
+- Product quantization (PQ): one uint8 code per sub-vector (64x smaller at m=96)
+- Asymmetric distance computation (ADC): the query stays float, only the
+  corpus is quantized
+- Exact float re-rank of the top candidates from a memory-mapped float32 matrix
+
+Also ships a recall@k harness that compares quantized search against exact
+search:
+
+    python scripts/embedding_quantization.py
+    python scripts/embedding_quantization.py --synthetic 100000 --codec pq
+"""
+
+import argparse
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+SCENARIO_DIR = Path(__file__).parent.parent / "data" / "scenarios" / "default_attack"
+
+# Candidates fetched from the compressed codes per requested neighbor before
+# the exact float re-rank.
+DEFAULT_RERANK_FACTOR = 10
+
+# Rows scored per block so the dequantized block stays small.
+SEARCH_BLOCK_SIZE = 65536
+
+
+class ScalarQuantizer:
+    """
+    Per-dimension int8 scalar quantizer.
+
+    Each dimension is mapped linearly from [min, max] onto [-127, 127].
+    """
+
+    codec = "int8"
+
+    def __init__(self):
+        self.scale: Optional[np.ndarray] = None
+        self.offset: Optional[np.ndarray] = None
+
+    def fit(self, embeddings: np.ndarray) -> "ScalarQuantizer":
+        """Learn per-dimension ranges from a sample of embeddings."""
+        x = np.asarray(embeddings, dtype=np.float32)
+        lo = x.min(axis=0)
+        hi = x.max(axis=0)
+        self.offset = (hi + lo) / 2
+        self.scale = np.maximum((hi - lo) / 254.0, 1e-12).astype(np.float32)
+        return self
+
+    def encode(self, embeddings: np.ndarray) -> np.ndarray:
+        """Quantize float vectors to int8 codes."""
+        x = np.asarray(embeddings, dtype=np.float32)
+        codes = np.rint((x - self.offset) / self.scale)
+        return np.clip(codes, -127, 127).astype(np.int8)
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """Reconstruct approximate float32 vectors from int8 codes."""
+        return codes.astype(np.float32) * self.scale + self.offset
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """
+        Asymmetric inner-product scores of a float query against int8 codes.
+
+        q . (c * scale + offset) == c . (q * scale) + q . offset, so the
+        corpus never has to be dequantized.
+        """
+        q = np.asarray(query, dtype=np.float32)
+        q_scaled = q * self.scale
+        bias = float(q @ self.offset)
+        out = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), SEARCH_BLOCK_SIZE):
+            block = codes[start:start + SEARCH_BLOCK_SIZE]
+            out[start:start + len(block)] = block.astype(np.float32) @ q_scaled + bias
+        return out
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {"scale": self.scale, "offset": self.offset}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, np.ndarray]) -> "ScalarQuantizer":
+        quantizer = cls()
+        quantizer.scale = np.asarray(state["scale"], dtype=np.float32)
+        quantizer.offset = np.asarray(state["offset"], dtype=np.float32)
+        return quantizer
+
+
+class ProductQuantizer:
+    """
+    Product quantizer with uint8 codes.
+
+    The vector is split into `n_subvectors` contiguous sub-vectors and each
+    one is replaced by the id of its nearest k-means centroid.
+    """
+
+    codec = "pq"
+
+    def __init__(self, n_subvectors: int = 96, n_centroids: int = 256):
+        if n_centroids > 256:
+            raise ValueError("n_centroids must be <= 256 to fit uint8 codes")
+        self.n_subvectors = n_subvectors
+        self.n_centroids = n_centroids
+        self.centroids: Optional[np.ndarray] = None  # (m, k, d_sub)
+
+    def _split(self, x: np.ndarray) -> np.ndarray:
+        n, dim = x.shape
+        if dim % self.n_subvectors:
+            raise ValueError(f"Dimension {dim} is not divisible by {self.n_subvectors} sub-vectors")
+        return x.reshape(n, self.n_subvectors, dim // self.n_subvectors)
+
+    def fit(
+        self,
+        embeddings: np.ndarray,
+        n_iter: int = 20,
+        max_train: int = 50000,
+        seed: int = 0,
+    ) -> "ProductQuantizer":
+        """Train one k-means codebook per sub-space."""
+        rng = np.random.default_rng(seed)
+        x = np.asarray(embeddings, dtype=np.float32)
+        if len(x) > max_train:
+            x = x[rng.choice(len(x), size=max_train, replace=False)]
+
+        k = min(self.n_centroids, len(x))
+        self.n_centroids = k
+        sub = self._split(x)
+        d_sub = sub.shape[2]
+        self.centroids = np.empty((self.n_subvectors, k, d_sub), dtype=np.float32)
+
+        for j in range(self.n_subvectors):
+            points = sub[:, j, :]
+            centers = points[rng.choice(len(points), size=k, replace=False)].copy()
+            for _ in range(n_iter):
+                assign = _nearest_centroid(points, centers)
+                sums = np.zeros_like(centers)
+                np.add.at(sums, assign, points)
+                counts = np.bincount(assign, minlength=k).astype(np.float32)
+                filled = counts > 0
+                centers[filled] = sums[filled] / counts[filled, None]
+                # Re-seed empty clusters from random points
+                empty = np.flatnonzero(~filled)
+                if len(empty):
+                    centers[empty] = points[rng.choice(len(points), size=len(empty))]
+            self.centroids[j] = centers
+        return self
+
+    def encode(self, embeddings: np.ndarray) -> np.ndarray:
+        """Quantize float vectors to (N, m) uint8 codes."""
+        sub = self._split(np.asarray(embeddings, dtype=np.float32))
+        codes = np.empty((sub.shape[0], self.n_subvectors), dtype=np.uint8)
+        for j in range(self.n_subvectors):
+            codes[:, j] = _nearest_centroid(sub[:, j, :], self.centroids[j])
+        return codes
+
+    def decode(self, codes: np.ndarray) -> np.ndarray:
+        """Reconstruct approximate float32 vectors from PQ codes."""
+        parts = self.centroids[np.arange(self.n_subvectors), codes]  # (N, m, d_sub)
+        return parts.reshape(len(codes), -1)
+
+    def lookup_table(self, query: np.ndarray) -> np.ndarray:
+        """Inner products of each query sub-vector with every centroid: (m, k)."""
+        q = self._split(np.asarray(query, dtype=np.float32)[None, :])[0]
+        return np.einsum("md,mkd->mk", q, self.centroids)
+
+    def scores(self, codes: np.ndarray, query: np.ndarray) -> np.ndarray:
+        """Asymmetric inner-product scores via the per-query lookup table."""
+        table = self.lookup_table(query)
+        cols = np.arange(self.n_subvectors)
+        out = np.empty(len(codes), dtype=np.float32)
+        for start in range(0, len(codes), SEARCH_BLOCK_SIZE):
+            block = codes[start:start + SEARCH_BLOCK_SIZE]
+            out[start:start + len(block)] = table[cols, block].sum(axis=1)
+        return out
+
+    def state(self) -> Dict[str, np.ndarray]:
+        return {"centroids": self.centroids}
+
+    @classmethod
+    def from_state(cls, state: Dict[str, np.ndarray]) -> "ProductQuantizer":
+        centroids = np.asarray(state["centroids"], dtype=np.float32)
+        quantizer = cls(n_subvectors=centroids.shape[0], n_centroids=centroids.shape[1])
+        quantizer.centroids = centroids
+        return quantizer
+
+
+CODECS = {
+    "int8": ScalarQuantizer,
+    "pq": ProductQuantizer,
+}
+
+
+def _nearest_centroid(points: np.ndarray, centers: np.ndarray) -> np.ndarray:
+    """Index of the nearest center (squared L2) for each point, in blocks."""
+    center_norms = (centers ** 2).sum(axis=1)
+    assign = np.empty(len(points), dtype=np.int64)
+    for start in range(0, len(points), SEARCH_BLOCK_SIZE):
+        block = points[start:start + SEARCH_BLOCK_SIZE]
+        dists = center_norms[None, :] - 2 * block @ centers.T
+        assign[start:start + len(block)] = dists.argmin(axis=1)
+    return assign
+
+
+def _top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, best first."""
+    k = min(k, len(scores))
+    if k <= 0:
+        return np.empty(0, dtype=np.int64)
+    candidates = np.argpartition(-scores, k - 1)[:k]
+    return candidates[np.argsort(-scores[candidates], kind="stable")]
+
+
+class QuantizedEmbeddingIndex:
+    """
+    Compressed embedding index with exact re-ranking.
+
+    Codes live in RAM. The float32 vectors are only touched for the re-rank
+    step and can be a read-only memory map, so they stay on disk.
+    """
+
+    def __init__(self, ids: List[str], codes: np.ndarray, quantizer, vectors: Optional[np.ndarray] = None):
+        self.ids = list(ids)
+        self.codes = codes
+        self.quantizer = quantizer
+        self.vectors = vectors
+        self._row = {fid: i for i, fid in enumerate(self.ids)}
+
+    @classmethod
+    def build(cls, ids: List[str], embeddings: np.ndarray, codec: str = "int8", **codec_args) -> "QuantizedEmbeddingIndex":
+        """Fit a codec on the embeddings and encode them."""
+        if codec not in CODECS:
+            raise ValueError(f"Unknown codec '{codec}'. Available: {', '.join(CODECS)}")
+        vectors = np.ascontiguousarray(embeddings, dtype=np.float32)
+        quantizer = CODECS[codec](**codec_args).fit(vectors)
+        return cls(ids, quantizer.encode(vectors), quantizer, vectors)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    @property
+    def nbytes(self) -> int:
+        """Bytes held in RAM by the compressed codes."""
+        return int(self.codes.nbytes)
+
+    def row(self, item_id: str) -> Optional[int]:
+        return self._row.get(item_id)
+
+    def search(
+        self,
+        query: np.ndarray,
+        k: int = 10,
+        rerank: bool = True,
+        rerank_factor: int = DEFAULT_RERANK_FACTOR,
+        exclude: Optional[str] = None,
+    ) -> List[Tuple[str, float]]:
+        """
+        Find the k most similar items (inner product / cosine on unit vectors).
+
+        Args:
+            query: Float query vector
+            k: Number of results
+            rerank: Re-score the top candidates with the exact float vectors
+            rerank_factor: Candidates fetched per result before re-ranking
+            exclude: Item id to drop from the results (e.g. the query itself)
+
+        Returns:
+            List of (id, score) pairs, best first
+        """
+        query = np.asarray(query, dtype=np.float32)
+        extra = 1 if exclude is not None else 0
+        approx = self.quantizer.scores(self.codes, query)
+
+        if rerank and self.vectors is not None:
+            # Sorted rows keep reads from a memory-mapped matrix sequential
+            candidates = np.sort(_top_k(approx, (k + extra) * rerank_factor))
+            exact = np.asarray(self.vectors[candidates], dtype=np.float32) @ query
+            order = np.argsort(-exact, kind="stable")
+            rows = candidates[order]
+            scores = exact[order]
+        else:
+            rows = _top_k(approx, k + extra)
+            scores = approx[rows]
+
+        results = []
+        for row, score in zip(rows, scores):
+            item_id = self.ids[row]
+            if item_id == exclude:
+                continue
+            results.append((item_id, float(score)))
+            if len(results) == k:
+                break
+        return results
+
+    def save(self, directory: Path) -> None:
+        """
+        Persist the index.
+
+        Writes `codes.npy`, `codec.npz` and `ids.json`, plus `vectors.npy`
+        (float32) for the re-rank step when the vectors are available.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        np.save(directory / "codes.npy", self.codes)
+        np.savez(directory / "codec.npz", codec=np.array(self.quantizer.codec), **self.quantizer.state())
+        if self.vectors is not None:
+            np.save(directory / "vectors.npy", np.asarray(self.vectors, dtype=np.float32))
+        with open(directory / "ids.json", "w") as f:
+            json.dump(self.ids, f)
+
+    @classmethod
+    def load(cls, directory: Path, mmap_vectors: bool = True) -> "QuantizedEmbeddingIndex":
+        """Load a saved index; float vectors are memory-mapped by default."""
+        directory = Path(directory)
+        state = dict(np.load(directory / "codec.npz"))
+        codec = str(state.pop("codec"))
+        quantizer = CODECS[codec].from_state(state)
+        codes = np.load(directory / "codes.npy")
+        vectors = None
+        vectors_file = directory / "vectors.npy"
+        if vectors_file.exists():
+            vectors = np.load(vectors_file, mmap_mode="r" if mmap_vectors else None)
+        with open(directory / "ids.json") as f:
+            ids = json.load(f)
+        return cls(ids, codes, quantizer, vectors)
+
+
+def exact_search(embeddings: np.ndarray, queries: np.ndarray, k: int) -> np.ndarray:
+    """Ground-truth top-k rows by exact inner product, shape (n_queries, k)."""
+    scores = np.asarray(queries, dtype=np.float32) @ np.asarray(embeddings, dtype=np.float32).T
+    return np.stack([_top_k(row, k) for row in scores])
+
+
+def measure_recall(
+    embeddings: np.ndarray,
+    k: int = 10,
+    codec: str = "int8",
+    n_queries: int = 100,
+    rerank_factor: int = DEFAULT_RERANK_FACTOR,
+    seed: int = 0,
+    **codec_args,
+) -> Dict[str, float]:
+    """
+    Compare quantized search against exact search.
+
+    Queries are sampled from the corpus itself, matching the
+    nearest_neighbors use case.
+
+    Returns:
+        recall@k with and without re-ranking, memory footprint and
+        per-query latency
+    """
+    rng = np.random.default_rng(seed)
+    x = np.ascontiguousarray(embeddings, dtype=np.float32)
+    ids = [str(i) for i in range(len(x))]
+
+    start = time.perf_counter()
+    index = QuantizedEmbeddingIndex.build(ids, x, codec=codec, **codec_args)
+    build_seconds = time.perf_counter() - start
+
+    query_rows = rng.choice(len(x), size=min(n_queries, len(x)), replace=False)
+    queries = x[query_rows]
+    truth = exact_search(x, queries, k)
+
+    recall = {}
+    latency = {}
+    for rerank in (False, True):
+        hits = 0
+        start = time.perf_counter()
+        for q, expected in zip(queries, truth):
+            found = index.search(q, k=k, rerank=rerank, rerank_factor=rerank_factor)
+            hits += len({int(fid) for fid, _ in found} & set(expected.tolist()))
+        elapsed = time.perf_counter() - start
+        key = "rerank" if rerank else "codes_only"
+        recall[key] = hits / (len(queries) * min(k, len(x)))
+        latency[key] = elapsed / len(queries) * 1000
+
+    return {
+        "codec": codec,
+        "n_vectors": len(x),
+        "dim": x.shape[1],
+        "k": k,
+        "recall_codes_only": round(recall["codes_only"], 4),
+        "recall_rerank": round(recall["rerank"], 4),
+        "query_ms_codes_only": round(latency["codes_only"], 3),
+        "query_ms_rerank": round(latency["rerank"], 3),
+        "build_seconds": round(build_seconds, 3),
+        "float64_bytes": int(x.shape[0] * x.shape[1] * 8),
+        "code_bytes": index.nbytes,
+        "compression_vs_float64": round(x.shape[0] * x.shape[1] * 8 / index.nbytes, 1),
+    }
+
+
+def synthetic_embeddings(n: int, dim: int = 768, n_clusters: int = 50, seed: int = 0) -> np.ndarray:
+    """Clustered unit vectors resembling LogLM embeddings."""
+    rng = np.random.default_rng(seed)
+    centers = rng.standard_normal((n_clusters, dim)).astype(np.float32) * 0.3
+    assign = rng.integers(0, n_clusters, size=n)
+    x = centers[assign] + rng.standard_normal((n, dim)).astype(np.float32) * 0.1
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+def load_scenario_embeddings(scenario_dir: Path = SCENARIO_DIR) -> Tuple[List[str], np.ndarray]:
+    """Load the full-precision embeddings written by the LogLM pipeline."""
+    with open(Path(scenario_dir) / "loglm_output" / "embeddings.json") as f:
+        embeddings = json.load(f)
+    ids = list(embeddings.keys())
+    return ids, np.array([embeddings[i] for i in ids], dtype=np.float32)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure recall@k of quantized embedding search")
+    parser.add_argument("--synthetic", type=int, default=0,
+                        help="Benchmark N synthetic vectors instead of the scenario embeddings")
+    parser.add_argument("--codec", choices=["int8", "pq", "all"], default="all")
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--subvectors", type=int, default=96, help="PQ sub-vectors")
+    parser.add_argument("--rerank-factor", type=int, default=DEFAULT_RERANK_FACTOR)
+    args = parser.parse_args()
+
+    if args.synthetic:
+        embeddings = synthetic_embeddings(args.synthetic)
+        source = f"synthetic ({args.synthetic:,} vectors)"
+    else:
+        _, embeddings = load_scenario_embeddings()
+        source = "scenario embeddings.json"
+
+    print("=" * 60)
+    print(f"Quantized Embedding Search - {source}")
+    print("=" * 60)
+
+    codecs = ["int8", "pq"] if args.codec == "all" else [args.codec]
+    for codec in codecs:
+        codec_args = {"n_subvectors": args.subvectors} if codec == "pq" else {}
+        result = measure_recall(embeddings, k=args.k, codec=codec, n_queries=args.queries,
+                                rerank_factor=args.rerank_factor, **codec_args)
+        print(f"\n{codec.upper()}")
+        print(f"  Recall@{args.k} (codes only): {result['recall_codes_only']:.3f}")
+        print(f"  Recall@{args.k} (re-ranked):  {result['recall_rerank']:.3f}")
+        print(f"  Query latency: {result['query_ms_codes_only']:.2f} ms / {result['query_ms_rerank']:.2f} ms (re-ranked)")
+        print(f"  Memory: {result['code_bytes']:,} bytes "
+              f"({result['compression_vs_float64']}x smaller than float64)")
+
+
+if __name__ == "__main__":
+    main()
@@ -6,16 +6,58 @@ Calculates:
 - Confusion matrix (TP, FP, FN, TN)
 - Precision, Recall, F1 Score
 - Mean Time to Detect (MTTD) per phase and overall
+- Per-event detection latency p50/p90/p99 per phase and technique, from
+  mergeable quantile sketches (see quantile_sketch.py)
 - Evasion analysis (what rules miss vs what LogLM catches)
+- Bootstrap confidence intervals for the metrics, MTTD and the
+  differences between methods, from batched resample index matrices
+- Threshold curves: precision, recall, FPR, F1 and evasive recall at
+  every score threshold, from one sort and cumulative sums
+
+Ground truth is encoded once into an EvaluationIndex (integer event
+indices and NumPy label arrays), so scoring is vectorized; scenario runs
+build it straight from the columnar ground truth (see ground_truth.py).
 """
 
+import argparse
 import json
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Set, Any
+from typing import Dict, List, Optional, Set, Any, Tuple
+
+import numpy as np
+
+try:
+    from scripts.event_store import open_event_store
+    from scripts.ground_truth import GroundTruth, load_ground_truth
+    from scripts.quantile_sketch import DEFAULT_QUANTILES, KeyedSketches
+except ImportError:
+    from event_store import open_event_store
+    from ground_truth import GroundTruth, load_ground_truth
+    from quantile_sketch import DEFAULT_QUANTILES, KeyedSketches
 
 SCENARIO_DIR = Path(__file__).parent.parent / "data" / "scenarios" / "default_attack"
 
+# Most operating points kept per threshold curve in evaluation_results.json
+CURVE_POINTS = 200
+
+# Rules alerts carry no confidence; their severity serves as the score
+SEVERITY_SCORES = {"low": 0.25, "medium": 0.5, "high": 0.75, "critical": 1.0}
+
+# Bootstrap resamples for confidence intervals, interval coverage and seed
+BOOTSTRAP_RESAMPLES = 2000
+BOOTSTRAP_CONFIDENCE = 0.95
+BOOTSTRAP_SEED = 42
+
+# Largest resample index matrix materialized at once, in elements
+BOOTSTRAP_CHUNK_ELEMENTS = 1 << 22
+
+# Detection time of events that were never detected
+NEVER = np.iinfo(np.int64).max
+
+# Per-event detection latency sketches, written next to evaluation_results.json
+LATENCY_SKETCH_FILE = "latency_sketches.json"
+
 
 def parse_timestamp(ts: str) -> datetime:
     """Parse ISO timestamp string."""
@@ -25,43 +67,153 @@ def parse_timestamp(ts: str) -> datetime:
         return datetime.fromisoformat(ts)
 
 
-def evaluate_detection(detected_event_ids: Set[str], ground_truth: Dict) -> Dict:
+def timestamps_to_micros(timestamps: List[str]) -> np.ndarray:
+    """Parse ISO timestamps into int64 microseconds since the epoch, in one vectorized pass."""
+    try:
+        values = np.array([ts.replace("Z", "") for ts in timestamps], dtype="datetime64[us]")
+    except ValueError:
+        # Explicit UTC offsets are not understood by datetime64
+        values = np.array([np.datetime64(parse_timestamp(ts).replace(tzinfo=None), "us") for ts in timestamps],
+                          dtype="datetime64[us]")
+    return values.astype(np.int64)
+
+
+class EvaluationIndex:
+    """
+    Ground truth encoded for vectorized evaluation.
+    
+    Event ids map to integer indices once; labels, evasive flags and attack
+    phase membership are NumPy arrays over those indices, so scoring a set
+    of detections is a handful of array operations.
+    """
+    
+    def __init__(self, event_ids: np.ndarray, malicious: np.ndarray, benign: np.ndarray,
+                 evasive: np.ndarray, phases: List[Dict], phase_of_pair: np.ndarray, event_of_pair: np.ndarray,
+                 technique: Optional[np.ndarray] = None):
+        """
+        Args:
+            event_ids: Sorted unique event ids
+            malicious, benign, evasive: Boolean flags per event
+            phases: Attack timeline entries (without their event_ids)
+            phase_of_pair, event_of_pair: (phase position, event index) for
+                every event listed in an attack phase
+            technique: MITRE technique id per event ("" if none)
+        """
+        self.event_ids = event_ids
+        self.malicious = malicious
+        self.benign = benign
+        self.evasive = evasive
+        self.phases = phases
+        self.phase_of_pair = phase_of_pair
+        self.event_of_pair = event_of_pair
+        self.technique = technique if technique is not None else np.full(len(event_ids), "", dtype=object)
+        self.phase_start = timestamps_to_micros([p["start_time"] for p in phases]) if phases else np.zeros(0, np.int64)
+    
+    @classmethod
+    def from_ground_truth(cls, ground_truth: Dict) -> "EvaluationIndex":
+        events = ground_truth["events"]
+        timeline = ground_truth.get("attack_timeline", [])
+        labelled = np.array(list(events.keys()), dtype=str)
+        labels = np.array([info["label"] for info in events.values()], dtype=str)
+        evasive = np.array([bool(info.get("evasive", False)) for info in events.values()], dtype=bool)
+        
+        # Phase events are indexed too, even if the events dict omits them
+        phase_ids = [np.array(p["event_ids"], dtype=str) for p in timeline]
+        event_ids = np.unique(np.concatenate([labelled] + phase_ids)) if phase_ids else np.unique(labelled)
+        index = cls(event_ids, np.zeros(len(event_ids), bool), np.zeros(len(event_ids), bool),
+                    np.zeros(len(event_ids), bool), [], np.zeros(0, np.int64), np.zeros(0, np.int64))
+        
+        rows = index.encode(labelled)
+        index.malicious[rows] = labels == "malicious"
+        index.benign[rows] = labels == "benign"
+        index.evasive[rows] = evasive
+        index.technique[rows] = [info.get("technique") or "" for info in events.values()]
+        
+        index.phases = [{k: v for k, v in p.items() if k != "event_ids"} for p in timeline]
+        if timeline:
+            index.phase_start = timestamps_to_micros([p["start_time"] for p in timeline])
+            index.phase_of_pair = np.repeat(np.arange(len(timeline)), [len(ids) for ids in phase_ids])
+            index.event_of_pair = index.encode(np.concatenate(phase_ids))
+        return index
+    
+    @classmethod
+    def from_columns(cls, ground_truth: GroundTruth) -> "EvaluationIndex":
+        """Build the index from columnar ground truth, without per-event parsing."""
+        timeline = ground_truth.attack_timeline
+        index = cls(ground_truth.ids.astype(str), ground_truth.label_mask("malicious"),
+                    ground_truth.label_mask("benign"), np.array(ground_truth.evasive, dtype=bool),
+                    [{k: v for k, v in p.items() if k != "event_ids"} for p in timeline],
+                    np.zeros(0, np.int64), np.zeros(0, np.int64), technique=ground_truth.technique_names())
+        if timeline:
+            phase_ids = [np.array(p["event_ids"], dtype=str) for p in timeline]
+            index.phase_of_pair = np.repeat(np.arange(len(timeline)), [len(ids) for ids in phase_ids])
+            index.event_of_pair = index.encode(np.concatenate(phase_ids))
+        return index
+    
+    def __len__(self) -> int:
+        return len(self.event_ids)
+    
+    def encode(self, event_ids) -> np.ndarray:
+        """Indices of event ids (-1 for ids not in the index)."""
+        event_ids = np.asarray(event_ids, dtype=str)
+        if len(self.event_ids) == 0 or len(event_ids) == 0:
+            return np.full(len(event_ids), -1, dtype=np.int64)
+        rows = np.searchsorted(self.event_ids, event_ids)
+        rows = np.minimum(rows, len(self.event_ids) - 1)
+        return np.where(self.event_ids[rows] == event_ids, rows, -1).astype(np.int64)
+    
+    def detected_mask(self, event_ids) -> Tuple[np.ndarray, int]:
+        """
+        Boolean mask of detected events.
+        
+        Returns:
+            (mask over indexed events, number of distinct detected ids
+            including ids the ground truth does not know)
+        """
+        event_ids = np.asarray(list(event_ids) if isinstance(event_ids, (set, frozenset)) else event_ids, dtype=str)
+        rows = self.encode(event_ids)
+        mask = np.zeros(len(self.event_ids), dtype=bool)
+        mask[rows[rows >= 0]] = True
+        unknown = len(np.unique(event_ids[rows < 0]))
+        return mask, int(mask.sum()) + unknown
+
+
+def _as_index(ground_truth) -> EvaluationIndex:
+    if isinstance(ground_truth, EvaluationIndex):
+        return ground_truth
+    if isinstance(ground_truth, GroundTruth):
+        return EvaluationIndex.from_columns(ground_truth)
+    return EvaluationIndex.from_ground_truth(ground_truth)
+
+
+def evaluate_detection(detected_event_ids: Set[str], ground_truth) -> Dict:
     """
     Calculate confusion matrix and metrics.
     
     Args:
-        detected_event_ids: Set of event IDs flagged as malicious
-        ground_truth: Ground truth labels
+        detected_event_ids: Event IDs flagged as malicious
+        ground_truth: Ground truth labels, or an EvaluationIndex built from them
     
     Returns:
         Confusion matrix and derived metrics
     """
-    malicious_events = {
-        eid for eid, info in ground_truth["events"].items()
-        if info["label"] == "malicious"
-    }
-    benign_events = {
-        eid for eid, info in ground_truth["events"].items()
-        if info["label"] == "benign"
-    }
+    index = _as_index(ground_truth)
+    detected, total_detected = index.detected_mask(detected_event_ids)
+    missed = ~detected
+    non_evasive_malicious = index.malicious & ~index.evasive
     
-    # Also track evasive events separately
-    evasive_events = {
-        eid for eid, info in ground_truth["events"].items()
-        if info.get("evasive", False)
-    }
-    non_evasive_malicious = malicious_events - evasive_events
-    
-    tp = len(detected_event_ids & malicious_events)  # Correctly detected attacks
-    fp = len(detected_event_ids & benign_events)     # False alarms
-    fn = len(malicious_events - detected_event_ids)  # Missed attacks
-    tn = len(benign_events - detected_event_ids)     # Correctly ignored benign
+    tp = int(np.count_nonzero(detected & index.malicious))  # Correctly detected attacks
+    fp = int(np.count_nonzero(detected & index.benign))     # False alarms
+    fn = int(np.count_nonzero(missed & index.malicious))    # Missed attacks
+    tn = int(np.count_nonzero(missed & index.benign))       # Correctly ignored benign
     
     # Evasive detection breakdown
-    evasive_detected = len(detected_event_ids & evasive_events)
-    evasive_missed = len(evasive_events - detected_event_ids)
-    non_evasive_detected = len(detected_event_ids & non_evasive_malicious)
-    non_evasive_missed = len(non_evasive_malicious - detected_event_ids)
+    total_evasive = int(np.count_nonzero(index.evasive))
+    total_non_evasive = int(np.count_nonzero(non_evasive_malicious))
+    evasive_detected = int(np.count_nonzero(detected & index.evasive))
+    evasive_missed = total_evasive - evasive_detected
+    non_evasive_detected = int(np.count_nonzero(detected & non_evasive_malicious))
+    non_evasive_missed = total_non_evasive - non_evasive_detected
     
     precision = tp / (tp + fp) if (tp + fp) > 0 else 0
     recall = tp / (tp + fn) if (tp + fn) > 0 else 0
@@ -83,70 +235,148 @@ def evaluate_detection(detected_event_ids: Set[str], ground_truth: Dict) -> Dict
             "accuracy": round((tp + tn) / (tp + tn + fp + fn), 4)
         },
         "counts": {
-            "total_detected": len(detected_event_ids),
-            "total_malicious": len(malicious_events),
-            "total_benign": len(benign_events)
+            "total_detected": total_detected,
+            "total_malicious": int(np.count_nonzero(index.malicious)),
+            "total_benign": int(np.count_nonzero(index.benign))
         },
         "evasion_analysis": {
-            "total_evasive": len(evasive_events),
+            "total_evasive": total_evasive,
             "evasive_detected": evasive_detected,
             "evasive_missed": evasive_missed,
-            "evasive_detection_rate": round(evasive_detected / len(evasive_events), 4) if evasive_events else 0,
+            "evasive_detection_rate": round(evasive_detected / total_evasive, 4) if total_evasive else 0,
             "non_evasive_detected": non_evasive_detected,
             "non_evasive_missed": non_evasive_missed,
-            "non_evasive_detection_rate": round(non_evasive_detected / len(non_evasive_malicious), 4) if non_evasive_malicious else 0
+            "non_evasive_detection_rate": round(non_evasive_detected / total_non_evasive, 4) if total_non_evasive else 0
         }
     }
 
 
-def calculate_mttd(detections: List[Dict], ground_truth: Dict, event_id_field: str = "event_id") -> Dict:
+def detection_pairs(detections: List[Dict], event_id_field: str = "event_id") -> Tuple[List[str], List[str]]:
+    """Flatten detections into parallel (event id, detection timestamp) lists."""
+    event_ids, timestamps = [], []
+    for det in detections:
+        ids = det.get("event_ids", [det.get(event_id_field)])
+        if not ids:
+            continue
+        for eid in ids:
+            if eid:
+                event_ids.append(eid)
+                timestamps.append(det["timestamp"])
+    return event_ids, timestamps
+
+
+def first_detection_by_event(index: EvaluationIndex, rows: np.ndarray, det_times: np.ndarray) -> np.ndarray:
+    """Earliest detection time (micros) per indexed event; NEVER for undetected events."""
+    known = rows >= 0
+    first_by_event = np.full(len(index), NEVER, dtype=np.int64)
+    np.minimum.at(first_by_event, rows[known], det_times[known])
+    return first_by_event
+
+
+def event_times(index: EvaluationIndex, events: Dict[str, Dict]) -> np.ndarray:
+    """Event timestamps (micros) per indexed event; NEVER where the event is not given."""
+    times = np.full(len(index), NEVER, dtype=np.int64)
+    rows = index.encode(list(events))
+    known = rows >= 0
+    if known.any():
+        stamps = [event["ts"] for event in events.values()]
+        times[rows[known]] = timestamps_to_micros(stamps)[known]
+    return times
+
+
+def detection_latency_sketches(first_detection: np.ndarray, times: np.ndarray, index: EvaluationIndex,
+                               sketches: Optional[KeyedSketches] = None) -> KeyedSketches:
+    """
+    Per-event detection latency in minutes, from an attack event's own
+    timestamp to the first detection covering it.
+
+    Latencies go into sketches keyed "overall", "phase:<n>" and
+    "technique:<id>"; pass existing sketches to accumulate into them.
+
+    Args:
+        first_detection: First detection time per event (see first_detection_by_event)
+        times: Event timestamp per event (see event_times)
+        index: EvaluationIndex built from the ground truth
+        sketches: Sketches to add to (default: new ones)
+    """
+    sketches = sketches if sketches is not None else KeyedSketches()
+    measured = index.malicious & (first_detection != NEVER) & (times != NEVER)
+    latency = np.zeros(len(index))
+    latency[measured] = np.maximum(0, first_detection[measured] - times[measured]) / 1e6 / 60
+    sketches.update("overall", latency[measured])
+
+    rows = np.flatnonzero(measured & (index.technique != ""))
+    techniques, group = np.unique(index.technique[rows].astype(str), return_inverse=True)
+    for position, technique in enumerate(techniques):
+        sketches.update(f"technique:{technique}", latency[rows[group == position]])
+
+    if len(index.event_of_pair):
+        pairs = np.flatnonzero(index.event_of_pair >= 0)
+        pairs = pairs[measured[index.event_of_pair[pairs]]]
+        for position, phase in enumerate(index.phases):
+            events = index.event_of_pair[pairs[index.phase_of_pair[pairs] == position]]
+            if len(events):
+                sketches.update(f"phase:{phase['phase']}", latency[events])
+    return sketches
+
+
+def latency_summary(sketches: KeyedSketches, quantiles=DEFAULT_QUANTILES) -> Dict:
+    """Quantile summaries of latency sketches, grouped into overall / by_phase / by_technique."""
+    summary = {"overall": None, "by_phase": {}, "by_technique": {}}
+    for key, stats in sketches.summary(quantiles).items():
+        kind, _, value = key.partition(":")
+        if kind == "overall":
+            summary["overall"] = stats
+        elif kind == "phase":
+            summary["by_phase"][f"phase_{value}"] = stats
+        else:
+            summary["by_technique"][value] = stats
+    summary["by_phase"] = dict(sorted(summary["by_phase"].items(), key=lambda kv: int(kv[0].split("_")[1])))
+    return summary
+
+
+def calculate_mttd(detections: List[Dict], ground_truth, event_id_field: str = "event_id") -> Dict:
     """
     Calculate Mean Time to Detect for each attack phase.
     
     Args:
         detections: List of detection objects with timestamps and event IDs
-        ground_truth: Ground truth with attack timeline
+        ground_truth: Ground truth with attack timeline, or an EvaluationIndex
         event_id_field: Field name containing the event ID in detections
     
     Returns:
         MTTD in minutes for each phase and overall
     """
+    index = _as_index(ground_truth)
     results = {}
     
-    # Build detection lookup: event_id -> first detection timestamp
-    detection_times = {}
-    for det in detections:
-        event_ids = det.get("event_ids", [det.get(event_id_field)])
-        if not event_ids:
-            continue
-        det_time = parse_timestamp(det["timestamp"])
-        for eid in event_ids:
-            if eid and (eid not in detection_times or det_time < detection_times[eid]):
-                detection_times[eid] = det_time
+    # First detection time per event, then per phase, via np.minimum.at
+    event_ids, timestamps = detection_pairs(detections, event_id_field)
+    rows = index.encode(event_ids)
+    known = rows >= 0
+    det_times = timestamps_to_micros(timestamps) if timestamps else np.zeros(0, np.int64)
+    first_by_event = first_detection_by_event(index, rows, det_times)
+    first_by_phase = np.full(len(index.phases), NEVER, dtype=np.int64)
+    if len(index.phase_of_pair):
+        paired = index.event_of_pair >= 0
+        np.minimum.at(first_by_phase, index.phase_of_pair[paired], first_by_event[index.event_of_pair[paired]])
+    
+    # Detection timestamps are reported as given, so map times back to strings
+    det_strings = {}
+    for t, ts in zip(det_times[known].tolist(), np.asarray(timestamps, dtype=object)[known].tolist()):
+        det_strings.setdefault(t, ts)
     
     # Calculate MTTD per phase
-    overall_attack_start = None
-    overall_first_detection = None
-    
-    for phase_info in ground_truth["attack_timeline"]:
+    for position, phase_info in enumerate(index.phases):
         phase_num = phase_info["phase"]
         phase_start = parse_timestamp(phase_info["start_time"])
-        phase_events = set(phase_info["event_ids"])
         is_evasive = phase_info.get("evasive", False)
         
-        if overall_attack_start is None or phase_start < overall_attack_start:
-            overall_attack_start = phase_start
-        
-        # Find first detection of any event in this phase
-        first_detection = None
-        for eid in phase_events:
-            if eid in detection_times:
-                det_time = detection_times[eid]
-                if first_detection is None or det_time < first_detection:
-                    first_detection = det_time
+        first_time = int(first_by_phase[position])
+        first_detection = parse_timestamp(det_strings[first_time]) if first_time != NEVER else None
         
         if first_detection:
-            mttd_minutes = (first_detection - phase_start).total_seconds() / 60
+            mttd_minutes = (first_time - int(index.phase_start[position])) / 1e6 / 60
             results[f"phase_{phase_num}"] = {
                 "phase_name": phase_info["name"],
                 "detected": True,
@@ -155,9 +385,6 @@ def calculate_mttd(detections: List[Dict], ground_truth: Dict, event_id_field: s
                 "first_detection": first_detection.isoformat(),
                 "evasive": is_evasive
             }
-            
-            if overall_first_detection is None or first_detection < overall_first_detection:
-                overall_first_detection = first_detection
         else:
             results[f"phase_{phase_num}"] = {
                 "phase_name": phase_info["name"],
@@ -169,13 +396,15 @@ def calculate_mttd(detections: List[Dict], ground_truth: Dict, event_id_field: s
             }
     
     # Overall MTTD
-    if overall_first_detection and overall_attack_start:
-        overall_mttd = (overall_first_detection - overall_attack_start).total_seconds() / 60
+    overall_first_time = int(first_by_phase.min()) if len(first_by_phase) else NEVER
+    if overall_first_time != NEVER:
+        first_phase = int(np.argmin(index.phase_start))
+        overall_mttd = (overall_first_time - int(index.phase_start[first_phase])) / 1e6 / 60
         results["overall"] = {
             "detected": True,
             "mttd_minutes": round(max(0, overall_mttd), 1),
-            "attack_start": overall_attack_start.isoformat(),
-            "first_detection": overall_first_detection.isoformat()
+            "attack_start": parse_timestamp(index.phases[first_phase]["start_time"]).isoformat(),
+            "first_detection": parse_timestamp(det_strings[overall_first_time]).isoformat()
         }
     else:
         results["overall"] = {
@@ -205,45 +434,332 @@ def calculate_mttd(detections: List[Dict], ground_truth: Dict, event_id_field: s
     return results
 
 
-def run_evaluation():
-    """Run full evaluation comparing both detection methods."""
+def event_scores(detections: List[Dict], index: EvaluationIndex, score, event_id_field: str = "event_id") -> np.ndarray:
+    """
+    Highest detection score per indexed event.
+    
+    Args:
+        detections: Detection objects
+        index: Encoded ground truth
+        score: Function from a detection to its score
+        event_id_field: Field name containing the event ID in detections
+    
+    Returns:
+        Score per event, -inf for events no detection covers
+    """
+    event_ids, det_scores = [], []
+    for det in detections:
+        ids = det.get("event_ids", [det.get(event_id_field)]) or []
+        value = score(det)
+        for eid in ids:
+            if eid:
+                event_ids.append(eid)
+                det_scores.append(value)
+    rows = index.encode(event_ids)
+    known = rows >= 0
+    scores = np.full(len(index), -np.inf)
+    np.maximum.at(scores, rows[known], np.asarray(det_scores, dtype=np.float64)[known])
+    return scores
+
+
+def threshold_sweep(scores: np.ndarray, index: EvaluationIndex, detection_scores: Optional[np.ndarray] = None,
+                    max_points: int = CURVE_POINTS) -> Dict[str, List]:
+    """
+    Operating point at every distinct score threshold.
+    
+    Events are sorted by score once; true and false positives at each
+    threshold are cumulative sums over that order, so the whole curve
+    costs one sort.
+    
+    Args:
+        scores: Per-event scores from event_scores
+        index: Encoded ground truth
+        detection_scores: Score of every detection, to report how many
+            alerts/findings each threshold keeps
+        max_points: Curves longer than this are evenly thinned, always
+            keeping the loosest threshold
+    
+    Returns:
+        Parallel lists: thresholds (descending), precision, recall,
+        false_positive_rate, f1_score, evasive_recall, detections
+    """
+    flagged = np.flatnonzero(np.isfinite(scores))
+    order = flagged[np.argsort(-scores[flagged], kind="stable")]
+    sorted_scores = scores[order]
+    if len(order) == 0:
+        return {key: [] for key in ("thresholds", "precision", "recall", "false_positive_rate",
+                                    "f1_score", "evasive_recall", "detections")}
+    
+    # Each threshold's operating point is the last event at that score
+    last = np.flatnonzero(np.r_[sorted_scores[1:] != sorted_scores[:-1], True])
+    if len(last) > max_points:
+        last = last[np.unique(np.linspace(0, len(last) - 1, max_points).round().astype(np.int64))]
+    tp = np.cumsum(index.malicious[order])[last]
+    fp = np.cumsum(index.benign[order])[last]
+    evasive = np.cumsum(index.evasive[order])[last]
+    thresholds = sorted_scores[last]
+    
+    total_malicious = max(int(np.count_nonzero(index.malicious)), 1)
+    total_benign = max(int(np.count_nonzero(index.benign)), 1)
+    total_evasive = max(int(np.count_nonzero(index.evasive)), 1)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        precision = np.nan_to_num(tp / (tp + fp))
+        recall = tp / total_malicious
+        f1 = np.nan_to_num(2 * precision * recall / (precision + recall))
+    
+    if detection_scores is None:
+        kept = tp + fp
+    else:
+        descending = -np.sort(-np.asarray(detection_scores, dtype=np.float64))
+        kept = np.searchsorted(-descending, -thresholds, side="right")
+    
+    return {
+        "thresholds": np.round(thresholds, 4).tolist(),
+        "precision": np.round(precision, 4).tolist(),
+        "recall": np.round(recall, 4).tolist(),
+        "false_positive_rate": np.round(fp / total_benign, 4).tolist(),
+        "f1_score": np.round(f1, 4).tolist(),
+        "evasive_recall": np.round(evasive / total_evasive, 4).tolist(),
+        "detections": np.asarray(kept, dtype=np.int64).tolist(),
+    }
+
+
+def best_operating_point(curve: Dict[str, List]) -> Optional[Dict]:
+    """Threshold with the highest F1 on a curve (the strictest one on ties)."""
+    if not curve["thresholds"]:
+        return None
+    best = int(np.argmax(curve["f1_score"]))
+    return {key: values[best] for key, values in curve.items()}
+
+
+def _ratio(numerator: np.ndarray, denominator: np.ndarray) -> np.ndarray:
+    """Elementwise ratio, 0 where the denominator is 0 (as in evaluate_detection)."""
+    return np.divide(numerator, denominator, out=np.zeros(len(numerator)), where=denominator > 0)
+
+
+def _resample_indices(rng: np.random.Generator, n: int, resamples: int):
+    """Yield bootstrap index matrices of shape (rows, n), covering `resamples` rows in total."""
+    rows = max(1, BOOTSTRAP_CHUNK_ELEMENTS // max(n, 1))
+    for start in range(0, resamples, rows):
+        yield rng.integers(0, n, size=(min(rows, resamples - start), n))
+
+
+def _interval(values: np.ndarray, confidence: float, digits: int = 4) -> Dict:
+    """Point estimate (row 0) and percentile interval over the resamples (rows 1:)."""
+    estimate, resampled = values[0], values[1:]
+    resampled = resampled[np.isfinite(resampled)]
+    if not np.isfinite(estimate) or len(resampled) == 0:
+        return {"estimate": None, "lower": None, "upper": None}
+    alpha = (1 - confidence) / 2
+    lower, upper = np.quantile(resampled, [alpha, 1 - alpha])
+    return {"estimate": round(float(estimate), digits), "lower": round(float(lower), digits),
+            "upper": round(float(upper), digits)}
+
+
+def bootstrap_confidence_intervals(detected: Dict[str, np.ndarray], first_detection: Dict[str, np.ndarray],
+                                   index: EvaluationIndex, resamples: int = BOOTSTRAP_RESAMPLES,
+                                   confidence: float = BOOTSTRAP_CONFIDENCE, seed: int = BOOTSTRAP_SEED) -> Dict:
+    """
+    Bootstrap confidence intervals for detection metrics and their differences.
+
+    Labelled events are resampled with replacement. Every resample is a row
+    of an index matrix, and all methods are scored on the same rows, so the
+    differences between methods are paired. Each event is reduced to one
+    small code (label bit plus one detected bit per method), which turns a
+    whole block of resamples into a single bincount. MTTD resamples the
+    events of each attack phase and takes the earliest detection among
+    them, as MTTD is defined. A resample can drop the earliest detection
+    but never add an earlier one, so the per-method interval extends upward
+    from the estimate. The MTTD difference is therefore reported without
+    a significance flag (excludes_zero is None).
+
+    Args:
+        detected: Method name -> boolean detected mask over the index
+        first_detection: Method name -> first detection time per event
+            (micros; NEVER if undetected), see first_detection_by_event
+        index: EvaluationIndex built from the ground truth
+        resamples: Number of bootstrap resamples
+        confidence: Interval coverage
+        seed: Seed for the resampling generator
+
+    Returns:
+        Per method: precision, recall, F1, FPR and average phase MTTD
+        intervals; "difference": the same for the first method minus the
+        second (FPR and MTTD as reductions); plus the bootstrap settings
+    """
+    methods = list(detected)
+    rng = np.random.default_rng(seed)
+
+    # Code per labelled event: malicious bit above one detected bit per method
+    labelled = np.flatnonzero(index.malicious | index.benign)
+    codes = index.malicious[labelled].astype(np.int64) << len(methods)
+    for bit, method in enumerate(methods):
+        codes |= detected[method][labelled].astype(np.int64) << bit
+    n_codes = 2 << len(methods)
+
+    # Row 0 counts the observed sample; rows 1: are the resamples
+    counts = np.empty((resamples + 1, n_codes), dtype=np.int64)
+    counts[0] = np.bincount(codes, minlength=n_codes)
+    row = 1
+    if len(labelled):
+        for sample in _resample_indices(rng, len(labelled), resamples):
+            offsets = np.arange(len(sample))[:, None] * n_codes
+            counts[row:row + len(sample)] = np.bincount(
+                (codes[sample] + offsets).ravel(), minlength=len(sample) * n_codes).reshape(len(sample), n_codes)
+            row += len(sample)
+    else:
+        counts[1:] = 0
+
+    code_values = np.arange(n_codes)
+    is_malicious = (code_values >> len(methods)) & 1 == 1
+    metrics = {}
+    for bit, method in enumerate(methods):
+        hit = (code_values >> bit) & 1 == 1
+        tp = counts[:, is_malicious & hit].sum(axis=1)
+        fp = counts[:, ~is_malicious & hit].sum(axis=1)
+        fn = counts[:, is_malicious & ~hit].sum(axis=1)
+        tn = counts[:, ~is_malicious & ~hit].sum(axis=1)
+        precision = _ratio(tp, tp + fp)
+        recall = _ratio(tp, tp + fn)
+        metrics[method] = {
+            "precision": precision,
+            "recall": recall,
+            "f1_score": _ratio(2 * precision * recall, precision + recall),
+            "false_positive_rate": _ratio(fp, fp + tn),
+        }
+
+    # Average phase MTTD: per phase, the earliest detection among resampled phase events
+    phase_minutes = {method: [] for method in methods}
+    for position in range(len(index.phases)):
+        events = index.event_of_pair[(index.phase_of_pair == position) & (index.event_of_pair >= 0)]
+        if len(events) == 0:
+            continue
+        samples = [np.arange(len(events))[None, :]] + list(_resample_indices(rng, len(events), resamples))
+        for method in methods:
+            times = first_detection[method][events]
+            minutes = np.where(times == NEVER, np.inf,
+                               np.maximum(0, times - index.phase_start[position]) / 1e6 / 60)
+            phase_minutes[method].append(np.concatenate([minutes[s].min(axis=1) for s in samples]))
+    for method in methods:
+        if phase_minutes[method]:
+            minutes = np.column_stack(phase_minutes[method])
+            detected_phases = np.isfinite(minutes)
+            total = np.where(detected_phases, minutes, 0).sum(axis=1)
+            n_detected = detected_phases.sum(axis=1)
+            metrics[method]["average_phase_mttd"] = np.divide(
+                total, n_detected, out=np.full(len(total), np.nan), where=n_detected > 0)
+        else:
+            metrics[method]["average_phase_mttd"] = np.full(resamples + 1, np.nan)
+
+    intervals = {
+        "method": "bootstrap",
+        "resamples": resamples,
+        "confidence": confidence,
+        "seed": seed,
+    }
+    for method in methods:
+        intervals[method] = {
+            name: _interval(values, confidence, digits=1 if name == "average_phase_mttd" else 4)
+            for name, values in metrics[method].items()
+        }
+    if len(methods) == 2:
+        first, second = (metrics[m] for m in methods)
+        intervals["difference"] = {
+            "precision_improvement": _interval(first["precision"] - second["precision"], confidence),
+            "recall_improvement": _interval(first["recall"] - second["recall"], confidence),
+            "f1_improvement": _interval(first["f1_score"] - second["f1_score"], confidence),
+            "false_positive_rate_reduction": _interval(
+                second["false_positive_rate"] - first["false_positive_rate"], confidence),
+            "average_phase_mttd_improvement_minutes": _interval(
+                second["average_phase_mttd"] - first["average_phase_mttd"], confidence, digits=1),
+        }
+        for interval in intervals["difference"].values():
+            interval["excludes_zero"] = (interval["lower"] is not None
+                                         and (interval["lower"] > 0 or interval["upper"] < 0))
+        # Minimum-based resamples are biased upward, so no significance claim for MTTD
+        intervals["difference"]["average_phase_mttd_improvement_minutes"]["excludes_zero"] = None
+    return intervals
+
+
+def run_evaluation(curves: bool = True, scenario_dir: Optional[Path] = None,
+                   bootstrap_resamples: int = BOOTSTRAP_RESAMPLES, seed: int = BOOTSTRAP_SEED):
+    """
+    Run full evaluation comparing both detection methods.
+
+    Args:
+        curves: Include threshold curves and best operating points
+        scenario_dir: Scenario to evaluate (default: SCENARIO_DIR)
+        bootstrap_resamples: Resamples for confidence intervals (0 skips them)
+        seed: Seed for the bootstrap generator
+    """
+    scenario_dir = Path(scenario_dir) if scenario_dir else SCENARIO_DIR
     print("=" * 60)
     print("Running Evaluation")
     print("=" * 60)
     
-    # Load ground truth
-    with open(SCENARIO_DIR / "ground_truth.json") as f:
-        ground_truth = json.load(f)
+    # Load ground truth (columnar, rebuilt from ground_truth.json when it changes)
+    index = EvaluationIndex.from_columns(load_ground_truth(scenario_dir))
     
     # Load rules alerts
-    with open(SCENARIO_DIR / "rules_output" / "alerts.json") as f:
+    with open(scenario_dir / "rules_output" / "alerts.json") as f:
         rules_alerts = json.load(f)
     
     # Load LogLM findings
-    with open(SCENARIO_DIR / "loglm_output" / "findings.json") as f:
+    with open(scenario_dir / "loglm_output" / "findings.json") as f:
         loglm_findings = json.load(f)
     
     # Extract detected event IDs
-    rules_detected = set()
-    for alert in rules_alerts:
-        if alert.get("event_id"):
-            rules_detected.add(alert["event_id"])
-    
-    loglm_detected = set()
-    for finding in loglm_findings:
-        for eid in finding.get("event_ids", []):
-            loglm_detected.add(eid)
-    
-    print(f"\nRules detected {len(rules_detected)} unique events")
-    print(f"LogLM detected {len(loglm_detected)} unique events")
+    rules_detected = [alert["event_id"] for alert in rules_alerts if alert.get("event_id")]
+    loglm_detected = [eid for finding in loglm_findings for eid in finding.get("event_ids", [])]
     
     # Calculate confusion matrices
-    rules_eval = evaluate_detection(rules_detected, ground_truth)
-    loglm_eval = evaluate_detection(loglm_detected, ground_truth)
+    rules_eval = evaluate_detection(rules_detected, index)
+    loglm_eval = evaluate_detection(loglm_detected, index)
+    
+    print(f"\nRules detected {rules_eval['counts']['total_detected']} unique events")
+    print(f"LogLM detected {loglm_eval['counts']['total_detected']} unique events")
     
     # Calculate MTTD
-    rules_mttd = calculate_mttd(rules_alerts, ground_truth, "event_id")
-    loglm_mttd = calculate_mttd(loglm_findings, ground_truth, "event_ids")
+    rules_mttd = calculate_mttd(rules_alerts, index, "event_id")
+    loglm_mttd = calculate_mttd(loglm_findings, index, "event_ids")
+    
+    # Threshold curves over finding confidence and alert severity
+    if curves:
+        loglm_score = lambda f: f.get("confidence", 0.0)
+        rules_score = lambda a: SEVERITY_SCORES.get(a.get("severity"), 0.0)
+        loglm_curve = threshold_sweep(
+            event_scores(loglm_findings, index, loglm_score, "event_ids"), index,
+            detection_scores=np.array([loglm_score(f) for f in loglm_findings]),
+        )
+        rules_curve = threshold_sweep(
+            event_scores(rules_alerts, index, rules_score, "event_id"), index,
+            detection_scores=np.array([rules_score(a) for a in rules_alerts]),
+        )
+    
+    first_detection = {}
+    for method, detections, field in (("loglm", loglm_findings, "event_ids"), ("rules_only", rules_alerts, "event_id")):
+        event_ids, timestamps = detection_pairs(detections, field)
+        det_times = timestamps_to_micros(timestamps) if timestamps else np.zeros(0, np.int64)
+        first_detection[method] = first_detection_by_event(index, index.encode(event_ids), det_times)
+    
+    # Per-event detection latency, from attack event timestamps in the event store
+    latency = {}
+    event_store = open_event_store(scenario_dir)
+    if event_store is not None:
+        times = event_times(index, event_store.get_many(index.event_ids[index.malicious].tolist()))
+        event_store.close()
+        latency = {method: detection_latency_sketches(first, times, index) for method, first in first_detection.items()}
+        with open(scenario_dir / LATENCY_SKETCH_FILE, "w") as f:
+            json.dump({method: sketches.to_dict() for method, sketches in latency.items()}, f)
+    else:
+        print("No event store found; skipping detection latency (run the detection pipelines first)")
+    
+    # Bootstrap confidence intervals, paired across the two methods
+    if bootstrap_resamples:
+        intervals = bootstrap_confidence_intervals(
+            {"loglm": index.detected_mask(loglm_detected)[0], "rules_only": index.detected_mask(rules_detected)[0]},
+            first_detection, index, resamples=bootstrap_resamples, seed=seed,
+        )
     
     # Compile results
     results = {
@@ -272,8 +788,19 @@ def run_evaluation():
         }
     }
     
+    if curves:
+        results["rules_only"]["threshold_curve"] = rules_curve
+        results["rules_only"]["best_operating_point"] = best_operating_point(rules_curve)
+        results["loglm"]["threshold_curve"] = loglm_curve
+        results["loglm"]["best_operating_point"] = best_operating_point(loglm_curve)
+    
+    for method, sketches in latency.items():
+        results[method]["detection_latency"] = latency_summary(sketches)
+    if bootstrap_resamples:
+        results["confidence_intervals"] = intervals
+    
     # Save results
-    with open(SCENARIO_DIR / "evaluation_results.json", "w") as f:
+    with open(scenario_dir / "evaluation_results.json", "w") as f:
         json.dump(results, f, indent=2)
     
     # Print summary
@@ -332,6 +859,19 @@ def run_evaluation():
     print(f"{'Phases Detected':<35} {rules_mttd['phases_detected']:<15} {loglm_mttd['phases_detected']:<15}")
     print(f"{'Evasive Phases Detected':<35} {rules_mttd['evasive_phases_detected']:<15} {loglm_mttd['evasive_phases_detected']:<15}")
     
+    if latency:
+        print("\n⏳ PER-EVENT DETECTION LATENCY (minutes, p50 / p90 / p99)")
+        print("-"*60)
+        fmt = lambda stats: f"{stats['p50']} / {stats['p90']} / {stats['p99']}" if stats and stats["count"] else "-"
+        rules_latency = results["rules_only"]["detection_latency"]
+        loglm_latency = results["loglm"]["detection_latency"]
+        print(f"{'Group':<25} {'Rules-Only':<20} {'LogLM':<20}")
+        print("-"*60)
+        print(f"{'Overall':<25} {fmt(rules_latency['overall']):<20} {fmt(loglm_latency['overall']):<20}")
+        phases = sorted(loglm_latency["by_phase"].keys() | rules_latency["by_phase"].keys(), key=lambda k: int(k.split("_")[1]))
+        for phase in phases:
+            print(f"{phase:<25} {fmt(rules_latency['by_phase'].get(phase)):<20} {fmt(loglm_latency['by_phase'].get(phase)):<20}")
+    
     print("\n🎯 SUMMARY")
     print("-"*60)
     print(f"Rules-Only: {len(rules_alerts)} alerts, {rules_eval['metrics']['precision']*100:.1f}% precision")
@@ -346,8 +886,45 @@ def run_evaluation():
     if results['comparison']['mttd_improvement_minutes']:
         print(f"\nLogLM detects attacks {results['comparison']['mttd_improvement_minutes']:.0f} minutes faster on average")
     
+    if curves:
+        print("\n🎚️ THRESHOLD SWEEP")
+        print("-"*60)
+        for label, curve in (("Rules-Only (severity)", rules_curve), ("LogLM (confidence)", loglm_curve)):
+            best = best_operating_point(curve)
+            if best:
+                print(f"{label:<25} {len(curve['thresholds'])} thresholds, best F1 {best['f1_score']:.3f} "
+                      f"at >= {best['thresholds']} ({best['detections']} detections, "
+                      f"precision {best['precision']*100:.1f}%, recall {best['recall']*100:.1f}%)")
+    
+    if bootstrap_resamples:
+        ci = lambda i, pct: (f"{i['estimate'] * 100:.1f}% [{i['lower'] * 100:.1f}, {i['upper'] * 100:.1f}]"
+                             if pct else f"{i['estimate']:.1f} [{i['lower']:.1f}, {i['upper']:.1f}]"
+                             ) if i["estimate"] is not None else "n/a"
+        print(f"\n📏 {intervals['confidence'] * 100:.0f}% CONFIDENCE INTERVALS ({bootstrap_resamples} bootstrap resamples)")
+        print("-"*60)
+        print(f"{'Metric':<22} {'Rules-Only':<19} {'LogLM':<19}")
+        print("-"*60)
+        for name, pct in (("precision", True), ("recall", True), ("f1_score", True),
+                          ("false_positive_rate", True), ("average_phase_mttd", False)):
+            print(f"{name:<22} {ci(intervals['rules_only'][name], pct):<19} {ci(intervals['loglm'][name], pct):<19}")
+        for name, interval in intervals["difference"].items():
+            note = " (significant)" if interval["excludes_zero"] else ""
+            print(f"  {name}: {ci(interval, name != 'average_phase_mttd_improvement_minutes')}{note}")
+    
     return results
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate rules-only and LogLM detection against ground truth")
+    parser.add_argument("--no-curves", action="store_true", help="Skip the threshold sweep")
+    parser.add_argument("--scenario", type=Path, default=None, help="Scenario directory (default: default_attack)")
+    parser.add_argument("--resamples", type=int, default=BOOTSTRAP_RESAMPLES,
+                        help="Bootstrap resamples for confidence intervals (0 to skip)")
+    parser.add_argument("--seed", type=int, default=BOOTSTRAP_SEED, help="Bootstrap seed")
+    args = parser.parse_args()
+    run_evaluation(curves=not args.no_curves, scenario_dir=args.scenario,
+                   bootstrap_resamples=args.resamples, seed=args.seed)
+
+
 if __name__ == "__main__":
-    run_evaluation()
+    main()
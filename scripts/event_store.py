@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+Raw Event Store
+
+Keeps every raw log event exactly once so that alerts and findings can
+reference events by id instead of embedding a copy of the event:
+- `events.jsonl`: one canonical JSON record per event
+- `index.npz`: sorted event ids with byte offsets, lengths and content digests
+- Lookups binary-search the id array and read a single slice of a
+  memory-mapped file, so hydrating an event never parses the whole log
+
+The store lives in `raw_logs/event_store/` of a scenario and is rebuilt only
+when the raw log files change.
+"""
+
+import hashlib
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+
+try:
+    from scripts.log_io import find_log
+except ImportError:
+    from log_io import find_log
+
+STORE_DIRNAME = "event_store"
+EVENTS_FILE = "events.jsonl"
+INDEX_FILE = "index.npz"
+SOURCE_FILE = "sources.json"
+
+
+def canonical_event_bytes(event: Dict) -> bytes:
+    """
+    Serialize an event's content deterministically (sorted keys, no
+    whitespace). The pipeline-assigned "id" is not part of the content.
+    """
+    content = {k: v for k, v in event.items() if k != "id"}
+    return json.dumps(content, sort_keys=True, separators=(",", ":"), default=str).encode()
+
+
+def event_digest(event: Dict) -> str:
+    """Content hash of an event; events with identical fields share a digest."""
+    return hashlib.sha1(canonical_event_bytes(event)).hexdigest()
+
+
+class EventStore:
+    """Read-only view over a written event store."""
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        with np.load(self.directory / INDEX_FILE) as index:
+            self.ids = index["ids"]
+            self.offsets = index["offsets"]
+            self.lengths = index["lengths"]
+            self.digests = index["digests"]
+        self._file = None
+        self._map = None
+
+    @classmethod
+    def write(cls, directory: Path, events: Iterable[Dict], sources: Optional[Dict] = None) -> "EventStore":
+        """
+        Write events to a new store.
+
+        Events with identical content are stored once; a second id pointing
+        at the same content reuses the existing record.
+
+        Args:
+            directory: Store directory (created if missing)
+            events: Raw events, each with an "id" field
+            sources: Optional source file signature used for staleness checks
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+
+        ids: List[str] = []
+        offsets: List[int] = []
+        lengths: List[int] = []
+        digests: List[bytes] = []
+        by_digest: Dict[str, tuple] = {}
+        offset = 0
+
+        tmp_events = directory / (EVENTS_FILE + ".tmp")
+        with open(tmp_events, "wb") as f:
+            for event in events:
+                data = canonical_event_bytes(event)
+                digest = hashlib.sha1(data).digest()
+                if digest not in by_digest:
+                    f.write(data + b"\n")
+                    by_digest[digest] = (offset, len(data))
+                    offset += len(data) + 1
+                start, length = by_digest[digest]
+                ids.append(event["id"].encode())
+                offsets.append(start)
+                lengths.append(length)
+                digests.append(digest)
+
+        id_array = np.array(ids, dtype=bytes)
+        order = np.argsort(id_array)
+        tmp_index = directory / (INDEX_FILE + ".tmp.npz")
+        np.savez(
+            tmp_index,
+            ids=id_array[order],
+            offsets=np.array(offsets, dtype=np.int64)[order],
+            lengths=np.array(lengths, dtype=np.int32)[order],
+            digests=np.array(digests, dtype="S20")[order],
+        )
+        os.replace(tmp_events, directory / EVENTS_FILE)
+        os.replace(tmp_index, directory / INDEX_FILE)
+
+        if sources is not None:
+            with open(directory / SOURCE_FILE, "w") as f:
+                json.dump(sources, f, indent=2)
+
+        return cls(directory)
+
+    def _buffer(self):
+        if self._map is None:
+            self._file = open(self.directory / EVENTS_FILE, "rb")
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        return self._map
+
+    def _row(self, event_id: str) -> Optional[int]:
+        key = event_id.encode()
+        row = int(np.searchsorted(self.ids, key))
+        if row < len(self.ids) and self.ids[row] == key:
+            return row
+        return None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, event_id: str) -> bool:
+        return self._row(event_id) is not None
+
+    def digest(self, event_id: str) -> Optional[str]:
+        """Content digest of a stored event."""
+        row = self._row(event_id)
+        return self.digests[row].hex() if row is not None else None
+
+    def get(self, event_id: str) -> Optional[Dict]:
+        """Hydrate a single event by id."""
+        row = self._row(event_id)
+        if row is None:
+            return None
+        start = int(self.offsets[row])
+        return {"id": event_id, **json.loads(self._buffer()[start:start + int(self.lengths[row])])}
+
+    def get_many(self, event_ids: Iterable[str]) -> Dict[str, Dict]:
+        """Hydrate several events; unknown ids are skipped."""
+        events = {}
+        for event_id in event_ids:
+            event = self.get(event_id)
+            if event is not None:
+                events[event_id] = event
+        return events
+
+    def close(self) -> None:
+        if self._map is not None:
+            self._map.close()
+            self._file.close()
+            self._map = None
+            self._file = None
+
+
+def _source_signature(scenario_dir: Path) -> Dict:
+    """Sizes and mtimes of the raw log files the store was built from."""
+    signature = {}
+    raw_dir = Path(scenario_dir) / "raw_logs"
+    for log_type in ("conn", "dns"):
+        path = find_log(raw_dir, log_type)
+        if path is not None:
+            stat = path.stat()
+            signature[path.name] = {"size": stat.st_size, "mtime": stat.st_mtime}
+    return signature
+
+
+def store_dir(scenario_dir: Path) -> Path:
+    return Path(scenario_dir) / "raw_logs" / STORE_DIRNAME
+
+
+def is_current(scenario_dir: Path) -> bool:
+    """True if the scenario's event store matches its raw log files."""
+    directory = store_dir(scenario_dir)
+    if not (directory / INDEX_FILE).exists() or not (directory / SOURCE_FILE).exists():
+        return False
+    with open(directory / SOURCE_FILE) as f:
+        return json.load(f) == _source_signature(scenario_dir)
+
+
+def ensure_event_store(scenario_dir: Path, events: List[Dict]) -> EventStore:
+    """
+    Open the scenario's event store, (re)building it from `events` if the
+    raw logs changed since it was written.
+    """
+    directory = store_dir(scenario_dir)
+    if is_current(scenario_dir):
+        return EventStore(directory)
+    return EventStore.write(directory, events, sources=_source_signature(scenario_dir))
+
+
+def open_event_store(scenario_dir: Path) -> Optional[EventStore]:
+    """Open the scenario's event store if one has been written."""
+    directory = store_dir(scenario_dir)
+    if (directory / INDEX_FILE).exists():
+        return EventStore(directory)
+    return None
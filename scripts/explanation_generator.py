@@ -3,11 +3,23 @@ AI-Generated Explanation Generator
 
 Generates human-readable explanations for security findings,
 similar to Dropzone AI's investigation summaries.
+
+Explanations are produced on demand (explain_finding / explain_incident)
+from templates parsed once at import, and memoized per finding id and
+EXPLAINER_VERSION in a bounded LRU cache.
 """
 
-from typing import Dict, List, Optional
+from collections import OrderedDict
+from string import Formatter
+from typing import Callable, Dict, Hashable, List, Optional, Tuple
 import json
 
+# Bump when templates or wording change so cached explanations are not reused
+EXPLAINER_VERSION = 2
+
+# Explanations kept in memory by the default cache
+EXPLANATION_CACHE_SIZE = 4096
+
 # Templates for generating explanations based on technique and context
 EXPLANATION_TEMPLATES = {
     "T1071.001": {
@@ -113,6 +125,20 @@ DEFAULT_TEMPLATE = {
 }
 
 
+def _parse_template(template: str) -> Tuple[Tuple[str, Optional[str]], ...]:
+    """Split a format string into (literal text, field name) pieces."""
+    return tuple((literal, field) for literal, field, _, _ in Formatter().parse(template))
+
+
+def _render(parts: Tuple[Tuple[str, Optional[str]], ...], values: Dict) -> str:
+    return "".join(literal if field is None else literal + str(values[field]) for literal, field in parts)
+
+
+# Templates parsed once, so rendering is a join over pre-split pieces
+PARSED_TEMPLATES = {tid: _parse_template(t["template"]) for tid, t in EXPLANATION_TEMPLATES.items()}
+PARSED_DEFAULT_TEMPLATE = _parse_template(DEFAULT_TEMPLATE["template"])
+
+
 def generate_explanation(finding: Dict) -> str:
     """
     Generate a human-readable explanation for a security finding.
@@ -130,7 +156,7 @@ def generate_explanation(finding: Dict) -> str:
     
     # Get template
     template_data = EXPLANATION_TEMPLATES.get(technique_id, DEFAULT_TEMPLATE)
-    template = template_data["template"]
+    template = PARSED_TEMPLATES.get(technique_id, PARSED_DEFAULT_TEMPLATE)
     pattern_key = "evasive" if is_evasive else "standard"
     pattern_details = template_data["pattern_details"].get(pattern_key, "")
     
@@ -156,19 +182,23 @@ def generate_explanation(finding: Dict) -> str:
     dest_domain = raw_event.get("query", dest_ip)
     
     # Format the explanation
-    explanation = template.format(
-        hostname=hostname,
-        dest_ip=dest_ip,
-        dest_port=dest_port,
-        dest_domain=dest_domain,
-        user=user,
-        data_size=data_size,
-        technique_id=technique_id,
-        technique_name=technique_name,
-        pattern_details=pattern_details,
-        connection_count=1,  # Could be enhanced to count related events
-        query_count=1  # Could be enhanced to count DNS queries
-    )
+    explanation = _render(template, {
+        "hostname": hostname,
+        "dest_ip": dest_ip,
+        "dest_port": dest_port,
+        "dest_domain": dest_domain,
+        "user": user,
+        "data_size": data_size,
+        "technique_id": technique_id,
+        "technique_name": technique_name,
+        "pattern_details": pattern_details,
+        "connection_count": len(finding.get("event_ids") or [None]),
+        "query_count": len(finding.get("event_ids") or [None]),
+    })
+    
+    # Beacon findings are scored from connection timing across many events
+    if finding.get("beacon"):
+        explanation += f"\n\n**Beacon Analysis**: {finding.get('description', '')}. Connection timing to {finding['beacon']['destination']} is periodic (spectral score {finding['beacon']['spectral_score']}, interval jitter {finding['beacon']['interval_mad']})."
     
     # Add evasion context if applicable
     if is_evasive:
@@ -192,7 +222,8 @@ def generate_incident_summary(incident: Dict, findings: List[Dict]) -> str:
     # Group findings by attack phase
     phases = {}
     for finding in findings:
-        phase = finding.get("attack_phase", 0)
+        # Beacon and graph findings span phases and carry none
+        phase = finding.get("attack_phase") or 0
         if phase not in phases:
             phases[phase] = []
         phases[phase].append(finding)
@@ -202,12 +233,15 @@ def generate_incident_summary(incident: Dict, findings: List[Dict]) -> str:
     summary_parts.append(f"## Incident Summary: {incident.get('title', 'Security Incident')}\n")
     summary_parts.append(f"**Severity**: {incident.get('severity', 'Unknown').upper()}")
     summary_parts.append(f"**Findings**: {len(findings)} related events")
-    summary_parts.append(f"**Time Range**: {incident.get('start_time', 'Unknown')} to {incident.get('end_time', 'Unknown')}\n")
+    start_time = incident.get("start_time") or incident.get("created_at", "Unknown")
+    end_time = incident.get("end_time") or incident.get("updated_at", "Unknown")
+    summary_parts.append(f"**Time Range**: {start_time} to {end_time}\n")
     
     # Describe attack progression
     summary_parts.append("### Attack Progression\n")
     
     phase_names = {
+        0: "Correlated Activity",
         1: "Initial Compromise",
         2: "Command & Control",
         3: "Lateral Movement",
@@ -250,10 +284,81 @@ def generate_incident_summary(incident: Dict, findings: List[Dict]) -> str:
     return "\n".join(summary_parts)
 
 
+class ExplanationCache:
+    """Bounded LRU cache of generated explanations."""
+
+    def __init__(self, maxsize: int = EXPLANATION_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[Hashable, str]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_create(self, key: Hashable, create: Callable[[], str]) -> str:
+        text = self._entries.get(key)
+        if text is not None:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return text
+        self.misses += 1
+        text = create()
+        self._entries[key] = text
+        if len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+        return text
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> Dict[str, int]:
+        return {"entries": len(self._entries), "maxsize": self.maxsize, "hits": self.hits, "misses": self.misses}
+
+
+EXPLANATION_CACHE = ExplanationCache()
+
+
+def explain_finding(finding: Dict, hydrate: Optional[Callable[[Dict], Optional[Dict]]] = None,
+                    scope: Hashable = "", cache: Optional[ExplanationCache] = None) -> str:
+    """
+    Explanation for a finding, generated on first request and then memoized.
+    
+    Args:
+        finding: The finding dictionary
+        hydrate: Called with the finding on a cache miss to load its raw
+            event, for findings saved without one
+        scope: Distinguishes findings with the same id from different
+            pipeline runs (e.g. the findings file's modification time)
+        cache: Cache to use (default: the module-level EXPLANATION_CACHE)
+        
+    Returns:
+        The explanation string
+    """
+    cache = EXPLANATION_CACHE if cache is None else cache
+
+    def create() -> str:
+        if "raw_event" not in finding and hydrate is not None:
+            return generate_explanation({**finding, "raw_event": hydrate(finding) or {}})
+        return generate_explanation(finding)
+
+    return cache.get_or_create((scope, "finding", finding.get("id"), EXPLAINER_VERSION), create)
+
+
+def explain_incident(incident: Dict, findings: List[Dict], scope: Hashable = "",
+                     cache: Optional[ExplanationCache] = None) -> str:
+    """Incident summary, generated on first request and then memoized (see explain_finding)."""
+    cache = EXPLANATION_CACHE if cache is None else cache
+    return cache.get_or_create(
+        (scope, "incident", incident.get("id"), EXPLAINER_VERSION),
+        lambda: generate_incident_summary(incident, findings),
+    )
+
+
 def add_explanations_to_findings(findings: List[Dict]) -> List[Dict]:
     """
     Add AI-generated explanations to a list of findings.
     
+    The pipeline no longer calls this; explanations are generated on
+    demand with explain_finding. Kept for exporting fully explained findings.
+    
     Args:
         findings: List of finding dictionaries
         
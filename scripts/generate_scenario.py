@@ -13,20 +13,69 @@ The scenario demonstrates:
 - Rules generate many false positives on normal business activity
 - LogLM's behavioral analysis avoids these false positives
 - Evasive attacks bypass rules but are caught by LogLM
+
+Benign volume, duration and host count are set by a ScenarioScale. Benign
+traffic is generated in fixed time windows, rendered in parallel worker
+processes from per-window seeds and streamed to the log files in order
+(JSON arrays, JSON lines, native Zeek TSV, Parquet or Arrow IPC), so
+large load-test scenarios are produced in constant memory, and a seed
+gives the same bytes whatever the number of workers. Hosts beyond the
+named ones form an enterprise topology (see topology.py) with roles,
+subnets, service dependencies and heavy-tailed activity:
+
+    python scripts/generate_scenario.py --events-per-day 5000000 --days 20 \\
+        --hosts 50000 --format jsonl --compress --scenario-dir data/scenarios/load_100m
 """
 
+import argparse
+import itertools
 import json
+import math
+import os
 import random
-import uuid
-import numpy as np
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+try:
+    from scripts.ground_truth import write_columns
+    from scripts.log_io import (COMPRESSIBLE, FORMAT_SUFFIXES, encode_events, event_writer, find_log,
+                                indented, iso_timestamps, log_filename)
+    from scripts.log_merge import merge_sorted, sorted_run
+    from scripts.topology import SERVICES, Topology
+except ImportError:
+    from ground_truth import write_columns
+    from log_io import (COMPRESSIBLE, FORMAT_SUFFIXES, encode_events, event_writer, find_log,
+                        indented, iso_timestamps, log_filename)
+    from log_merge import merge_sorted, sorted_run
+    from topology import SERVICES, Topology
 
 # Configuration
 SCENARIO_DIR = Path(__file__).parent.parent / "data" / "scenarios" / "default_attack"
 TOTAL_BENIGN_EVENTS = 4873
+DURATION_HOURS = 20
 BASE_TIME = datetime(2026, 1, 9, 0, 0, 0)
+BASE_MICROS = int(np.datetime64(BASE_TIME, "us").astype(np.int64))
+
+# Default scale: TOTAL_BENIGN_EVENTS over DURATION_HOURS
+DEFAULT_DAYS = DURATION_HOURS / 24
+DEFAULT_EVENTS_PER_DAY = TOTAL_BENIGN_EVENTS / DEFAULT_DAYS
+
+# Share of benign events that are connections (the rest are DNS queries)
+CONN_SHARE = 0.7
+
+# Benign events generated per time window, bounding memory use
+CHUNK_EVENTS = 50000
+
+# Windows each worker process may render ahead of the log writer
+WINDOWS_AHEAD = 2
+
+BENIGN_LABEL = {"label": "benign"}
 
 # Network topology
 INTERNAL_HOSTS = [
@@ -34,9 +83,9 @@ INTERNAL_HOSTS = [
     {"ip": "10.0.1.55", "hostname": "workstation-055", "user": "tjohnson", "type": "workstation"},
     {"ip": "10.0.1.78", "hostname": "workstation-078", "user": "mwilson", "type": "workstation"},
     {"ip": "10.0.1.103", "hostname": "laptop-sales-03", "user": "klee", "type": "laptop"},
-    {"ip": "10.0.2.10", "hostname": "server-db-01", "user": "svc_db", "type": "server"},
-    {"ip": "10.0.2.20", "hostname": "server-web-02", "user": "svc_web", "type": "server"},
-    {"ip": "10.0.2.30", "hostname": "server-file-01", "user": "svc_file", "type": "server"},
+    {"ip": "10.0.2.10", "hostname": "server-db-01", "user": "svc_db", "type": "server", "role": "database"},
+    {"ip": "10.0.2.20", "hostname": "server-web-02", "user": "svc_web", "type": "server", "role": "web_server"},
+    {"ip": "10.0.2.30", "hostname": "server-file-01", "user": "svc_file", "type": "server", "role": "file_server"},
 ]
 
 # Workstations only
@@ -74,6 +123,35 @@ EXTERNAL_RARE_BUT_BENIGN = [
     "34.117.59.81",     # Google Cloud
 ]
 
+# Benign connection mix; the per-type arrays below are indexed by position in CONN_TYPES
+CONN_TYPES = ["dns", "https", "http", "internal"]
+CONN_TYPE_WEIGHTS = np.array([30, 40, 10, 20], dtype=np.float64)
+# External destinations, most popular first; each type draws from a (start,
+# count) slice of them (internal connections go to another internal host)
+CONN_RESP_IPS = np.array(["8.8.8.8", "8.8.4.4", "1.1.1.1"] + EXTERNAL_BENIGN + LEGITIMATE_CLOUD_IPS, dtype=object)
+CONN_DESTINATIONS = [(0, 3), (3, len(EXTERNAL_BENIGN) + len(LEGITIMATE_CLOUD_IPS)), (3, len(EXTERNAL_BENIGN)), None]
+CONN_PORTS = np.array([53, 443, 80, 0])
+CONN_PROTOS = np.array(["udp", "tcp", "tcp", "tcp"], dtype=object)
+# Service per type, followed by the services of internal connections (topology.SERVICES)
+CONN_SERVICE_NAMES = np.array(["dns", "ssl", "http", None] + SERVICES, dtype=object)
+# Uniform ranges: duration in seconds, bytes (inclusive)
+CONN_DURATIONS = np.array([[0.001, 0.1], [0.5, 30], [0.1, 5], [0.01, 2]])
+CONN_BYTES_SENT = np.array([[40, 100], [500, 50000], [200, 5000], [100, 10000]])
+CONN_BYTES_RECV = np.array([[100, 500], [1000, 500000], [500, 100000], [100, 10000]])
+
+BENIGN_DOMAINS = [
+    "google.com", "www.google.com", "mail.google.com",
+    "microsoft.com", "login.microsoftonline.com",
+    "github.com", "api.github.com",
+    "slack.com", "app.slack.com",
+    "zoom.us", "us02web.zoom.us",
+    "salesforce.com", "login.salesforce.com",
+    "aws.amazon.com", "s3.amazonaws.com",
+]
+DNS_QTYPES = ["A", "AAAA", "A"]
+
+HEX_DIGITS = np.frombuffer(b"0123456789abcdef", dtype=np.uint8)
+
 # Attack infrastructure
 C2_SERVER = "203.0.113.50"
 ATTACKER_IPS = ["198.51.100.10", "198.51.100.25"]
@@ -159,109 +237,180 @@ ATTACK_PHASES = [
 ]
 
 
+class ScenarioScale:
+    """Volume of benign background traffic: rate, duration and host count."""
+
+    def __init__(self, events_per_day: float = DEFAULT_EVENTS_PER_DAY, days: float = DEFAULT_DAYS,
+                 hosts: int = len(INTERNAL_HOSTS)):
+        self.events_per_day = events_per_day
+        self.days = days
+        self.hosts = hosts
+
+    @property
+    def total_events(self) -> int:
+        return int(round(self.events_per_day * self.days))
+
+    @property
+    def conn_events(self) -> int:
+        return int(self.total_events * CONN_SHARE)
+
+    @property
+    def dns_events(self) -> int:
+        return self.total_events - self.conn_events
+
+    @property
+    def duration_seconds(self) -> float:
+        return self.days * 86400
+
+    def to_dict(self) -> Dict:
+        return {"events_per_day": self.events_per_day, "days": self.days, "hosts": self.hosts,
+                "benign_events": self.total_events}
+
+
 def generate_uid() -> str:
-    """Generate a Zeek-style UID."""
-    return f"C{uuid.uuid4().hex[:15]}"
+    """Generate a Zeek-style UID (from the seeded `random` state)."""
+    return f"C{random.getrandbits(60):015x}"
 
 
-def generate_benign_conn_log(timestamp: datetime, idx: int) -> Dict[str, Any]:
-    """Generate a benign connection log entry."""
-    src_host = random.choice(INTERNAL_HOSTS)
-    
-    conn_type = random.choices(
-        ["dns", "https", "http", "internal"],
-        weights=[30, 40, 10, 20]
-    )[0]
-    
-    if conn_type == "dns":
-        dst_ip = random.choice(["8.8.8.8", "8.8.4.4", "1.1.1.1"])
-        dst_port = 53
-        proto = "udp"
-        service = "dns"
-        duration = random.uniform(0.001, 0.1)
-        bytes_sent = random.randint(40, 100)
-        bytes_recv = random.randint(100, 500)
-    elif conn_type == "https":
-        dst_ip = random.choice(EXTERNAL_BENIGN + LEGITIMATE_CLOUD_IPS)
-        dst_port = 443
-        proto = "tcp"
-        service = "ssl"
-        duration = random.uniform(0.5, 30)
-        bytes_sent = random.randint(500, 50000)
-        bytes_recv = random.randint(1000, 500000)
-    elif conn_type == "http":
-        dst_ip = random.choice(EXTERNAL_BENIGN)
-        dst_port = 80
-        proto = "tcp"
-        service = "http"
-        duration = random.uniform(0.1, 5)
-        bytes_sent = random.randint(200, 5000)
-        bytes_recv = random.randint(500, 100000)
-    else:  # internal
-        other_hosts = [h for h in INTERNAL_HOSTS if h["ip"] != src_host["ip"]]
-        dst_host = random.choice(other_hosts)
-        dst_ip = dst_host["ip"]
-        dst_port = random.choice([445, 139, 135, 389, 88])
-        proto = "tcp"
-        service = random.choice(["smb", "dce_rpc", "ldap", "kerberos"])
-        duration = random.uniform(0.01, 2)
-        bytes_sent = random.randint(100, 10000)
-        bytes_recv = random.randint(100, 10000)
-    
+def format_uids(uids: np.ndarray) -> List[str]:
+    """Zeek-style UIDs (as generate_uid() writes them) of 60-bit integers."""
+    shifts = np.arange(56, -1, -4, dtype=np.uint64)
+    chars = np.empty((len(uids), 16), dtype=np.uint8)
+    chars[:, 0] = ord("C")
+    chars[:, 1:] = HEX_DIGITS[(uids.astype(np.uint64)[:, None] >> shifts) & np.uint64(15)]
+    return chars.view("S16").ravel().astype(str).tolist()
+
+
+def format_timestamps(micros: np.ndarray) -> List[str]:
+    """ISO timestamps (as datetime.isoformat() writes them) of microsecond offsets from BASE_TIME."""
+    return iso_timestamps(micros + BASE_MICROS)
+
+
+def draw_offsets(rng: np.random.Generator, start: float, end: float, n: int) -> np.ndarray:
+    """n sorted uniform event times in [start, end) seconds, as microsecond offsets from BASE_TIME."""
+    return np.sort(np.round(rng.uniform(start, end, n) * 1e6).astype(np.int64))
+
+
+def synthesize_benign_conn(rng: np.random.Generator, micros: np.ndarray, topology: Topology) -> Dict[str, np.ndarray]:
+    """
+    Draw benign connections for all event times at once.
+
+    Only numbers are drawn here: hosts, destinations and services are
+    indexes into the Topology / CONN_RESP_IPS / CONN_SERVICE_NAMES, and the
+    strings are filled in by conn_records at write time.
+
+    Args:
+        rng: Random generator
+        micros: Sorted event times, microseconds from BASE_TIME
+        topology: Internal hosts; sources, popularity and internal services are drawn from it
+
+    Returns:
+        Columns of the conn events
+    """
+    n = len(micros)
+    kind = rng.choice(len(CONN_TYPES), size=n, p=CONN_TYPE_WEIGHTS / CONN_TYPE_WEIGHTS.sum())
+    src = topology.sample_sources(rng, n)
+    resp = np.empty(n, dtype=np.int64)
+    for k, destinations in enumerate(CONN_DESTINATIONS):
+        if destinations is not None:
+            first, count = destinations
+            rows = np.flatnonzero(kind == k)
+            resp[rows] = first + topology.sample_ranked(rng, count, len(rows))
+    resp_p = CONN_PORTS[kind]
+    service = np.arange(len(CONN_TYPES))[kind]
+
+    internal = np.flatnonzero(kind == CONN_TYPES.index("internal"))
+    # Internal destinations are Topology host indexes, offset by len(CONN_RESP_IPS)
+    dst, resp_p[internal], internal_service = topology.sample_internal(rng, src[internal])
+    resp[internal] = len(CONN_RESP_IPS) + dst
+    service[internal] = len(CONN_TYPES) + internal_service
+
+    low, high = CONN_DURATIONS[kind].T
     return {
-        "id": f"conn_{idx:05d}",
-        "ts": timestamp.isoformat(),
-        "uid": generate_uid(),
-        "id.orig_h": src_host["ip"],
-        "id.orig_p": random.randint(49152, 65535),
-        "id.resp_h": dst_ip,
-        "id.resp_p": dst_port,
-        "proto": proto,
+        "micros": micros,
+        "uid": rng.integers(1 << 60, size=n, dtype=np.int64),
+        "src": src,
+        "orig_p": rng.integers(49152, 65536, size=n),
+        "kind": kind,
+        "resp": resp,
+        "resp_p": resp_p,
         "service": service,
-        "duration": round(duration, 6),
-        "orig_bytes": bytes_sent,
-        "resp_bytes": bytes_recv,
-        "conn_state": "SF",
-        "hostname": src_host["hostname"],
-        "user": src_host["user"]
+        "duration": np.round(rng.uniform(low, high), 6),
+        "orig_bytes": rng.integers(CONN_BYTES_SENT[kind, 0], CONN_BYTES_SENT[kind, 1] + 1),
+        "resp_bytes": rng.integers(CONN_BYTES_RECV[kind, 0], CONN_BYTES_RECV[kind, 1] + 1),
     }
 
 
-def generate_benign_dns_log(timestamp: datetime, idx: int) -> Dict[str, Any]:
-    """Generate a benign DNS log entry."""
-    src_host = random.choice(INTERNAL_HOSTS)
-    
-    domains = [
-        "google.com", "www.google.com", "mail.google.com",
-        "microsoft.com", "login.microsoftonline.com",
-        "github.com", "api.github.com",
-        "slack.com", "app.slack.com",
-        "zoom.us", "us02web.zoom.us",
-        "salesforce.com", "login.salesforce.com",
-        "aws.amazon.com", "s3.amazonaws.com",
-    ]
-    
-    query = random.choice(domains)
-    qtype = random.choice(["A", "AAAA", "A"])
-    
+def synthesize_benign_dns(rng: np.random.Generator, micros: np.ndarray, topology: Topology) -> Dict[str, np.ndarray]:
+    """Draw benign DNS queries for all event times at once (numeric columns, see dns_records)."""
+    n = len(micros)
     return {
-        "id": f"dns_{idx:05d}",
-        "ts": timestamp.isoformat(),
-        "uid": generate_uid(),
-        "id.orig_h": src_host["ip"],
-        "id.orig_p": random.randint(49152, 65535),
-        "id.resp_h": "8.8.8.8",
-        "id.resp_p": 53,
-        "proto": "udp",
-        "query": query,
-        "qtype": qtype,
-        "rcode": 0,
-        "rcode_name": "NOERROR",
-        "hostname": src_host["hostname"],
-        "user": src_host["user"]
+        "micros": micros,
+        "uid": rng.integers(1 << 60, size=n, dtype=np.int64),
+        "src": topology.sample_sources(rng, n),
+        "orig_p": rng.integers(49152, 65536, size=n),
+        "query": topology.sample_ranked(rng, len(BENIGN_DOMAINS), n),
+        "qtype": rng.integers(len(DNS_QTYPES), size=n),
     }
 
 
+def conn_records(columns: Dict[str, np.ndarray], hosts: Topology, first_idx: int) -> Iterator[Dict[str, Any]]:
+    """Materialize conn events from synthesize_benign_conn columns, numbered from first_idx."""
+    src = columns["src"]
+    resp_ips = np.concatenate([CONN_RESP_IPS, hosts.ip])
+    rows = zip(itertools.count(first_idx), format_timestamps(columns["micros"]), format_uids(columns["uid"]),
+               hosts.ip[src].tolist(), columns["orig_p"].tolist(), resp_ips[columns["resp"]].tolist(),
+               columns["resp_p"].tolist(), CONN_PROTOS[columns["kind"]].tolist(),
+               CONN_SERVICE_NAMES[columns["service"]].tolist(), columns["duration"].tolist(),
+               columns["orig_bytes"].tolist(), columns["resp_bytes"].tolist(),
+               hosts.hostname[src].tolist(), hosts.user[src].tolist())
+    for idx, ts, uid, orig_h, orig_p, resp_h, resp_p, proto, service, duration, sent, recv, hostname, user in rows:
+        yield {
+            "id": f"conn_{idx:05d}",
+            "ts": ts,
+            "uid": uid,
+            "id.orig_h": orig_h,
+            "id.orig_p": orig_p,
+            "id.resp_h": resp_h,
+            "id.resp_p": resp_p,
+            "proto": proto,
+            "service": service,
+            "duration": duration,
+            "orig_bytes": sent,
+            "resp_bytes": recv,
+            "conn_state": "SF",
+            "hostname": hostname,
+            "user": user
+        }
+
+
+def dns_records(columns: Dict[str, np.ndarray], hosts: Topology, first_idx: int) -> Iterator[Dict[str, Any]]:
+    """Materialize DNS events from synthesize_benign_dns columns, numbered from first_idx."""
+    src = columns["src"]
+    rows = zip(itertools.count(first_idx), format_timestamps(columns["micros"]), format_uids(columns["uid"]),
+               hosts.ip[src].tolist(), columns["orig_p"].tolist(),
+               np.asarray(BENIGN_DOMAINS, dtype=object)[columns["query"]].tolist(),
+               np.asarray(DNS_QTYPES, dtype=object)[columns["qtype"]].tolist(),
+               hosts.hostname[src].tolist(), hosts.user[src].tolist())
+    for idx, ts, uid, orig_h, orig_p, query, qtype, hostname, user in rows:
+        yield {
+            "id": f"dns_{idx:05d}",
+            "ts": ts,
+            "uid": uid,
+            "id.orig_h": orig_h,
+            "id.orig_p": orig_p,
+            "id.resp_h": "8.8.8.8",
+            "id.resp_p": 53,
+            "proto": "udp",
+            "query": query,
+            "qtype": qtype,
+            "rcode": 0,
+            "rcode_name": "NOERROR",
+            "hostname": hostname,
+            "user": user
+        }
+
+
 def generate_false_positive_traffic(event_idx: int, ground_truth: Dict) -> tuple[List[Dict], List[Dict], int]:
     """
     Generate BENIGN traffic that will trigger rules (false positives).
@@ -632,7 +781,7 @@ def generate_false_positive_traffic(event_idx: int, ground_truth: Dict) -> tuple
     fp_count = len(conn_events) + len(dns_events)
     print(f"  Generated {fp_count} false positive events")
     
-    return conn_events, dns_events, event_idx
+    return sorted_run(conn_events), sorted_run(dns_events), event_idx
 
 
 def generate_detectable_attacks(event_idx: int, ground_truth: Dict) -> tuple[List[Dict], List[Dict], int]:
@@ -838,7 +987,7 @@ def generate_detectable_attacks(event_idx: int, ground_truth: Dict) -> tuple[Lis
         ground_truth["incidents"][0]["event_ids"].append(event["id"])
         event_idx += 1
     
-    return conn_events, dns_events, event_idx
+    return sorted_run(conn_events), sorted_run(dns_events), event_idx
 
 
 def generate_evasive_attacks(event_idx: int, ground_truth: Dict) -> tuple[List[Dict], List[Dict], int]:
@@ -1057,14 +1206,180 @@ def generate_evasive_attacks(event_idx: int, ground_truth: Dict) -> tuple[List[D
         "evasive": True
     })
     
-    return conn_events, dns_events, event_idx
+    return sorted_run(conn_events), sorted_run(dns_events), event_idx
+
+
+def _split(total: int, parts: int) -> List[int]:
+    """Split total into `parts` near-equal integer counts."""
+    bounds = [total * i // parts for i in range(parts + 1)]
+    return [b - a for a, b in zip(bounds, bounds[1:])]
+
+
+def benign_windows(scale: ScenarioScale, conn_start: int, dns_start: int, labelled_conn: List[Dict],
+                   labelled_dns: List[Dict], seed: np.random.SeedSequence, conn_path: Path,
+                   dns_path: Path) -> Iterator[Dict]:
+    """
+    Split benign traffic into fixed time windows of at most CHUNK_EVENTS
+    events, each with its own spawned seed, first event ids and the
+    labelled events falling inside it.
+
+    The windows depend only on the scale, so render_window produces the
+    same bytes for a window whichever process renders it.
+    """
+    windows = max(1, math.ceil(scale.total_events / CHUNK_EVENTS))
+    width = scale.duration_seconds / windows
+    seeds = seed.spawn(windows)
+    conn_idx, dns_idx = conn_start, dns_start
+    conn_pos = dns_pos = 0
+    for window, (n_conn, n_dns) in enumerate(zip(_split(scale.conn_events, windows),
+                                                 _split(scale.dns_events, windows))):
+        start = window * width
+        # The last window takes all remaining labelled events
+        end_ts = (BASE_TIME + timedelta(seconds=start + width)).isoformat() if window < windows - 1 else None
+        window_conn, conn_pos = _take_until(labelled_conn, conn_pos, end_ts)
+        window_dns, dns_pos = _take_until(labelled_dns, dns_pos, end_ts)
+        yield {
+            "seed": seeds[window],
+            "start": start,
+            "end": start + width,
+            "n_conn": n_conn,
+            "n_dns": n_dns,
+            "conn_idx": conn_idx,
+            "dns_idx": dns_idx,
+            "labelled_conn": window_conn,
+            "labelled_dns": window_dns,
+            "conn_path": conn_path,
+            "dns_path": dns_path,
+        }
+        conn_idx += n_conn
+        dns_idx += n_dns
+
+
+# Topology of the benign traffic, set in each worker process by _init_window_worker
+_WINDOW_TOPOLOGY: Optional[Topology] = None
+
+
+def _init_window_worker(topology: Topology) -> None:
+    global _WINDOW_TOPOLOGY
+    _WINDOW_TOPOLOGY = topology
+
+
+def window_events(window: Dict, topology: Topology) -> Tuple[Iterator[Dict], Iterator[Dict]]:
+    """Synthesize one benign_windows window: its conn and dns events, with the labelled events merged in."""
+    rng = np.random.default_rng(window["seed"])
+    conn = synthesize_benign_conn(rng, draw_offsets(rng, window["start"], window["end"], window["n_conn"]), topology)
+    dns = synthesize_benign_dns(rng, draw_offsets(rng, window["start"], window["end"], window["n_dns"]), topology)
+    return (merge_sorted(conn_records(conn, topology, window["conn_idx"]), window["labelled_conn"]),
+            merge_sorted(dns_records(dns, topology, window["dns_idx"]), window["labelled_dns"]))
+
+
+def render_window(window: Dict) -> Tuple[bytes, int, bytes, int]:
+    """
+    Synthesize one benign_windows window, merge in its labelled events and
+    encode both logs.
+
+    Returns:
+        (conn block, conn event count, dns block, dns event count), ready
+        for the writers' write_block
+    """
+    conn_events, dns_events = window_events(window, _WINDOW_TOPOLOGY)
+    return (encode_events(conn_events, window["conn_path"]), window["n_conn"] + len(window["labelled_conn"]),
+            encode_events(dns_events, window["dns_path"]), window["n_dns"] + len(window["labelled_dns"]))
+
+
+def render_windows(windows: Iterable[Dict], topology: Topology, workers: int) -> Iterator[Tuple[bytes, int, bytes, int]]:
+    """
+    render_window over the windows, in order.
+
+    With more than one worker the windows are rendered in a process pool,
+    at most WINDOWS_AHEAD per worker ahead of the consumer so memory stays
+    bounded.
+    """
+    if workers <= 1:
+        _init_window_worker(topology)
+        yield from map(render_window, windows)
+        return
+    with ProcessPoolExecutor(max_workers=workers, initializer=_init_window_worker, initargs=(topology,)) as pool:
+        pending = deque()
+        for window in windows:
+            pending.append(pool.submit(render_window, window))
+            if len(pending) >= workers * WINDOWS_AHEAD:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
 
+def _take_until(events: List[Dict], position: int, end_ts: Optional[str]) -> Tuple[List[Dict], int]:
+    """Events from `position` with ts before end_ts (all remaining if end_ts is None)."""
+    stop = position
+    while stop < len(events) and (end_ts is None or events[stop]["ts"] < end_ts):
+        stop += 1
+    return events[position:stop], stop
+
+
+def write_ground_truth(path: Path, labelled: Dict[str, Dict], benign_ranges: List[Tuple[str, int, int]],
+                       incidents: List[Dict], timeline: List[Dict]) -> None:
+    """
+    Write ground_truth.json (same layout as json.dump(..., indent=2))
+    without holding the per-event labels of benign traffic in memory.
+
+    Args:
+        path: Output file
+        labelled: Event id -> label info, written first
+        benign_ranges: (prefix, start, stop) for the benign ids
+            f"{prefix}{n:05d}", n in [start, stop), written after `labelled`
+        incidents: Ground truth incidents
+        timeline: Attack timeline
+    """
+    # Every benign entry is the same text after its id
+    benign_entry = f": {indented(BENIGN_LABEL, 2)}"
+    with open(path, "w") as f:
+        f.write('{\n  "events": {')
+        first = True
+        for eid, info in labelled.items():
+            f.write(("\n" if first else ",\n") + f"    {json.dumps(eid)}: {indented(info, 2)}")
+            first = False
+        for prefix, start, stop in benign_ranges:
+            line = ',\n    "' + prefix + '{:05d}"' + benign_entry.replace("{", "{{").replace("}", "}}")
+            for lo in range(start, stop, CHUNK_EVENTS):
+                block = "".join(map(line.format, range(lo, min(lo + CHUNK_EVENTS, stop))))
+                f.write(block[1:] if first else block)
+                first = False
+        f.write("}" if first else "\n  }")
+        f.write(f',\n  "incidents": {indented(incidents, 1)},\n  "attack_timeline": {indented(timeline, 1)}\n}}')
+
+
+def generate_scenario(scenario_dir: Optional[Path] = None, scale: Optional[ScenarioScale] = None,
+                      fmt: str = "json", compress: bool = False, seed: Optional[int] = None,
+                      workers: int = 1):
+    """
+    Generate the complete attack scenario.
+
+    Attack and false-positive traffic is generated up front; benign traffic
+    is generated window by window in time order and merged into the logs as
+    it is written, so memory use does not grow with the scenario size.
+    Windows are rendered in parallel from per-window seeds spawned from
+    `seed`, so the output does not depend on the number of workers.
+
+    Args:
+        scenario_dir: Output directory (default: SCENARIO_DIR)
+        scale: Benign traffic volume, duration and host count
+        fmt: "json" (JSON arrays), "jsonl" (one event per line), "tsv"
+            (Zeek ASCII logs), "parquet" or "arrow" (see log_io)
+        compress: gzip the jsonl or tsv logs
+        seed: Random seed, for a reproducible scenario
+        workers: Processes rendering benign traffic windows
+    """
+    scenario_dir = Path(scenario_dir) if scenario_dir else SCENARIO_DIR
+    scale = scale or ScenarioScale()
+    if seed is not None:
+        random.seed(seed)
+    topology = Topology.build(INTERNAL_HOSTS, scale.hosts, seed)
 
-def generate_scenario():
-    """Generate the complete attack scenario."""
     print("=" * 60)
     print("Generating Attack Scenario with Evasive Patterns")
     print("=" * 60)
+    print(f"Scale: {scale.total_events:,} benign events over {scale.days:g} days, {len(topology):,} hosts")
     
     # Initialize ground truth
     ground_truth = {
@@ -1090,45 +1405,10 @@ def generate_scenario():
             "evasive": False
         })
     
-    all_conn_events = []
-    all_dns_events = []
     event_idx = 0
     
-    # Generate benign traffic
-    print("Generating benign traffic...")
-    conn_count = int(TOTAL_BENIGN_EVENTS * 0.7)
-    dns_count = TOTAL_BENIGN_EVENTS - conn_count
-    
-    for i in range(conn_count):
-        timestamp = BASE_TIME + timedelta(
-            hours=random.uniform(0, 20),
-            minutes=random.randint(0, 59),
-            seconds=random.randint(0, 59)
-        )
-        event = generate_benign_conn_log(timestamp, event_idx)
-        all_conn_events.append(event)
-        ground_truth["events"][event["id"]] = {"label": "benign"}
-        event_idx += 1
-    
-    print(f"  Generated {conn_count} benign connection events")
-    
-    for i in range(dns_count):
-        timestamp = BASE_TIME + timedelta(
-            hours=random.uniform(0, 20),
-            minutes=random.randint(0, 59),
-            seconds=random.randint(0, 59)
-        )
-        event = generate_benign_dns_log(timestamp, event_idx)
-        all_dns_events.append(event)
-        ground_truth["events"][event["id"]] = {"label": "benign"}
-        event_idx += 1
-    
-    print(f"  Generated {dns_count} benign DNS events")
-    
     # Generate FALSE POSITIVE traffic
     fp_conn, fp_dns, event_idx = generate_false_positive_traffic(event_idx, ground_truth)
-    all_conn_events.extend(fp_conn)
-    all_dns_events.extend(fp_dns)
     
     # Generate attack traffic
     print("Generating attack traffic...")
@@ -1136,13 +1416,9 @@ def generate_scenario():
     # Detectable attacks
     print("Generating detectable attack traffic...")
     attack_conn, attack_dns, event_idx = generate_detectable_attacks(event_idx, ground_truth)
-    all_conn_events.extend(attack_conn)
-    all_dns_events.extend(attack_dns)
     
     # Evasive attacks
     evasive_conn, evasive_dns, event_idx = generate_evasive_attacks(event_idx, ground_truth)
-    all_conn_events.extend(evasive_conn)
-    all_dns_events.extend(evasive_dns)
     
     # Populate event_ids in attack_timeline for phases 1-5 based on event data
     print("Populating attack timeline event IDs...")
@@ -1163,8 +1439,8 @@ def generate_scenario():
     malicious_count = sum(1 for e in ground_truth["events"].values() if e.get("label") == "malicious")
     evasive_count = sum(1 for e in ground_truth["events"].values() if e.get("evasive", False))
     detectable_count = malicious_count - evasive_count
-    benign_count = sum(1 for e in ground_truth["events"].values() if e.get("label") == "benign")
     fp_count = sum(1 for e in ground_truth["events"].values() if e.get("false_positive_type"))
+    benign_count = fp_count + scale.total_events
     
     print(f"  Total malicious events: {malicious_count}")
     print(f"    - Detectable by rules: {detectable_count}")
@@ -1181,32 +1457,60 @@ def generate_scenario():
     
     print(f"  Evasion techniques: {len(evasion_techniques)}")
     
-    # Sort events by timestamp
-    all_conn_events.sort(key=lambda x: x["ts"])
-    all_dns_events.sort(key=lambda x: x["ts"])
+    # Each stage returned time-sorted runs; they are merged here, and into
+    # the benign stream window by window
+    labelled_conn = list(merge_sorted(fp_conn, attack_conn, evasive_conn))
+    labelled_dns = list(merge_sorted(fp_dns, attack_dns, evasive_dns))
     
     # Save files
-    print("Saving raw logs...")
-    SCENARIO_DIR.mkdir(parents=True, exist_ok=True)
-    (SCENARIO_DIR / "raw_logs").mkdir(exist_ok=True)
-    (SCENARIO_DIR / "rules_output").mkdir(exist_ok=True)
-    (SCENARIO_DIR / "loglm_output").mkdir(exist_ok=True)
-    
-    with open(SCENARIO_DIR / "raw_logs" / "zeek_conn.json", "w") as f:
-        json.dump(all_conn_events, f, indent=2)
-    
-    with open(SCENARIO_DIR / "raw_logs" / "zeek_dns.json", "w") as f:
-        json.dump(all_dns_events, f, indent=2)
-    
-    with open(SCENARIO_DIR / "ground_truth.json", "w") as f:
-        json.dump(ground_truth, f, indent=2)
+    raw_dir = scenario_dir / "raw_logs"
+    raw_dir.mkdir(parents=True, exist_ok=True)
+    (scenario_dir / "rules_output").mkdir(exist_ok=True)
+    (scenario_dir / "loglm_output").mkdir(exist_ok=True)
+    conn_path = raw_dir / log_filename("conn", fmt, compress)
+    dns_path = raw_dir / log_filename("dns", fmt, compress)
+    for path, log_type in ((conn_path, "conn"), (dns_path, "dns")):
+        # A log left over in another format would shadow the new one
+        stale = find_log(raw_dir, log_type)
+        while stale is not None and stale != path:
+            stale.unlink()
+            stale = find_log(raw_dir, log_type)
+    
+    windows = max(1, math.ceil(scale.total_events / CHUNK_EVENTS))
+    workers = max(1, min(workers, windows))
+    print(f"Generating benign traffic and writing logs ({fmt}{', gzip' if compress else ''}, "
+          f"{windows} windows, {workers} workers)...")
+    conn_start = event_idx
+    dns_start = conn_start + scale.conn_events
+    start = time.perf_counter()
+    with event_writer(conn_path) as conn_out, event_writer(dns_path) as dns_out:
+        tasks = benign_windows(scale, conn_start, dns_start, labelled_conn, labelled_dns,
+                               np.random.SeedSequence(seed), conn_path, dns_path)
+        for n, (conn_block, n_conn, dns_block, n_dns) in enumerate(render_windows(tasks, topology, workers), 1):
+            conn_out.write_block(conn_block, n_conn)
+            dns_out.write_block(dns_block, n_dns)
+            if n % 20 == 0:
+                written = conn_out.count + dns_out.count
+                elapsed = time.perf_counter() - start
+                print(f"  {written:,} events written ({written / max(elapsed, 1e-9):,.0f} events/s)")
+        total_events = conn_out.count + dns_out.count
+    print(f"  Generated {scale.conn_events} benign connection events")
+    print(f"  Generated {scale.dns_events} benign DNS events")
+    
+    benign_ranges = [("conn_", conn_start, conn_start + scale.conn_events),
+                     ("dns_", dns_start, dns_start + scale.dns_events)]
+    write_ground_truth(scenario_dir / "ground_truth.json", ground_truth["events"], benign_ranges,
+                       ground_truth["incidents"], ground_truth["attack_timeline"])
+    # Columnar copy for the pipelines, so they never parse ground_truth.json
+    write_columns(scenario_dir, ground_truth["events"], benign_ranges,
+                  ground_truth["incidents"], ground_truth["attack_timeline"])
     
     # Create manifest
     manifest = {
         "name": "Multi-Stage Attack with Evasive Patterns",
         "description": "APT-style attack with both detectable and signature-evading components, plus realistic false positive traffic",
-        "duration_hours": 20,
-        "total_events": len(all_conn_events) + len(all_dns_events),
+        "duration_hours": round(scale.duration_seconds / 3600, 2),
+        "total_events": total_events,
         "malicious_events": malicious_count,
         "detectable_events": detectable_count,
         "evasive_events": evasive_count,
@@ -1215,16 +1519,20 @@ def generate_scenario():
         "evasion_techniques": list(evasion_techniques),
         "attack_phases": 8,
         "log_types": ["zeek_conn", "zeek_dns"],
+        "log_files": [conn_path.name, dns_path.name],
+        "scale": scale.to_dict(),
+        "topology": topology.summary(),
+        "seed": seed,
         "generated_at": datetime.now().isoformat()
     }
     
-    with open(SCENARIO_DIR / "manifest.json", "w") as f:
+    with open(scenario_dir / "manifest.json", "w") as f:
         json.dump(manifest, f, indent=2)
     
     print("=" * 60)
     print("Scenario Generation Complete!")
     print("=" * 60)
-    print(f"Files saved to: {SCENARIO_DIR}")
+    print(f"Files saved to: {scenario_dir}")
     print("Next steps:")
     print("  1. python scripts/rules_detection.py")
     print("  2. python scripts/loglm_detection.py")
@@ -1232,5 +1540,25 @@ def generate_scenario():
     print("  4. streamlit run streamlit_app/tale_of_two_socs.py")
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Generate an attack scenario with ground truth")
+    parser.add_argument("--scenario-dir", type=Path, default=None, help="Output directory (default: default_attack)")
+    parser.add_argument("--events-per-day", type=float, default=DEFAULT_EVENTS_PER_DAY, help="Benign events per day")
+    parser.add_argument("--days", type=float, default=DEFAULT_DAYS, help="Scenario duration in days")
+    parser.add_argument("--hosts", type=int, default=len(INTERNAL_HOSTS),
+                        help="Internal hosts (beyond the named hosts: an enterprise topology, see topology.py)")
+    parser.add_argument("--format", choices=list(FORMAT_SUFFIXES), default="json",
+                        help="Raw log format (tsv = native Zeek logs; parquet and arrow need pyarrow)")
+    parser.add_argument("--compress", action="store_true", help="gzip the jsonl or tsv logs")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--workers", type=int, default=None, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+    if args.compress and args.format not in COMPRESSIBLE:
+        parser.error(f"--compress requires --format {' or '.join(COMPRESSIBLE)}")
+    generate_scenario(args.scenario_dir, ScenarioScale(args.events_per_day, args.days, args.hosts),
+                      fmt=args.format, compress=args.compress, seed=args.seed,
+                      workers=args.workers or os.cpu_count())
+
+
 if __name__ == "__main__":
-    generate_scenario()
+    main()
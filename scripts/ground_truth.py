@@ -0,0 +1,477 @@
+#!/usr/bin/env python3
+"""
+Columnar Ground Truth
+
+ground_truth.json holds one object per event, almost all of them
+{"label": "benign"}. This module keeps the same labels as columns that
+can be memory-mapped instead of parsed:
+- `ids.npy`: sorted event ids (fixed-width bytes)
+- `label.npy`, `evasive.npy`, `phase.npy`, `technique.npy`: small-int
+  arrays per event; labels and techniques are dictionary-encoded
+- `slots.npy`: open-addressing hash table (FNV-1a) of rows, so a single
+  event lookup is O(1)
+- `meta.json`: the label and technique dictionaries, incidents, attack
+  timeline, and the full metadata of the few events that carry more than
+  a label (malicious events and false-positive triggers), in file order
+
+A generator that knows its benign ids are numbered ranges can write the
+columns directly with write_columns, in blocks and already sorted, so
+the benign rows never exist in memory at once.
+
+The columns live in `ground_truth/` next to ground_truth.json and are
+rebuilt only when the content of ground_truth.json changes (its size and
+SHA-256 are recorded in meta.json).
+"""
+
+import hashlib
+import json
+import os
+from pathlib import Path
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+GROUND_TRUTH_FILE = "ground_truth.json"
+COLUMNS_DIRNAME = "ground_truth"
+META_FILE = "meta.json"
+COLUMNS = ("ids", "label", "evasive", "phase", "technique", "slots")
+
+# Label codes are stable for the two labels the pipelines use
+LABELS = ["benign", "malicious"]
+
+# Label of ids that appear in the attack timeline but not in the events
+UNLABELLED = ""
+
+# Events encoded per batch while building from a stream of entries
+BUILD_BATCH = 1000000
+
+# Digits of the zero-padded number in range ids (f"{prefix}{n:05d}")
+ID_DIGITS = 5
+
+# Range ids generated per block by write_columns (roughly)
+WRITE_BATCH = 1000000
+
+# Hash table size relative to the number of events (at least)
+SLOT_LOAD = 1.5
+
+# Bytes read at a time while hashing ground_truth.json
+DIGEST_CHUNK = 1 << 20
+
+FNV_OFFSET = 0xcbf29ce484222325
+FNV_PRIME = 0x100000001b3
+MASK64 = (1 << 64) - 1
+
+
+def _hash_ids(ids: np.ndarray) -> np.ndarray:
+    """FNV-1a of each id in a fixed-width bytes array (padding NULs are skipped)."""
+    chars = ids.view(np.uint8).reshape(len(ids), ids.dtype.itemsize)
+    hashes = np.full(len(ids), FNV_OFFSET, dtype=np.uint64)
+    for column in range(chars.shape[1]):
+        char = chars[:, column].astype(np.uint64)
+        hashes = np.where(char != 0, (hashes ^ char) * np.uint64(FNV_PRIME), hashes)
+    return hashes
+
+
+def _hash_id(key: bytes) -> int:
+    value = FNV_OFFSET
+    for char in key:
+        value = ((value ^ char) * FNV_PRIME) & MASK64
+    return value
+
+
+def _slot_table(n: int) -> Tuple[int, type]:
+    """Size and row dtype of the hash table for n events."""
+    size = 1 << max(1, int(np.ceil(np.log2(max(1, n) * SLOT_LOAD))))
+    return size, (np.int32 if n < np.iinfo(np.int32).max else np.int64)
+
+
+def _insert_slots(slots: np.ndarray, ids: np.ndarray, rows: np.ndarray) -> None:
+    """Insert rows into a linear-probing hash table keyed by the FNV-1a of their ids."""
+    mask = len(slots) - 1
+    position = (_hash_ids(ids) & np.uint64(mask)).astype(np.int64)
+    pending = np.arange(len(ids))
+    while len(pending):
+        # Each free slot goes to its first claimant; the rest probe onwards
+        free = np.flatnonzero(slots[position[pending]] == -1)
+        taken, first = np.unique(position[pending[free]], return_index=True)
+        slots[taken] = rows[pending[free[first]]]
+        placed = np.zeros(len(pending), dtype=bool)
+        placed[free[first]] = True
+        pending = pending[~placed]
+        position[pending] = (position[pending] + 1) & mask
+
+
+def _build_slots(ids: np.ndarray) -> np.ndarray:
+    """Linear-probing hash table mapping FNV-1a slots to rows (-1 = empty)."""
+    size, dtype = _slot_table(len(ids))
+    slots = np.full(size, -1, dtype=dtype)
+    _insert_slots(slots, ids, np.arange(len(ids)))
+    return slots
+
+
+def _encode(entries: List[Tuple[str, Dict]], labels: List[str], techniques: List[str],
+            details: Dict[str, Dict]) -> Tuple[np.ndarray, ...]:
+    """
+    Column arrays (ids, label, evasive, phase, technique) for a batch of
+    entries; new labels and techniques are appended to the dictionaries and
+    entries with more than a label are kept in `details`.
+    """
+    label, evasive, phase, technique = [], [], [], []
+    for eid, info in entries:
+        if info["label"] not in labels:
+            labels.append(info["label"])
+        label.append(labels.index(info["label"]))
+        evasive.append(bool(info.get("evasive", False)))
+        phase.append(info.get("attack_phase") or 0)
+        name = info.get("technique")
+        if name and name not in techniques:
+            techniques.append(name)
+        technique.append(techniques.index(name) if name else -1)
+        if len(info) > 1:
+            details[eid] = {k: v for k, v in info.items() if k != "label"}
+    return (np.array([eid for eid, _ in entries], dtype=bytes) if entries else np.zeros(0, dtype="S1"),
+            np.array(label, dtype=np.int8), np.array(evasive, dtype=bool), np.array(phase, dtype=np.int8),
+            np.array(technique, dtype=np.int16))
+
+
+def _unlabelled(ids: np.ndarray, timeline: List[Dict], labels: List[str]) -> Tuple[np.ndarray, ...]:
+    """Columns for timeline event ids missing from ids (labelled UNLABELLED)."""
+    listed = np.array([eid for p in timeline for eid in p.get("event_ids", [])], dtype=bytes)
+    missing = np.setdiff1d(listed, ids) if len(listed) else np.zeros(0, dtype="S1")
+    if len(missing) and UNLABELLED not in labels:
+        labels.append(UNLABELLED)
+    return (missing, np.full(len(missing), labels.index(UNLABELLED) if len(missing) else 0, dtype=np.int8),
+            np.zeros(len(missing), dtype=bool), np.zeros(len(missing), dtype=np.int8),
+            np.full(len(missing), -1, dtype=np.int16))
+
+
+def _range_ids(prefix: str, start: int, stop: int, width: int) -> Iterator[np.ndarray]:
+    """
+    Ids f"{prefix}{n:05d}" for n in [start, stop), in byte order, as blocks
+    of fixed-width bytes.
+
+    Byte order is not numeric order once ids get wider than ID_DIGITS
+    ("conn_100000" sorts before "conn_10001"), so blocks are cut on the
+    first ID_DIGITS digits and each block is ordered by its ids right-padded
+    with zeros, shorter ids first on ties.
+    """
+    if stop <= start:
+        return
+    widest = max(ID_DIGITS, len(str(stop - 1)))
+    step = max(1, WRITE_BATCH // 10 ** (widest - ID_DIGITS))
+    head = np.frombuffer(prefix.encode(), dtype=np.uint8)
+    for lead in range(0, 10 ** ID_DIGITS, step):
+        numbers, digits = [], []
+        for n_digits in range(ID_DIGITS, widest + 1):
+            scale = 10 ** (n_digits - ID_DIGITS)
+            lo = max(start, lead * scale, 10 ** (n_digits - 1) if n_digits > ID_DIGITS else 0)
+            hi = min(stop, (lead + step) * scale, 10 ** n_digits)
+            if lo < hi:
+                numbers.append(np.arange(lo, hi, dtype=np.int64))
+                digits.append(np.full(hi - lo, n_digits, dtype=np.int64))
+        if not numbers:
+            continue
+        numbers, digits = np.concatenate(numbers), np.concatenate(digits)
+        order = np.argsort(numbers * 10 ** (widest - digits) * (widest + 1) + digits, kind="stable")
+        numbers, digits = numbers[order], digits[order]
+        chars = np.zeros((len(numbers), width), dtype=np.uint8)
+        chars[:, :len(head)] = head
+        for position in range(widest):
+            present = digits > position
+            power = 10 ** np.where(present, digits - 1 - position, 0)
+            chars[:, len(head) + position] = np.where(present, numbers // power % 10 + ord("0"), 0)
+        yield chars.view(f"S{width}").ravel()
+
+
+class GroundTruth:
+    """Ground truth labels as columns over sorted event ids."""
+
+    def __init__(self, columns: Dict[str, np.ndarray], meta: Dict):
+        self.ids = columns["ids"]
+        self.label = columns["label"]
+        self.evasive = columns["evasive"]
+        self.phase = columns["phase"]
+        self.technique = columns["technique"]
+        self.slots = columns["slots"]
+        self.labels: List[str] = meta["labels"]
+        self.techniques: List[str] = meta["techniques"]
+        self.details: Dict[str, Dict] = meta["details"]
+        self.incidents: List[Dict] = meta["incidents"]
+        self.attack_timeline: List[Dict] = meta["attack_timeline"]
+
+    @classmethod
+    def build(cls, entries: Iterable[Tuple[str, Dict]], incidents: List[Dict],
+              timeline: List[Dict]) -> "GroundTruth":
+        """
+        Encode (event id, label info) pairs, e.g. ground_truth["events"].items().
+
+        Entries are consumed in batches, so a stream of benign labels never
+        exists as Python objects all at once.
+        """
+        labels = list(LABELS)
+        techniques: List[str] = []
+        details: Dict[str, Dict] = {}
+        batches = []
+        entries = iter(entries)
+        while True:
+            batch = []
+            for eid, info in entries:
+                batch.append((eid, info))
+                if len(batch) == BUILD_BATCH:
+                    break
+            if not batch:
+                break
+            batches.append(_encode(batch, labels, techniques, details))
+
+        ids, label, evasive, phase, technique = (
+            [np.concatenate(column) for column in zip(*batches)] if batches else _encode([], labels, techniques, details)
+        )
+        # Timeline events are indexed too, even if the events omit them
+        ids, label, evasive, phase, technique = [
+            np.concatenate(pair) for pair in zip((ids, label, evasive, phase, technique),
+                                                 _unlabelled(ids, timeline, labels))]
+
+        order = np.argsort(ids, kind="stable")
+        ids = ids[order]
+        columns = {"ids": ids, "label": label[order], "evasive": evasive[order], "phase": phase[order],
+                   "technique": technique[order], "slots": _build_slots(ids)}
+        meta = {"labels": labels, "techniques": techniques, "details": details,
+                "incidents": incidents, "attack_timeline": timeline}
+        return cls(columns, meta)
+
+    @classmethod
+    def from_dict(cls, ground_truth: Dict) -> "GroundTruth":
+        """Encode a parsed ground_truth.json."""
+        return cls.build(ground_truth["events"].items(), ground_truth.get("incidents", []),
+                         ground_truth.get("attack_timeline", []))
+
+    @classmethod
+    def open(cls, directory: Path, mmap: bool = True) -> "GroundTruth":
+        """Open saved columns, memory-mapped unless mmap is False."""
+        directory = Path(directory)
+        columns = {name: np.load(directory / f"{name}.npy", mmap_mode="r" if mmap else None) for name in COLUMNS}
+        with open(directory / META_FILE) as f:
+            meta = json.load(f)
+        return cls(columns, meta)
+
+    def save(self, directory: Path, source: Optional[Dict] = None) -> None:
+        """
+        Write the columns to directory.
+
+        Args:
+            directory: Target directory (created if missing)
+            source: Signature of the ground_truth.json the columns encode,
+                used for staleness checks
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        for name in COLUMNS:
+            tmp = directory / f"{name}.tmp.npy"
+            np.save(tmp, np.asarray(getattr(self, name)))
+            os.replace(tmp, directory / f"{name}.npy")
+        meta = {"labels": self.labels, "techniques": self.techniques, "source": source,
+                "details": self.details, "incidents": self.incidents, "attack_timeline": self.attack_timeline}
+        tmp = directory / (META_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, directory / META_FILE)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def __contains__(self, event_id: str) -> bool:
+        return self.row(event_id) is not None
+
+    def row(self, event_id: str) -> Optional[int]:
+        """Row of an event id, by hash table probe (None if unknown)."""
+        key = event_id.encode()
+        mask = len(self.slots) - 1
+        position = _hash_id(key) & mask
+        while True:
+            row = int(self.slots[position])
+            if row < 0:
+                return None
+            if self.ids[row] == key:
+                return row
+            position = (position + 1) & mask
+
+    def rows(self, event_ids) -> np.ndarray:
+        """Rows of many event ids at once (-1 for unknown ids)."""
+        keys = np.asarray(event_ids, dtype=bytes)
+        if len(self.ids) == 0 or len(keys) == 0:
+            return np.full(len(keys), -1, dtype=np.int64)
+        rows = np.minimum(np.searchsorted(self.ids, keys), len(self.ids) - 1)
+        return np.where(self.ids[rows] == keys, rows, -1).astype(np.int64)
+
+    def label_code(self, label: str) -> int:
+        return self.labels.index(label) if label in self.labels else -1
+
+    def label_mask(self, label: str) -> np.ndarray:
+        """Boolean mask of events with the given label."""
+        return np.asarray(self.label) == self.label_code(label)
+
+    def technique_names(self) -> np.ndarray:
+        """Technique id per event ("" if none)."""
+        names = np.array(self.techniques + [""], dtype=object)
+        return names[np.asarray(self.technique)]
+
+    def ids_where(self, mask: np.ndarray) -> List[str]:
+        return [eid.decode() for eid in self.ids[mask].tolist()]
+
+    def label_of(self, event_id: str) -> Optional[str]:
+        row = self.row(event_id)
+        return self.labels[self.label[row]] if row is not None else None
+
+    def get(self, event_id: str) -> Optional[Dict]:
+        """An event's entry as it appears in ground_truth.json."""
+        label = self.label_of(event_id)
+        if label is None:
+            return None
+        return {"label": label, **self.details.get(event_id, {})}
+
+    def events_with_details(self, label: Optional[str] = None) -> Iterator[Tuple[str, Dict]]:
+        """(event id, entry) of events carrying more than a label, in file order."""
+        for eid, info in self.details.items():
+            entry = {"label": self.label_of(eid), **info}
+            if label is None or entry["label"] == label:
+                yield eid, entry
+
+
+def as_ground_truth(ground_truth) -> GroundTruth:
+    """A GroundTruth from either a GroundTruth or a parsed ground_truth.json."""
+    return ground_truth if isinstance(ground_truth, GroundTruth) else GroundTruth.from_dict(ground_truth)
+
+
+def columns_dir(scenario_dir: Path) -> Path:
+    return Path(scenario_dir) / COLUMNS_DIRNAME
+
+
+def file_digest(path: Path) -> str:
+    """SHA-256 of a file's content."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(DIGEST_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _source_signature(scenario_dir: Path) -> Optional[Dict]:
+    path = Path(scenario_dir) / GROUND_TRUTH_FILE
+    if not path.exists():
+        return None
+    return {"size": path.stat().st_size, "sha256": file_digest(path)}
+
+
+def is_current(scenario_dir: Path) -> bool:
+    """True if the scenario's columns match the content of its ground_truth.json."""
+    meta_file = columns_dir(scenario_dir) / META_FILE
+    if not meta_file.exists():
+        return False
+    path = Path(scenario_dir) / GROUND_TRUTH_FILE
+    if not path.exists():
+        # Columns without the JSON they came from are all there is
+        return True
+    with open(meta_file) as f:
+        source = json.load(f).get("source") or {}
+    # The size check spares hashing a file that has clearly changed
+    return source.get("size") == path.stat().st_size and source.get("sha256") == file_digest(path)
+
+
+def save_ground_truth(scenario_dir: Path, ground_truth: GroundTruth) -> None:
+    """Save columns for the scenario's (already written) ground_truth.json."""
+    ground_truth.save(columns_dir(scenario_dir), source=_source_signature(scenario_dir))
+
+
+def write_columns(scenario_dir: Path, labelled: Dict[str, Dict], benign_ranges: List[Tuple[str, int, int]],
+                  incidents: List[Dict], timeline: List[Dict]) -> None:
+    """
+    Save columns for the scenario's (already written) ground_truth.json
+    from its labelled events plus numbered ranges of benign ids, in memory
+    that does not grow with the ranges.
+
+    Range ids come out of _range_ids already sorted, the few labelled ids
+    are merged into each block, and every block goes straight into
+    memory-mapped .npy files and the hash table.
+
+    Args:
+        scenario_dir: Scenario directory
+        labelled: Event id -> label info for every event not in a range
+        benign_ranges: (prefix, start, stop) for the benign ids
+            f"{prefix}{n:05d}", n in [start, stop); ranges of different
+            prefixes must not interleave in byte order
+        incidents: Ground truth incidents
+        timeline: Attack timeline
+    """
+    labels, techniques, details = list(LABELS), [], {}
+    encoded = _encode(list(labelled.items()), labels, techniques, details)
+    encoded = [np.concatenate(pair) for pair in zip(encoded, _unlabelled(encoded[0], timeline, labels))]
+    order = np.argsort(encoded[0], kind="stable")
+    ids, label, evasive, phase, technique = [column[order] for column in encoded]
+
+    benign_ranges = sorted((prefix, start, stop) for prefix, start, stop in benign_ranges if stop > start)
+    n_rows = len(ids) + sum(stop - start for _, start, stop in benign_ranges)
+    width = max([ids.dtype.itemsize] + [len(prefix.encode()) + max(ID_DIGITS, len(str(stop - 1)))
+                                        for prefix, _, stop in benign_ranges])
+    size, slot_dtype = _slot_table(n_rows)
+
+    directory = columns_dir(scenario_dir)
+    directory.mkdir(parents=True, exist_ok=True)
+    dtypes = {"ids": f"S{width}", "label": np.int8, "evasive": bool, "phase": np.int8, "technique": np.int16}
+    out = {name: np.lib.format.open_memmap(directory / f"{name}.tmp.npy", mode="w+", dtype=dtype, shape=(n_rows,))
+           for name, dtype in dtypes.items()}
+    out["slots"] = np.lib.format.open_memmap(directory / "slots.tmp.npy", mode="w+", dtype=slot_dtype, shape=(size,))
+    out["slots"][:] = -1
+
+    row, merged = 0, 0
+
+    def emit(block: np.ndarray, upto: int) -> None:
+        # The block's range ids, with labelled ids merged[:upto] slotted in by position
+        nonlocal row, merged
+        extra = np.arange(merged, upto)
+        at = np.searchsorted(block, ids[extra]) + np.arange(len(extra))
+        n = len(block) + len(extra)
+        is_labelled = np.zeros(n, dtype=bool)
+        is_labelled[at] = True
+        chunk = {"ids": np.empty(n, dtype=f"S{width}"), "label": np.full(n, LABELS.index("benign"), dtype=np.int8),
+                 "evasive": np.zeros(n, dtype=bool), "phase": np.zeros(n, dtype=np.int8),
+                 "technique": np.full(n, -1, dtype=np.int16)}
+        chunk["ids"][~is_labelled] = block
+        for name, column in zip(chunk, (ids, label, evasive, phase, technique)):
+            chunk[name][at] = column[extra]
+            out[name][row:row + n] = chunk[name]
+        _insert_slots(out["slots"], chunk["ids"], np.arange(row, row + n))
+        row, merged = row + n, upto
+
+    for prefix, start, stop in benign_ranges:
+        for block in _range_ids(prefix, start, stop, width):
+            emit(block, int(np.searchsorted(ids, block[-1], side="right")))
+    emit(np.zeros(0, dtype=f"S{width}"), len(ids))
+
+    for column in out.values():
+        column.flush()
+    out.clear()
+    for name in COLUMNS:
+        os.replace(directory / f"{name}.tmp.npy", directory / f"{name}.npy")
+    meta = {"labels": labels, "techniques": techniques, "source": _source_signature(scenario_dir),
+            "details": details, "incidents": incidents, "attack_timeline": timeline}
+    tmp = directory / (META_FILE + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(meta, f)
+    os.replace(tmp, directory / META_FILE)
+
+
+def load_ground_truth(scenario_dir: Path) -> GroundTruth:
+    """
+    Open the scenario's ground truth columns, (re)building them from
+    ground_truth.json if it changed since they were written.
+
+    Raises:
+        FileNotFoundError: The scenario has neither columns nor ground_truth.json
+    """
+    if is_current(scenario_dir):
+        return GroundTruth.open(columns_dir(scenario_dir))
+    path = Path(scenario_dir) / GROUND_TRUTH_FILE
+    with open(path) as f:
+        ground_truth = GroundTruth.from_dict(json.load(f))
+    save_ground_truth(scenario_dir, ground_truth)
+    return GroundTruth.open(columns_dir(scenario_dir))
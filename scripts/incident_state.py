@@ -0,0 +1,296 @@
+#!/usr/bin/env python3
+"""
+Incident State
+
+Keeps each incident as running aggregates so findings can be added to or
+removed from a large, constantly updated incident without rescanning it:
+- Embedding sum and count, so the centroid is sum / count
+- Per-host, per-technique, per-phase and per-severity counts; an entity
+  stays on the incident while any member finding references it
+- First/last timestamps in heaps of distinct timestamps, pruned lazily
+  and rebuilt once stale entries outnumber live ones
+
+CentroidIndex keeps one unit-normalized centroid row per incident and
+answers "similar incident" queries with a single matrix-vector product.
+
+Adding or removing a finding costs O(d) for the embedding plus amortized
+O(log n) for the timestamps.
+"""
+
+import heapq
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+SEVERITY_LEVELS = ["low", "medium", "high", "critical"]
+
+INDEX_FILE = "incident_index.npz"
+
+
+def finding_hosts(finding: Dict) -> List[str]:
+    """Hosts a finding implicates: every host on a lateral path, otherwise its hostname."""
+    if finding.get("lateral_path"):
+        return list(finding["lateral_path"]["hostnames"])
+    return [finding["hostname"]] if finding.get("hostname") else []
+
+
+def target_hosts(finding: Dict) -> List[str]:
+    """Destination of the finding, for incidents about attacks against a host."""
+    return [finding["dest_ip"]] if finding.get("dest_ip") else []
+
+
+def finding_techniques(finding: Dict) -> List[str]:
+    return [p["technique_id"] for p in finding.get("mitre_predictions", [])]
+
+
+class _Latest(str):
+    """String with reversed ordering, so heapq keeps the latest timestamp on top."""
+
+    def __lt__(self, other):
+        return str.__gt__(self, other)
+
+
+class IncidentAggregate:
+    """Running aggregate of one incident's member findings."""
+
+    def __init__(self, incident_id: str, dim: int,
+                 hosts: Callable[[Dict], List[str]] = finding_hosts,
+                 min_severity: Optional[str] = None):
+        """
+        Args:
+            incident_id: Incident ID
+            dim: Embedding dimension
+            hosts: Extracts the hosts a member finding contributes
+            min_severity: Floor for the incident severity
+        """
+        self.id = incident_id
+        self.hosts_of = hosts
+        self.min_level = SEVERITY_LEVELS.index(min_severity) if min_severity else 0
+        self.embedding_sum = np.zeros(dim, dtype=np.float64)
+        # finding id -> (embedding, hosts, techniques, severity level, phase, evasive, evasion technique, timestamp)
+        self.members: Dict[str, Tuple] = {}
+        self.host_counts: Counter = Counter()
+        self.technique_counts: Counter = Counter()
+        self.phase_counts: Counter = Counter()
+        self.evasion_counts: Counter = Counter()
+        self.timestamp_counts: Counter = Counter()
+        self.severity_counts = np.zeros(len(SEVERITY_LEVELS), dtype=np.int64)
+        self.evasive_count = 0
+        self._earliest: List[str] = []
+        self._latest: List[_Latest] = []
+
+    def __len__(self) -> int:
+        return len(self.members)
+
+    def __contains__(self, finding_id: str) -> bool:
+        return finding_id in self.members
+
+    def add(self, finding: Dict) -> None:
+        """Add a finding; adding a member again has no effect."""
+        if finding["id"] in self.members:
+            return
+        embedding = np.asarray(finding["embedding"], dtype=np.float32)
+        severity = SEVERITY_LEVELS.index(finding.get("severity", "low"))
+        record = (
+            embedding,
+            tuple(self.hosts_of(finding)),
+            tuple(finding_techniques(finding)),
+            severity,
+            finding.get("attack_phase"),
+            bool(finding.get("evasive")),
+            finding.get("evasion_technique") if finding.get("evasive") else None,
+            finding["timestamp"],
+        )
+        self.members[finding["id"]] = record
+        self._apply(record, 1)
+        # Each live timestamp has one heap entry, pushed when it first appears
+        if self.timestamp_counts[finding["timestamp"]] == 1:
+            heapq.heappush(self._earliest, finding["timestamp"])
+            heapq.heappush(self._latest, _Latest(finding["timestamp"]))
+
+    def remove(self, finding_id: str) -> None:
+        """
+        Remove a member finding.
+
+        Raises:
+            KeyError: The finding is not a member
+        """
+        self._apply(self.members.pop(finding_id), -1)
+        # Stale entries only leave a heap from its top; rebuild before they dominate
+        live = len(self.timestamp_counts)
+        if len(self._earliest) > 2 * live + 16:
+            self._earliest = list(self.timestamp_counts)
+            heapq.heapify(self._earliest)
+        if len(self._latest) > 2 * live + 16:
+            self._latest = [_Latest(ts) for ts in self.timestamp_counts]
+            heapq.heapify(self._latest)
+
+    def _apply(self, record: Tuple, sign: int) -> None:
+        embedding, hosts, techniques, severity, phase, evasive, evasion, timestamp = record
+        self.embedding_sum += sign * embedding
+        for counter, keys in ((self.host_counts, hosts), (self.technique_counts, techniques),
+                              (self.phase_counts, (phase,) if phase else ()),
+                              (self.evasion_counts, (evasion,) if evasion else ()),
+                              (self.timestamp_counts, (timestamp,))):
+            for key in keys:
+                counter[key] += sign
+                if counter[key] <= 0:
+                    del counter[key]
+        self.severity_counts[severity] += sign
+        self.evasive_count += sign if evasive else 0
+
+    def _peek(self, heap: List[str]) -> Optional[str]:
+        # Drop timestamps whose findings have since been removed
+        while heap and heap[0] not in self.timestamp_counts:
+            heapq.heappop(heap)
+        return str(heap[0]) if heap else None
+
+    @property
+    def centroid(self) -> np.ndarray:
+        if not self.members:
+            return np.zeros_like(self.embedding_sum)
+        return self.embedding_sum / len(self.members)
+
+    @property
+    def severity(self) -> str:
+        present = np.flatnonzero(self.severity_counts)
+        highest = int(present[-1]) if len(present) else 0
+        return SEVERITY_LEVELS[max(highest, self.min_level)]
+
+    @property
+    def evasion_techniques(self) -> List[str]:
+        return sorted(self.evasion_counts)
+
+    def fields(self) -> Dict:
+        """Incident fields derived from the aggregate."""
+        return {
+            "severity": self.severity,
+            "created_at": self._peek(self._earliest),
+            "updated_at": self._peek(self._latest),
+            "finding_ids": list(self.members),
+            "finding_count": len(self.members),
+            "techniques": sorted(self.technique_counts),
+            "phases_detected": sorted(self.phase_counts),
+            "affected_hosts": sorted(self.host_counts),
+            "embedding": self.centroid.tolist(),
+            "evasive_findings": self.evasive_count,
+        }
+
+
+class CentroidIndex:
+    """One unit-normalized centroid per incident, searched by cosine similarity."""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self.matrix = np.zeros((0, dim), dtype=np.float32)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def update(self, incident_id: str, centroid: np.ndarray) -> None:
+        """Insert or replace an incident's centroid."""
+        row = self.rows.get(incident_id)
+        if row is None:
+            row = len(self.ids)
+            if row == len(self.matrix):
+                grown = np.zeros((max(8, 2 * row), self.dim), dtype=np.float32)
+                grown[:row] = self.matrix
+                self.matrix = grown
+            self.ids.append(incident_id)
+            self.rows[incident_id] = row
+        norm = np.linalg.norm(centroid)
+        self.matrix[row] = centroid / norm if norm > 0 else 0.0
+
+    def remove(self, incident_id: str) -> None:
+        """Drop an incident, moving the last row into its place."""
+        row = self.rows.pop(incident_id)
+        last = len(self.ids) - 1
+        if row != last:
+            self.matrix[row] = self.matrix[last]
+            self.ids[row] = self.ids[last]
+            self.rows[self.ids[row]] = row
+        self.ids.pop()
+
+    def vector(self, incident_id: str) -> Optional[np.ndarray]:
+        row = self.rows.get(incident_id)
+        return None if row is None else self.matrix[row]
+
+    def search(self, query: Sequence[float], k: int = 5, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        """Top-k incidents by cosine similarity to query, most similar first."""
+        n = len(self.ids)
+        if n == 0:
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        scores = self.matrix[:n] @ (query / norm if norm > 0 else query)
+        if exclude in self.rows:
+            scores[self.rows[exclude]] = -np.inf
+        top = np.argsort(-scores, kind="stable")[:k]
+        return [(self.ids[i], float(scores[i])) for i in top if np.isfinite(scores[i])]
+
+    @classmethod
+    def from_incidents(cls, incidents: List[Dict]) -> "CentroidIndex":
+        """Build from incidents carrying an "embedding" centroid."""
+        with_embedding = [inc for inc in incidents if inc.get("embedding")]
+        dim = len(with_embedding[0]["embedding"]) if with_embedding else 0
+        index = cls(dim)
+        for inc in with_embedding:
+            index.update(inc["id"], np.asarray(inc["embedding"], dtype=np.float32))
+        return index
+
+    def save(self, directory: Path) -> None:
+        np.savez(Path(directory) / INDEX_FILE, ids=np.array(self.ids, dtype=str), matrix=self.matrix[:len(self.ids)])
+
+    @classmethod
+    def load(cls, directory: Path) -> Optional["CentroidIndex"]:
+        path = Path(directory) / INDEX_FILE
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            index = cls(data["matrix"].shape[1])
+            index.ids = data["ids"].tolist()
+            index.matrix = data["matrix"].copy()
+        index.rows = {incident_id: row for row, incident_id in enumerate(index.ids)}
+        return index
+
+
+class IncidentState:
+    """Incident aggregates plus the centroid index kept in step with them."""
+
+    def __init__(self, dim: int):
+        self.dim = dim
+        self.incidents: Dict[str, IncidentAggregate] = {}
+        self.index = CentroidIndex(dim)
+
+    def create(self, incident_id: str, **options) -> IncidentAggregate:
+        """Start an empty incident; options are passed to IncidentAggregate."""
+        aggregate = IncidentAggregate(incident_id, self.dim, **options)
+        self.incidents[incident_id] = aggregate
+        return aggregate
+
+    def add_finding(self, incident_id: str, finding: Dict) -> None:
+        aggregate = self.incidents[incident_id]
+        aggregate.add(finding)
+        self.index.update(incident_id, aggregate.centroid)
+
+    def add_findings(self, incident_id: str, findings: List[Dict]) -> None:
+        aggregate = self.incidents[incident_id]
+        for finding in findings:
+            aggregate.add(finding)
+        self.index.update(incident_id, aggregate.centroid)
+
+    def remove_finding(self, incident_id: str, finding_id: str) -> None:
+        """Remove a finding; an incident left empty is dropped from the index."""
+        aggregate = self.incidents[incident_id]
+        aggregate.remove(finding_id)
+        if len(aggregate):
+            self.index.update(incident_id, aggregate.centroid)
+        elif incident_id in self.index.rows:
+            self.index.remove(incident_id)
+
+    def similar(self, query: Sequence[float], k: int = 5, exclude: Optional[str] = None) -> List[Tuple[str, float]]:
+        return self.index.search(query, k=k, exclude=exclude)
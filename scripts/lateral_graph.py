@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+Lateral Movement Graph
+
+Builds the internal host-to-host connection graph and looks at it as a
+whole instead of one connection at a time:
+- Edges are internal connections on remote-administration services,
+  stored as CSR arrays (per-source offsets into time-sorted edge columns)
+- New edges: the first time a (source, destination, service) triple is seen
+- Fan-out bursts: a source opening new edges to several distinct hosts
+  within a time window
+- Time-respecting paths: chains A -> B -> C where each hop starts after the
+  previous one and within the window, following only new edges
+
+Every step is a sort, a bincount or a batched searchsorted, so building the
+graph and running the queries stays near-linear in the number of edges.
+
+    python scripts/lateral_graph.py
+"""
+
+import argparse
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+
+try:
+    from scripts.log_io import load_log
+except ImportError:
+    from log_io import load_log
+
+SCENARIO_DIR = Path(__file__).parent.parent / "data" / "scenarios" / "default_attack"
+
+# Services used to move between hosts
+LATERAL_PORTS = {
+    22: "ssh",
+    135: "wmi",
+    445: "smb",
+    3389: "rdp",
+    5985: "winrm",
+    5986: "winrm",
+}
+
+# Time window for bursts and for consecutive hops of a path
+WINDOW_SECONDS = 30 * 60
+
+# Distinct hosts one source newly reaches within a window that count as a burst
+FANOUT_THRESHOLD = 5
+
+# Longest path followed, in hops
+MAX_HOPS = 5
+
+# Shortest path reported as a finding, in hops
+MIN_REPORTED_HOPS = 5
+
+# Upper bound on partial paths followed per hop, to bound the work
+MAX_PATHS = 100000
+
+EPOCH = np.datetime64("1970-01-01T00:00:00", "us")
+
+
+def is_internal(ip: str) -> bool:
+    return ip.startswith("10.") or ip.startswith("192.168.")
+
+
+class ConnectionGraph:
+    """Time-stamped internal connection graph in CSR layout."""
+
+    def __init__(self, hosts: np.ndarray, src: np.ndarray, dst: np.ndarray, port: np.ndarray,
+                 ts: np.ndarray, event_ids: np.ndarray):
+        # Edge columns, sorted by (src, ts); indptr[h]:indptr[h + 1] are host h's edges
+        self.hosts = hosts
+        self.src, self.dst, self.port, self.ts, self.event_ids = src, dst, port, ts, event_ids
+        self.indptr = np.concatenate(([0], np.cumsum(np.bincount(src, minlength=len(hosts)))))
+        self.is_new = self._first_seen()
+
+    @classmethod
+    def build(cls, events: List[Dict], ports: Optional[Dict[int, str]] = None) -> "ConnectionGraph":
+        """Build the graph from conn events between internal hosts on lateral-movement ports."""
+        ports = LATERAL_PORTS if ports is None else ports
+        edges = [
+            e for e in events
+            if e.get("id.resp_p") in ports
+            and is_internal(e.get("id.orig_h", "")) and is_internal(e.get("id.resp_h", ""))
+        ]
+        src_ip = np.array([e["id.orig_h"] for e in edges], dtype=str)
+        dst_ip = np.array([e["id.resp_h"] for e in edges], dtype=str)
+        hosts, codes = np.unique(np.concatenate([src_ip, dst_ip]), return_inverse=True)
+        src, dst = codes[:len(edges)], codes[len(edges):]
+        ts = (np.array([e["ts"].replace("Z", "") for e in edges], dtype="datetime64[us]") - EPOCH
+              ).astype(np.float64) / 1e6
+        port = np.array([e["id.resp_p"] for e in edges], dtype=np.int32)
+        event_ids = np.array([e["id"] for e in edges], dtype=str)
+
+        order = np.lexsort((ts, src))
+        return cls(hosts, src[order], dst[order], port[order], ts[order], event_ids[order])
+
+    def __len__(self) -> int:
+        return len(self.src)
+
+    def _first_seen(self) -> np.ndarray:
+        """Mark each edge that is the earliest of its (src, dst, port) triple."""
+        is_new = np.zeros(len(self.src), dtype=bool)
+        if len(self.src):
+            key = (self.src.astype(np.int64) * len(self.hosts) + self.dst) * 65536 + self.port
+            # Stable sort by key keeps time order within a triple
+            order = np.argsort(key, kind="stable")
+            first = np.ones(len(order), dtype=bool)
+            first[1:] = key[order][1:] != key[order][:-1]
+            is_new[order[first]] = True
+        return is_new
+
+    def _time_key(self, host: np.ndarray, ts: np.ndarray) -> np.ndarray:
+        """Composite (host, time) key matching the CSR sort order."""
+        t0 = self.ts.min() if len(self.ts) else 0.0
+        span = (self.ts.max() - t0 + 1.0) if len(self.ts) else 1.0
+        return host.astype(np.float64) * span + (ts - t0)
+
+    def _new_edges(self):
+        """Indices of new edges in (src, ts) order, their keys, and per-source offsets into them."""
+        new_idx = np.flatnonzero(self.is_new)
+        keys = self._time_key(self.src[new_idx], self.ts[new_idx])
+        indptr = np.concatenate(([0], np.cumsum(np.bincount(self.src[new_idx], minlength=len(self.hosts)))))
+        return new_idx, keys, indptr
+
+    def _after(self, keys: np.ndarray, indptr: np.ndarray, host: np.ndarray, t: np.ndarray) -> np.ndarray:
+        """
+        For each (host, t), the position in `keys` just past host's new edges at or before t.
+
+        A time outside the host's own key range would land in a neighbour's
+        edges, so the result is clipped to the host's CSR slice.
+        """
+        pos = np.searchsorted(keys, self._time_key(host, t), side="right")
+        return np.clip(pos, indptr[host], indptr[host + 1])
+
+    def new_edge_rate(self) -> Dict[str, Dict[str, float]]:
+        """Per source: total edges, new edges, and new edges per hour of activity."""
+        n_hosts = len(self.hosts)
+        total = np.diff(self.indptr)
+        new = np.bincount(self.src[self.is_new], minlength=n_hosts)
+        first = np.full(n_hosts, np.inf)
+        last = np.full(n_hosts, -np.inf)
+        np.minimum.at(first, self.src, self.ts)
+        np.maximum.at(last, self.src, self.ts)
+        hours = np.maximum((last - first) / 3600.0, 1.0)
+        return {
+            str(self.hosts[h]): {
+                "edges": int(total[h]),
+                "new_edges": int(new[h]),
+                "new_edges_per_hour": round(float(new[h] / hours[h]), 3),
+            }
+            for h in np.flatnonzero(total)
+        }
+
+    def fanout_bursts(self, window: float = WINDOW_SECONDS,
+                      threshold: int = FANOUT_THRESHOLD) -> List[Dict]:
+        """
+        Sources that open new edges to at least `threshold` distinct hosts
+        within `window` seconds. A host reached over several services counts
+        once.
+
+        Returns:
+            One dict per burst (the widest window per source and
+            non-overlapping), with the hops in time order
+        """
+        new_idx, keys, indptr = self._new_edges()  # already sorted by (src, ts)
+        if len(new_idx) == 0:
+            return []
+        # For each new edge, the new edges from the same source in [ts, ts + window]
+        end = self._after(keys, indptr, self.src[new_idx], self.ts[new_idx] + window)
+        width = end - np.arange(len(new_idx)) - self._repeated_destinations(new_idx, end)
+
+        bursts = []
+        i = 0
+        while i < len(new_idx):
+            if width[i] >= threshold:
+                hops = new_idx[i:end[i]]
+                bursts.append(self._describe(hops, kind="fanout"))
+                i = end[i]
+            else:
+                i += 1
+        bursts.sort(key=lambda b: b["start"])
+        return bursts
+
+    def _repeated_destinations(self, new_idx: np.ndarray, end: np.ndarray) -> np.ndarray:
+        """
+        For each window [i, end[i]) of new edges, the edges whose destination
+        an earlier edge of the same window already reached.
+
+        Edge j repeats the destination of edge prev[j] of the same source, so
+        it is a repeat in every window that starts at or before prev[j] and
+        reaches j; `end` is nondecreasing, so those windows form one run of
+        starts and the counts come from a difference array.
+        """
+        n = len(new_idx)
+        pair = self.src[new_idx].astype(np.int64) * len(self.hosts) + self.dst[new_idx]
+        order = np.argsort(pair, kind="stable")  # time order within a pair
+        repeat = np.flatnonzero(pair[order][1:] == pair[order][:-1])
+        j, prev = order[repeat + 1], order[repeat]
+        first = np.searchsorted(end, j, side="right")  # first window start reaching j
+        valid = first <= prev
+        delta = (np.bincount(first[valid], minlength=n + 1)
+                 - np.bincount(prev[valid] + 1, minlength=n + 1))
+        return np.cumsum(delta)[:n]
+
+    def time_respecting_paths(self, window: float = WINDOW_SECONDS, min_hops: int = 2,
+                              max_hops: int = MAX_HOPS, max_paths: int = MAX_PATHS) -> List[Dict]:
+        """
+        Chains of new edges A -> B -> C ... where each hop leaves the host the
+        previous hop reached, after it arrived and within `window` seconds.
+
+        Expansion is breadth-first over all partial paths at once; each step is
+        a batched searchsorted into the CSR edge columns.
+
+        Returns:
+            Maximal paths of at least min_hops hops, longest first
+        """
+        new_idx, keys, indptr = self._new_edges()
+        if len(new_idx) == 0:
+            return []
+
+        # Each partial path is a row of edge indices (into new_idx), -1 padded
+        paths = np.full((len(new_idx), max_hops), -1, dtype=np.int64)
+        paths[:, 0] = np.arange(len(new_idx))
+        complete = []
+        for hop in range(1, max_hops):
+            last = paths[:, hop - 1]
+            host = self.dst[new_idx[last]]
+            t = self.ts[new_idx[last]]
+            lo = self._after(keys, indptr, host, t)
+            hi = self._after(keys, indptr, host, t + window)
+            n_next = hi - lo
+
+            # Paths that cannot be extended are finished
+            done = n_next == 0
+            if hop > 1:
+                complete.append(paths[done])
+
+            extend = np.flatnonzero(~done)
+            if len(extend) == 0:
+                paths = paths[:0]
+                break
+            counts = n_next[extend]
+            # Past the budget, only the earliest-starting partial paths are followed
+            within_budget = np.cumsum(counts) <= max_paths
+            extend, counts = extend[within_budget], counts[within_budget]
+            if len(extend) == 0:
+                break
+            parent = np.repeat(extend, counts)
+            run_starts = np.cumsum(counts) - counts
+            nxt = np.arange(counts.sum()) - np.repeat(run_starts, counts) + np.repeat(lo[extend], counts)
+
+            extended = paths[parent]
+            extended[:, hop] = nxt
+            # Do not walk back onto a host already on the path
+            revisit = np.zeros(len(extended), dtype=bool)
+            for earlier in range(hop):
+                revisit |= self.src[new_idx[extended[:, earlier]]] == self.dst[new_idx[nxt]]
+            # A path whose every continuation revisits a host is itself maximal
+            kept = np.bincount(parent[~revisit], minlength=len(paths))
+            if hop > 1:
+                complete.append(paths[extend[kept[extend] == 0]])
+            paths = extended[~revisit]
+        if len(paths) and (paths[:, 1] >= 0).all():
+            complete.append(paths)
+
+        results = []
+        for block in complete:
+            for row in block[(block >= 0).sum(axis=1) >= min_hops]:
+                hops = new_idx[row[row >= 0]]
+                results.append(self._describe(hops, kind="path"))
+        results.sort(key=lambda p: (-len(p["hops"]), p["start"]))
+        return results
+
+    def _describe(self, hops: np.ndarray, kind: str) -> Dict:
+        return {
+            "kind": kind,
+            "source_ip": str(self.hosts[self.src[hops[0]]]),
+            "start": _iso(self.ts[hops[0]]),
+            "end": _iso(self.ts[hops[-1]]),
+            "hosts": list(dict.fromkeys(
+                [str(self.hosts[self.src[hops[0]]])] + [str(self.hosts[self.dst[h]]) for h in hops])),
+            "hops": [
+                {
+                    "src": str(self.hosts[self.src[h]]),
+                    "dst": str(self.hosts[self.dst[h]]),
+                    "service": LATERAL_PORTS.get(int(self.port[h]), str(int(self.port[h]))),
+                    "port": int(self.port[h]),
+                    "ts": _iso(self.ts[h]),
+                    "event_id": str(self.event_ids[h]),
+                }
+                for h in hops
+            ],
+            "event_ids": [str(self.event_ids[h]) for h in hops],
+        }
+
+
+def _iso(seconds: float) -> str:
+    return str(EPOCH + np.timedelta64(int(round(seconds * 1e6)), "us"))
+
+
+def analyze_lateral_movement(events: List[Dict], window: float = WINDOW_SECONDS,
+                             threshold: int = FANOUT_THRESHOLD,
+                             min_hops: int = MIN_REPORTED_HOPS) -> Dict:
+    """
+    Run the graph stage over conn events.
+
+    Returns:
+        Dict with graph size, per-source new-edge rates, fan-out bursts and
+        time-respecting paths of at least min_hops hops
+    """
+    graph = ConnectionGraph.build(events)
+    return {
+        "hosts": len(graph.hosts),
+        "edges": len(graph),
+        "new_edges": int(graph.is_new.sum()),
+        "new_edge_rate": graph.new_edge_rate(),
+        "bursts": graph.fanout_bursts(window=window, threshold=threshold),
+        "paths": graph.time_respecting_paths(window=window, min_hops=min_hops),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Internal lateral movement graph analytics")
+    parser.add_argument("--window", type=float, default=WINDOW_SECONDS, help="Window in seconds")
+    parser.add_argument("--threshold", type=int, default=FANOUT_THRESHOLD)
+    args = parser.parse_args()
+
+    conn_events = load_log(SCENARIO_DIR / "raw_logs", "conn")
+
+    result = analyze_lateral_movement(conn_events, window=args.window, threshold=args.threshold)
+    print("=" * 60)
+    print(f"Lateral graph: {result['hosts']} hosts, {result['edges']} edges, {result['new_edges']} new")
+    print("=" * 60)
+    print(f"\nFan-out bursts: {len(result['bursts'])}")
+    for burst in result["bursts"]:
+        targets = ", ".join(f"{h['dst']} ({h['service']})" for h in burst["hops"])
+        print(f"  {burst['start']} {burst['source_ip']} -> {targets}")
+    print(f"\nTime-respecting paths of {MIN_REPORTED_HOPS}+ hops: {len(result['paths'])}")
+    for path in result["paths"][:10]:
+        print(f"  {path['start']} {' -> '.join(path['hosts'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,396 @@
+#!/usr/bin/env python3
+"""
+Load Generator
+
+Replays a scenario's logs, or benign traffic synthesized on the fly, to
+an ingestion endpoint at a controlled rate, to load-test ingestion and
+the streaming rules / LogLM stages:
+- Sources: a scenario's raw logs in any log_io format, merged in time
+  order, or a synthetic ScenarioScale (topology and windows as in
+  generate_scenario, never written to disk)
+- Sinks: stdout, a file, a UNIX socket or a TCP endpoint; events go out
+  as JSON lines tagged with their Zeek `_path`
+- Pacing: a token bucket refilled at --eps, shaped by a burst profile
+  (sine, square-wave bursts or a ramp), or the events' own timestamps
+  compressed by --speed (optionally capped by --eps)
+- Events more than --max-lag seconds behind schedule are dropped, so a
+  slow sink sees current traffic instead of an ever-growing backlog
+- The report has the achieved rate, lag quantiles and drops; progress and
+  the report go to stderr, so stdout can be the sink
+
+    python scripts/load_generator.py --eps 50000 --sink tcp:127.0.0.1:5140 --duration 60
+    python scripts/load_generator.py --speed 600 --eps 20000 --sink unix:/tmp/ingest.sock
+    python scripts/load_generator.py --synthetic --events-per-day 5e7 --hosts 50000 \\
+        --eps 100000 --profile square:10:4:0.2 --max-lag 2 --sink file:/tmp/load.jsonl
+"""
+
+import argparse
+import itertools
+import json
+import math
+import socket
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, Optional, Tuple
+
+import numpy as np
+
+try:
+    from scripts.generate_scenario import (INTERNAL_HOSTS, SCENARIO_DIR, ScenarioScale, benign_windows,
+                                           window_events)
+    from scripts.log_io import find_log, iter_events
+    from scripts.log_merge import merge_logs
+    from scripts.quantile_sketch import KLLSketch
+    from scripts.topology import Topology
+except ImportError:
+    from generate_scenario import INTERNAL_HOSTS, SCENARIO_DIR, ScenarioScale, benign_windows, window_events
+    from log_io import find_log, iter_events
+    from log_merge import merge_logs
+    from quantile_sketch import KLLSketch
+    from topology import Topology
+
+# Most events handed to the sink in one write
+MAX_BATCH = 1024
+
+# Longest single sleep, so duration limits and progress stay responsive
+MAX_SLEEP = 0.05
+
+# Default token bucket capacity, in seconds of the target rate
+DEFAULT_BURST_SECONDS = 0.1
+
+# Burst profiles never throttle below this fraction of the target rate
+MIN_RATE_FACTOR = 0.01
+
+# Lag quantiles in the report
+LAG_QUANTILES = (0.5, 0.9, 0.99)
+
+EPOCH = datetime(1970, 1, 1)
+
+
+def say(*args) -> None:
+    """Progress and reports go to stderr; stdout may be the sink."""
+    print(*args, file=sys.stderr)
+
+
+def constant_rate(t: float) -> float:
+    return 1.0
+
+
+def parse_profile(spec: str) -> Callable[[float], float]:
+    """
+    Rate multiplier over time (seconds since the start) from a spec:
+    - "constant"
+    - "sine:PERIOD:AMPLITUDE": 1 + AMPLITUDE * sin(2 pi t / PERIOD)
+    - "square:PERIOD:FACTOR:DUTY": FACTOR for the first DUTY share of
+      every PERIOD seconds, 1 otherwise
+    - "ramp:SECONDS": rising linearly to 1 over SECONDS
+
+    Raises:
+        ValueError: Unknown profile or wrong number of parameters
+    """
+    name, *params = spec.split(":")
+    try:
+        args = [float(p) for p in params]
+    except ValueError:
+        raise ValueError(f"Invalid rate profile: {spec}") from None
+    shapes = {
+        "constant": (0, lambda: constant_rate),
+        "sine": (2, lambda period, amplitude: lambda t: 1 + amplitude * math.sin(2 * math.pi * t / period)),
+        "square": (3, lambda period, factor, duty: lambda t: factor if t % period < duty * period else 1.0),
+        "ramp": (1, lambda seconds: lambda t: min(1.0, t / seconds)),
+    }
+    if name not in shapes or len(args) != shapes[name][0]:
+        raise ValueError(f"Invalid rate profile: {spec}")
+    shape = shapes[name][1](*args)
+    return lambda t: max(MIN_RATE_FACTOR, shape(t))
+
+
+class TokenBucket:
+    """Tokens refilled at rate * profile(t) per second, holding at most `capacity`."""
+
+    def __init__(self, rate: float, capacity: float, profile: Callable[[float], float] = constant_rate):
+        self.rate = rate
+        self.capacity = max(1.0, capacity)
+        self.profile = profile
+        self.tokens = 0.0
+        # Tokens refilled so far, including those lost to a full bucket: the ideal event count
+        self.accrued = 0.0
+        self.now = 0.0
+
+    def current_rate(self) -> float:
+        return self.rate * self.profile(self.now)
+
+    def refill(self, now: float) -> None:
+        added = self.current_rate() * (now - self.now)
+        self.accrued += added
+        self.tokens = min(self.capacity, self.tokens + added)
+        self.now = now
+
+    def take(self, n: int) -> None:
+        self.tokens -= n
+
+    def delay(self, n: int = 1) -> float:
+        """Seconds until n tokens are available at the current rate."""
+        return max(0.0, (n - self.tokens) / self.current_rate())
+
+
+class StreamSink:
+    """Writes to a binary file object (a file, or stdout)."""
+
+    def __init__(self, f, close: bool = True):
+        self.f = f
+        self._close = close
+
+    def write(self, data: bytes) -> None:
+        self.f.write(data)
+
+    def close(self) -> None:
+        self.f.flush()
+        if self._close:
+            self.f.close()
+
+
+class SocketSink:
+    """Writes to a connected stream socket (UNIX or TCP)."""
+
+    def __init__(self, sock: socket.socket):
+        self.sock = sock
+
+    def write(self, data: bytes) -> None:
+        self.sock.sendall(data)
+
+    def close(self) -> None:
+        self.sock.close()
+
+
+def open_sink(spec: str):
+    """
+    Sink from a spec: "stdout", "file:PATH", "unix:PATH" or "tcp:HOST:PORT".
+
+    Raises:
+        ValueError: Unknown sink spec
+    """
+    kind, _, target = spec.partition(":")
+    if kind == "stdout":
+        return StreamSink(sys.stdout.buffer, close=False)
+    if kind == "file" and target:
+        return StreamSink(open(target, "wb"))
+    if kind == "unix" and target:
+        sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        sock.connect(target)
+        return SocketSink(sock)
+    if kind == "tcp" and target:
+        host, _, port = target.rpartition(":")
+        return SocketSink(socket.create_connection((host or "127.0.0.1", int(port))))
+    raise ValueError(f"Unknown sink: {spec} (use stdout, file:PATH, unix:PATH or tcp:HOST:PORT)")
+
+
+def scenario_events(scenario_dir: Path) -> Iterator[Tuple[str, Dict]]:
+    """(log type, event) pairs of a scenario's time-sorted logs, streamed in time order."""
+    raw_dir = Path(scenario_dir) / "raw_logs"
+    logs = {}
+    for log_type in ("conn", "dns"):
+        path = find_log(raw_dir, log_type)
+        if path is not None:
+            logs[log_type] = iter_events(path)
+    if not logs:
+        raise FileNotFoundError(f"No raw logs in {raw_dir}")
+    return merge_logs(logs)
+
+
+def synthetic_events(scale: ScenarioScale, seed: Optional[int] = None) -> Iterator[Tuple[str, Dict]]:
+    """(log type, event) pairs of benign traffic at `scale`, synthesized window by window."""
+    topology = Topology.build(INTERNAL_HOSTS, scale.hosts, seed)
+    windows = benign_windows(scale, 0, scale.conn_events, [], [], np.random.SeedSequence(seed), None, None)
+    for window in windows:
+        conn, dns = window_events(window, topology)
+        yield from merge_logs({"conn": conn, "dns": dns})
+
+
+def encode_event(log_type: str, event: Dict) -> bytes:
+    return (json.dumps({"_path": log_type, **event}, separators=(",", ":")) + "\n").encode("utf-8")
+
+
+def _seconds(ts: str) -> float:
+    dt = datetime.fromisoformat(ts)
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return (dt - EPOCH).total_seconds()
+
+
+class LoadGenerator:
+    """
+    Paces (log type, event) pairs into a sink.
+
+    With eps, a token bucket caps the rate; with speed, each event is due
+    at its offset from the first event divided by speed. Lag is how far an
+    event is sent behind its due time (for eps alone: behind the ideal
+    count of events the bucket has refilled). The bucket never bursts
+    beyond its capacity, so time lost to a stalled sink is not made up:
+    it stays as lag, or turns into drops with max_lag.
+    """
+
+    def __init__(self, sink, eps: Optional[float] = None, speed: Optional[float] = None,
+                 profile: Callable[[float], float] = constant_rate, burst: Optional[float] = None,
+                 max_lag: Optional[float] = None, clock: Callable[[], float] = time.perf_counter,
+                 sleep: Callable[[float], None] = time.sleep):
+        """
+        Args:
+            sink: Object with write(bytes) and close()
+            eps: Target events per second (times the profile)
+            speed: Time compression factor for timestamp-paced replay
+            profile: Rate multiplier over time, see parse_profile
+            burst: Token bucket capacity in events (default: DEFAULT_BURST_SECONDS of eps)
+            max_lag: Drop events more than this many seconds behind schedule
+        """
+        if eps is None and speed is None:
+            raise ValueError("LoadGenerator needs eps, speed or both")
+        self.sink = sink
+        self.eps = eps
+        self.speed = speed
+        self.max_lag = max_lag
+        self.bucket = None
+        if eps is not None:
+            self.bucket = TokenBucket(eps, burst if burst is not None else eps * DEFAULT_BURST_SECONDS, profile)
+        self.clock = clock
+        self.sleep = sleep
+
+    def run(self, events: Iterable[Tuple[str, Dict]], limit: Optional[int] = None,
+            duration: Optional[float] = None, report_every: Optional[float] = None) -> Dict:
+        """
+        Send events until they run out, `limit` events were sent or dropped,
+        or `duration` seconds passed.
+
+        Returns:
+            Report: sent, dropped, elapsed time, target and achieved rate,
+            lag quantiles and whether the sink closed early
+        """
+        events = iter(events) if limit is None else itertools.islice(events, limit)
+        lags = KLLSketch()
+        sent = dropped = processed = 0
+        sink_closed = False
+        first = None
+        start = self.clock()
+        last_report, last_sent = 0.0, 0
+        pending = next(events, None)
+        while pending is not None:
+            now = self.clock() - start
+            if duration is not None and now >= duration:
+                break
+            budget = MAX_BATCH
+            if self.bucket is not None:
+                self.bucket.refill(now)
+                budget = min(budget, int(self.bucket.tokens))
+            batch, batch_lags, wait = [], [], MAX_SLEEP
+            while pending is not None and len(batch) < budget:
+                log_type, event = pending
+                if self.speed is not None:
+                    offset = _seconds(event["ts"])
+                    first = offset if first is None else first
+                    lag = now - (offset - first) / self.speed
+                    if lag < 0:
+                        wait = -lag
+                        break
+                else:
+                    lag = max(0.0, (self.bucket.accrued - processed - 1) / self.bucket.current_rate())
+                processed += 1
+                if self.max_lag is not None and lag > self.max_lag:
+                    dropped += 1
+                else:
+                    batch.append(encode_event(log_type, event))
+                    batch_lags.append(lag)
+                pending = next(events, None)
+            if batch:
+                try:
+                    self.sink.write(b"".join(batch))
+                except (BrokenPipeError, ConnectionError):
+                    sink_closed = True
+                    break
+                sent += len(batch)
+                if self.bucket is not None:
+                    self.bucket.take(len(batch))
+                lags.update(batch_lags)
+            elif pending is not None:
+                if self.bucket is not None and budget == 0:
+                    wait = self.bucket.delay()
+                self.sleep(min(wait, MAX_SLEEP))
+            if report_every and now - last_report >= report_every:
+                say(f"  {now:7.1f}s  {sent:,} sent ({(sent - last_sent) / max(now - last_report, 1e-9):,.0f} eps), "
+                    f"lag {batch_lags[-1] if batch_lags else 0:.3f}s, {dropped:,} dropped")
+                last_report, last_sent = now, sent
+        elapsed = self.clock() - start
+        return {
+            "sent": sent,
+            "dropped": dropped,
+            "elapsed_seconds": round(elapsed, 3),
+            "target_eps": self.eps,
+            "speed": self.speed,
+            "achieved_eps": round(sent / elapsed, 1) if elapsed > 0 else None,
+            "lag_seconds": {
+                **{f"p{round(q * 100)}": round(lags.quantile(q), 4) for q in LAG_QUANTILES},
+                "max": round(lags.max, 4),
+            } if len(lags) else None,
+            "sink_closed": sink_closed,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay scenario logs to a sink at a target rate")
+    parser.add_argument("--scenario-dir", type=Path, default=SCENARIO_DIR, help="Scenario whose logs are replayed")
+    parser.add_argument("--synthetic", action="store_true", help="Synthesize benign traffic instead")
+    parser.add_argument("--events-per-day", type=float, default=None, help="Synthetic events per day")
+    parser.add_argument("--days", type=float, default=None, help="Synthetic scenario duration in days")
+    parser.add_argument("--hosts", type=int, default=None, help="Synthetic internal hosts")
+    parser.add_argument("--seed", type=int, default=None)
+    parser.add_argument("--sink", default="stdout", help="stdout, file:PATH, unix:PATH or tcp:HOST:PORT")
+    parser.add_argument("--eps", type=float, default=None, help="Target events per second")
+    parser.add_argument("--speed", type=float, default=None, help="Replay at the events' own pace, this much faster")
+    parser.add_argument("--profile", default="constant",
+                        help="Rate profile: constant, sine:PERIOD:AMPLITUDE, square:PERIOD:FACTOR:DUTY or ramp:SECONDS")
+    parser.add_argument("--burst", type=float, default=None, help="Token bucket capacity in events")
+    parser.add_argument("--max-lag", type=float, default=None, help="Drop events this many seconds late")
+    parser.add_argument("--limit", type=int, default=None, help="Stop after this many events")
+    parser.add_argument("--duration", type=float, default=None, help="Stop after this many seconds")
+    parser.add_argument("--report-every", type=float, default=5.0, help="Progress interval in seconds (0: off)")
+    parser.add_argument("--report", type=Path, default=None, help="Also write the report as JSON")
+    args = parser.parse_args()
+    if args.eps is None and args.speed is None:
+        parser.error("give --eps, --speed or both")
+    try:
+        profile = parse_profile(args.profile)
+    except ValueError as e:
+        parser.error(str(e))
+
+    if args.synthetic:
+        defaults = ScenarioScale()
+        scale = ScenarioScale(args.events_per_day or defaults.events_per_day, args.days or defaults.days,
+                              args.hosts or defaults.hosts)
+        events = synthetic_events(scale, args.seed)
+        source = f"synthetic ({scale.total_events:,} events, {scale.hosts:,} hosts)"
+    else:
+        events = scenario_events(args.scenario_dir)
+        source = str(args.scenario_dir)
+
+    say("=" * 60)
+    say(f"Load generator: {source} -> {args.sink}")
+    say("=" * 60)
+    sink = open_sink(args.sink)
+    try:
+        report = LoadGenerator(sink, eps=args.eps, speed=args.speed, profile=profile, burst=args.burst,
+                               max_lag=args.max_lag).run(events, limit=args.limit, duration=args.duration,
+                                                         report_every=args.report_every)
+    finally:
+        sink.close()
+
+    say("=" * 60)
+    for key, value in report.items():
+        say(f"  {key}: {value}")
+    if args.report:
+        with open(args.report, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,321 @@
+#!/usr/bin/env python3
+"""
+Raw Log Index
+
+Columnar index over a scenario's raw logs for filtered, paginated lookups
+(e.g. "the 50 events of 10.0.1.42 around this finding") without scanning
+every event:
+- Events of all logs in one time-sorted array; a time window is a pair of
+  bisections (np.searchsorted) over the int64 timestamp column
+- Entity fields (IPs, hostname, port, service, log type) are dictionary
+  encoded into int32 columns, with a posting list of sorted rows per value
+  (and one per IP over both ends of a connection)
+- A query walks the shortest posting list clipped to the time window and
+  checks the remaining filters against the columns in vectorized chunks,
+  stopping as soon as the page is full
+- Cursors are opaque "<index token>:<row>" strings, so a cursor from before
+  the logs were rebuilt is rejected instead of silently skipping events
+
+    python scripts/log_index.py --ip 10.0.1.42 --around 2026-01-09T01:00:00
+"""
+
+import argparse
+import hashlib
+import itertools
+import json
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    from scripts.log_io import epoch_micros, find_log, read_events
+except ImportError:
+    from log_io import epoch_micros, find_log, read_events
+
+SCENARIO_DIR = Path(__file__).parent.parent / "data" / "scenarios" / "default_attack"
+
+# Filterable fields and the event key each one is read from. "log_type"
+# (the log an event came from) and "ip" (either end of a connection) can
+# be filtered on as well.
+FIELDS = {
+    "src_ip": "id.orig_h",
+    "dst_ip": "id.resp_h",
+    "hostname": "hostname",
+    "port": "id.resp_p",
+    "service": "service",
+}
+
+IP_FIELDS = ("src_ip", "dst_ip")
+
+# Service of events whose log implies it (dns.log records carry no service).
+DEFAULT_SERVICE = {"dns": "dns"}
+
+FILTERS = ["log_type", "ip", *FIELDS]
+
+# Candidate rows checked per vectorized step of a filtered scan.
+SCAN_CHUNK = 4096
+
+
+class CursorError(ValueError):
+    """A cursor that is malformed or belongs to a different index."""
+
+
+class _Column:
+    """Dictionary-encoded column with a posting list of rows per value."""
+
+    def __init__(self, values: Sequence):
+        self.lookup = {value: code for code, value in enumerate(dict.fromkeys(values))}
+        self.codes = np.fromiter(map(self.lookup.__getitem__, values), dtype=np.int32, count=len(values))
+        order = np.argsort(self.codes, kind="stable").astype(np.int32)
+        bounds = np.cumsum(np.bincount(self.codes, minlength=len(self.lookup)))[:-1]
+        self.postings = np.split(order, bounds) if self.lookup else []
+
+    def code(self, value) -> Optional[int]:
+        return self.lookup.get(value)
+
+
+def _either_postings(columns: List[_Column], n: int) -> Dict:
+    """Value -> sorted rows where any of the columns holds the value."""
+    values = list(dict.fromkeys(value for column in columns for value in column.lookup))
+    joint = {value: code for code, value in enumerate(values)}
+    keys = []
+    for column in columns:
+        remap = np.array([joint[value] for value in column.lookup], dtype=np.int64)
+        keys.append(remap[column.codes] * n + np.arange(n))
+    # One sort of (value, row) keys; rows matched by both columns are dropped
+    keys = np.sort(np.concatenate(keys))
+    keys = keys[np.concatenate(([True], keys[1:] != keys[:-1]))] if len(keys) else keys
+    codes, rows = np.divmod(keys, max(n, 1))
+    bounds = np.searchsorted(codes, np.arange(1, len(values)))
+    return dict(zip(values, np.split(rows.astype(np.int32), bounds)))
+
+
+def _clip(rows: np.ndarray, lo: int, hi: int) -> np.ndarray:
+    """Rows of a sorted posting list that fall in [lo, hi)."""
+    # Bounds of the list's own dtype; a Python int would make numpy copy the list
+    bounds = rows.searchsorted(np.array([lo, hi], dtype=rows.dtype))
+    return rows[bounds[0]:bounds[1]]
+
+
+class LogIndex:
+    """Time-sorted, columnar view of several raw logs."""
+
+    def __init__(self, events: List[Dict], log_types: List[str], micros: np.ndarray):
+        self.events = events
+        self.micros = micros
+        self.columns: Dict[str, _Column] = {"log_type": _Column(log_types)}
+        for field, key in FIELDS.items():
+            keys = itertools.repeat(key)
+            if field == "service":
+                values = list(map(dict.get, events, keys, map(DEFAULT_SERVICE.get, log_types)))
+            else:
+                values = list(map(dict.get, events, keys))
+            self.columns[field] = _Column(values)
+        self.ip_postings = _either_postings([self.columns[field] for field in IP_FIELDS], len(events))
+        digest = hashlib.sha1(self.micros[[0, -1]].tobytes() if len(events) else b"")
+        digest.update(str(len(events)).encode())
+        self.token = digest.hexdigest()[:8]
+
+    @classmethod
+    def build(cls, logs: Dict[str, Sequence[Dict]]) -> "LogIndex":
+        """
+        Index logs keyed by log type.
+
+        Events are ordered by a stable sort of the timestamp column, so
+        events with equal timestamps keep their log and file order, as
+        with merge_logs.
+        """
+        events = [event for run in logs.values() for event in run]
+        log_types = [name for name, run in logs.items() for _ in range(len(run))]
+        if not events:
+            return cls([], [], np.zeros(0, dtype=np.int64))
+        micros = epoch_micros(list(map(dict.get, events, itertools.repeat("ts"), itertools.repeat(""))))
+        order = np.argsort(micros, kind="stable")
+        return cls([events[row] for row in order], [log_types[row] for row in order], micros[order])
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def count(self, log_type: Optional[str] = None) -> int:
+        """Events of one log type, or of all of them."""
+        if log_type is None:
+            return len(self.events)
+        code = self.columns["log_type"].code(log_type)
+        return 0 if code is None else len(self.columns["log_type"].postings[code])
+
+    def time_range(self, start: Optional[str] = None, end: Optional[str] = None) -> Tuple[int, int]:
+        """Rows [lo, hi) with start <= ts < end."""
+        lo = 0 if start is None else int(np.searchsorted(self.micros, epoch_micros([start])[0], side="left"))
+        hi = len(self.events) if end is None else int(np.searchsorted(self.micros, epoch_micros([end])[0], side="left"))
+        return lo, max(lo, hi)
+
+    def _cursor_row(self, cursor: str) -> int:
+        token, _, row = cursor.partition(":")
+        if token != self.token or not row.isdigit():
+            raise CursorError("Cursor does not belong to the current logs; start a new query")
+        return int(row)
+
+    def _cursor(self, row: int) -> str:
+        return f"{self.token}:{row}"
+
+    def _conditions(self, filters: Dict) -> Optional[List[Tuple[np.ndarray, List[Tuple[str, int]]]]]:
+        """
+        (posting list, column checks) per filter, or None if some filter
+        value never occurs. A row passes a filter if any of its checks hold.
+        """
+        conditions = []
+        for field, value in filters.items():
+            if value is None:
+                continue
+            if field == "port":
+                value = int(value)
+            if field == "ip":
+                if value not in self.ip_postings:
+                    return None
+                checks = [(f, self.columns[f].code(value)) for f in IP_FIELDS]
+                conditions.append((self.ip_postings[value], [(f, c) for f, c in checks if c is not None]))
+                continue
+            if field not in self.columns:
+                raise ValueError(f"Unknown filter '{field}'. Available: {', '.join(FILTERS)}")
+            code = self.columns[field].code(value)
+            if code is None:
+                return None
+            conditions.append((self.columns[field].postings[code], [(field, code)]))
+        return conditions
+
+    def _matches(self, rows: np.ndarray, conditions) -> np.ndarray:
+        mask = np.ones(len(rows), dtype=bool)
+        for _, checks in conditions:
+            hit = np.zeros(len(rows), dtype=bool)
+            for field, code in checks:
+                hit |= self.columns[field].codes[rows] == code
+            mask &= hit
+        return rows[mask]
+
+    def _scan(self, conditions, lo: int, hi: int, want: int, reverse: bool = False) -> np.ndarray:
+        """Up to `want` matching rows of [lo, hi), from the start (or the end if reverse)."""
+        if want <= 0 or lo >= hi:
+            return np.zeros(0, dtype=np.int64)
+        if not conditions:
+            return np.arange(hi - 1, max(lo, hi - want) - 1, -1) if reverse else np.arange(lo, min(hi, lo + want))
+
+        # Drive the scan from the most selective posting list in the window
+        clipped = [_clip(postings, lo, hi) for postings, _ in conditions]
+        chosen = min(range(len(conditions)), key=lambda i: len(clipped[i]))
+        driver = clipped[chosen]
+        rest = conditions[:chosen] + conditions[chosen + 1:]
+        if reverse:
+            driver = driver[::-1]
+
+        chunk = max(SCAN_CHUNK, want)
+        found = []
+        total = 0
+        for start in range(0, len(driver), chunk):
+            rows = self._matches(driver[start:start + chunk], rest)
+            found.append(rows)
+            total += len(rows)
+            if total >= want:
+                break
+        rows = np.concatenate(found) if found else np.zeros(0, dtype=np.int64)
+        return rows[:want]
+
+    def query(
+        self,
+        filters: Optional[Dict] = None,
+        start: Optional[str] = None,
+        end: Optional[str] = None,
+        around: Optional[str] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> Tuple[List[Dict], Optional[str]]:
+        """
+        Events matching all filters, in time order.
+
+        Args:
+            filters: Field -> value for the fields of FILTERS
+            start: Earliest timestamp (inclusive, ISO)
+            end: Latest timestamp (exclusive, ISO)
+            around: Center the page on this timestamp: up to limit // 2
+                events before it and the rest at or after it
+            limit: Maximum number of events returned
+            cursor: next_cursor of a previous page; continues after it
+
+        Returns:
+            (events, next_cursor); next_cursor is None when no events remain
+
+        Raises:
+            CursorError: The cursor is from another version of the logs
+            ValueError: Unknown filter field
+        """
+        lo, hi = self.time_range(start, end)
+        conditions = self._conditions(filters or {})
+        if conditions is None:
+            return [], None
+
+        if cursor is not None:
+            lo = max(lo, self._cursor_row(cursor) + 1)
+            before = np.zeros(0, dtype=np.int64)
+        elif around is not None:
+            pivot = min(max(lo, self.time_range(around)[0]), hi)
+            before = self._scan(conditions, lo, pivot, limit // 2, reverse=True)[::-1]
+            lo = pivot
+        else:
+            before = np.zeros(0, dtype=np.int64)
+
+        # One extra row tells whether another page exists
+        after = self._scan(conditions, lo, hi, limit - len(before) + 1)
+        more = len(after) > limit - len(before)
+        rows = np.concatenate([before, after[:limit - len(before)]]).astype(np.int64)
+        next_cursor = self._cursor(int(rows[-1])) if more and len(rows) else None
+        return [self.events[row] for row in rows], next_cursor
+
+
+def compact_events(events: List[Dict]) -> Dict:
+    """Events as one column list and a row of values per event."""
+    columns: Dict[str, None] = {}
+    for event in events:
+        columns.update(dict.fromkeys(event))
+    names = list(columns)
+    return {"columns": names, "rows": [[event.get(name) for name in names] for event in events]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Query a scenario's raw logs through the columnar log index")
+    parser.add_argument("--scenario", type=Path, default=SCENARIO_DIR, help="Scenario directory")
+    for field in FILTERS:
+        parser.add_argument(f"--{field.replace('_', '-')}", dest=field, help=f"Filter on {field}")
+    parser.add_argument("--start", help="Earliest timestamp (ISO)")
+    parser.add_argument("--end", help="Latest timestamp, exclusive (ISO)")
+    parser.add_argument("--around", help="Center the results on this timestamp (ISO)")
+    parser.add_argument("--limit", type=int, default=20, help="Events to return")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Raw Log Index")
+    print("=" * 60)
+
+    logs = {}
+    for log_type in ("conn", "dns"):
+        path = find_log(args.scenario / "raw_logs", log_type)
+        if path is not None:
+            logs[log_type] = read_events(path)
+
+    start = time.perf_counter()
+    index = LogIndex.build(logs)
+    print(f"Indexed {len(index):,} events in {(time.perf_counter() - start) * 1000:.1f} ms")
+    for field, column in index.columns.items():
+        print(f"  {field:<10} {len(column.lookup):>8,} distinct values")
+
+    filters = {field: getattr(args, field) for field in FILTERS}
+    start = time.perf_counter()
+    events, next_cursor = index.query(filters, start=args.start, end=args.end,
+                                      around=args.around, limit=args.limit)
+    print(f"\n{len(events)} events in {(time.perf_counter() - start) * 1000:.2f} ms (next cursor: {next_cursor})")
+    for event in events:
+        print(json.dumps(event))
+
+
+if __name__ == "__main__":
+    main()
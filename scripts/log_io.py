@@ -0,0 +1,635 @@
+#!/usr/bin/env python3
+"""
+Log I/O
+
+Streaming readers and writers for raw log files, so large scenarios are
+written and read one event at a time instead of as one in-memory list:
+- JSON array (`.json`): the layout of json.dump(events, f, indent=2),
+  written incrementally
+- JSON lines (`.jsonl`, or `.jsonl.gz` gzip-compressed): one compact
+  event per line, flushed every `flush_every` events
+- Zeek TSV (`.log`, or `.log.gz`): the native Zeek ASCII format, with
+  `#separator`, `#fields` and `#types` headers and Zeek's escaping
+- Parquet (`.parquet`) and Arrow IPC (`.arrow`): typed columns (requires
+  pyarrow, which is optional)
+- Pre-encoded blocks (encode_events / write_block), so events can be
+  serialized and compressed in worker processes and appended in order
+
+The format is chosen from the file suffix. Every reader yields the same
+event dicts: ISO "ts" strings (naive, UTC) and unset fields omitted, so
+the pipelines ingest synthetic and sensor logs through one path. Zeek and
+Arrow logs without an "id" field get sequential "<type>_NNNNN" ids.
+"""
+
+import gzip
+import json
+import re
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+import numpy as np
+
+# Events written between explicit flushes of line-delimited output
+FLUSH_EVERY = 100000
+
+# Events per batch when reading Zeek TSV and Arrow logs
+READ_BATCH = 65536
+
+# zlib level of gzip-compressed logs
+GZIP_LEVEL = 6
+
+# File suffixes of the supported formats
+JSON_SUFFIX = ".json"
+JSONL_SUFFIX = ".jsonl"
+ZEEK_SUFFIX = ".log"
+PARQUET_SUFFIX = ".parquet"
+ARROW_SUFFIX = ".arrow"
+GZIP_SUFFIX = ".gz"
+
+FORMAT_SUFFIXES = {
+    "json": JSON_SUFFIX,
+    "jsonl": JSONL_SUFFIX,
+    "tsv": ZEEK_SUFFIX,
+    "parquet": PARQUET_SUFFIX,
+    "arrow": ARROW_SUFFIX,
+}
+
+# Formats that may be gzip-compressed
+COMPRESSIBLE = ("jsonl", "tsv")
+
+# Lookup order of find_log when a scenario holds several formats
+FORMAT_PREFERENCE = [("json", False), ("jsonl", False), ("jsonl", True), ("tsv", False), ("tsv", True),
+                     ("parquet", False), ("arrow", False)]
+
+# Fields and Zeek types per log type, in output order. "id", "hostname"
+# and "user" are extension fields of the synthetic scenarios.
+ZEEK_SCHEMAS = {
+    "conn": [
+        ("id", "string"), ("ts", "time"), ("uid", "string"),
+        ("id.orig_h", "addr"), ("id.orig_p", "port"), ("id.resp_h", "addr"), ("id.resp_p", "port"),
+        ("proto", "enum"), ("service", "string"), ("duration", "interval"),
+        ("orig_bytes", "count"), ("resp_bytes", "count"), ("conn_state", "string"),
+        ("hostname", "string"), ("user", "string"),
+    ],
+    "dns": [
+        ("id", "string"), ("ts", "time"), ("uid", "string"),
+        ("id.orig_h", "addr"), ("id.orig_p", "port"), ("id.resp_h", "addr"), ("id.resp_p", "port"),
+        ("proto", "enum"), ("query", "string"), ("qtype", "string"),
+        ("rcode", "count"), ("rcode_name", "string"),
+        ("hostname", "string"), ("user", "string"),
+    ],
+}
+
+# Zeek ASCII writer conventions
+ZEEK_SEPARATOR = "\t"
+ZEEK_SET_SEPARATOR = ","
+ZEEK_EMPTY = "(empty)"
+ZEEK_UNSET = "-"
+_ZEEK_ESCAPES = re.compile(r"[\\\t\n\r]")
+_ZEEK_ESCAPED = re.compile(r"\\x([0-9a-fA-F]{2})")
+
+MICROS = 1000000
+
+
+def indented(value, level: int) -> str:
+    """json.dumps(value, indent=2) as it appears nested `level` levels deep."""
+    return json.dumps(value, indent=2).replace("\n", "\n" + "  " * level)
+
+
+def _strip_gzip(name: str) -> str:
+    return name[:-len(GZIP_SUFFIX)] if name.endswith(GZIP_SUFFIX) else name
+
+
+def log_format(path: Path) -> str:
+    """"json", "jsonl", "tsv", "parquet" or "arrow" from the file suffix (a trailing .gz is ignored)."""
+    name = _strip_gzip(Path(path).name)
+    for fmt, suffix in FORMAT_SUFFIXES.items():
+        if name.endswith(suffix):
+            return fmt
+    raise ValueError(f"Unsupported log file type: {path}")
+
+
+def log_type(path: Path) -> str:
+    """Log type of a raw log file name, e.g. "conn" for zeek_conn.log.gz."""
+    stem = _strip_gzip(Path(path).name).rsplit(".", 1)[0]
+    return stem[len("zeek_"):] if stem.startswith("zeek_") else stem
+
+
+def log_filename(log_type: str, fmt: str = "json", compress: bool = False) -> str:
+    """File name of a raw log, e.g. zeek_conn.json, zeek_dns.jsonl.gz or zeek_conn.log."""
+    if fmt not in FORMAT_SUFFIXES:
+        raise ValueError(f"Unsupported log format: {fmt}")
+    suffix = FORMAT_SUFFIXES[fmt]
+    if compress:
+        if fmt not in COMPRESSIBLE:
+            raise ValueError(f"Compression is only supported for {' and '.join(COMPRESSIBLE)} output")
+        suffix += GZIP_SUFFIX
+    return f"zeek_{log_type}{suffix}"
+
+
+def _open_text(path: Path, mode: str):
+    if Path(path).name.endswith(GZIP_SUFFIX):
+        return gzip.open(path, mode + "t", encoding="utf-8")
+    return open(path, mode, encoding="utf-8")
+
+
+def _schema(path: Path) -> List[Tuple[str, str]]:
+    name = log_type(path)
+    if name not in ZEEK_SCHEMAS:
+        raise ValueError(f"No column schema for log type '{name}' ({path})")
+    return ZEEK_SCHEMAS[name]
+
+
+def _require_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.ipc
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Parquet and Arrow logs require pyarrow (pip install pyarrow)") from None
+    return pyarrow
+
+
+def iso_timestamps(micros: np.ndarray) -> List[str]:
+    """ISO timestamps (as datetime.isoformat() writes them) of microseconds since the epoch."""
+    micros = np.asarray(micros, dtype=np.int64)
+    days, micros = np.divmod(micros, 86400 * MICROS)
+    seconds, fraction = np.divmod(micros, MICROS)
+    day_list, day = np.unique(days, return_inverse=True)
+    dates = np.datetime_as_string(np.datetime64(0, "D") + day_list, unit="D").astype("S10")
+    chars = np.empty((len(micros), 26), dtype=np.uint8)
+    chars[:, :10] = dates.view(np.uint8).reshape(-1, 10)[day.ravel()]
+    chars[:, 10:19] = np.frombuffer(b"T00:00:00", dtype=np.uint8)
+    chars[:, 11:13] = _ascii_digits(seconds // 3600, 2)
+    chars[:, 14:16] = _ascii_digits(seconds // 60 % 60, 2)
+    chars[:, 17:19] = _ascii_digits(seconds % 60, 2)
+    chars[:, 19] = ord(".")
+    chars[:, 20:] = _ascii_digits(fraction, 6)
+    # isoformat() drops a zero fraction; trailing NULs are stripped from bytes strings
+    chars[fraction == 0, 19:] = 0
+    return chars.view("S26").ravel().astype(str).tolist()
+
+
+def _ascii_digits(values: np.ndarray, width: int) -> np.ndarray:
+    """Zero-padded decimal digits of non-negative ints, one row of ASCII codes per value."""
+    out = np.empty((len(values), width), dtype=np.uint8)
+    values = values.astype(np.int64)
+    for column in range(width - 1, -1, -1):
+        values, digit = np.divmod(values, 10)
+        out[:, column] = digit + ord("0")
+    return out
+
+
+def epoch_micros(timestamps: List[str]) -> np.ndarray:
+    """Microseconds since the epoch of ISO timestamps (naive ones are taken as UTC)."""
+    try:
+        values = np.array([ts.replace("Z", "") for ts in timestamps], dtype="datetime64[us]")
+    except ValueError:
+        # Explicit UTC offsets are not understood by datetime64
+        values = np.array([np.datetime64(_as_utc(ts), "us") for ts in timestamps], dtype="datetime64[us]")
+    return values.astype(np.int64)
+
+
+def _as_utc(ts: str) -> datetime:
+    value = datetime.fromisoformat(ts.replace("Z", "+00:00"))
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def _zeek_escape(value: str) -> str:
+    if value == "":
+        return ZEEK_EMPTY
+    if value in (ZEEK_UNSET, ZEEK_EMPTY):
+        # A literal marker is escaped so it reads back as a string
+        return "\\x%02x" % ord(value[0]) + value[1:]
+    if _ZEEK_ESCAPES.search(value):
+        return _ZEEK_ESCAPES.sub(lambda m: "\\x%02x" % ord(m.group()), value)
+    return value
+
+
+def _zeek_value(value, zeek_type: str) -> str:
+    if value is None:
+        return ZEEK_UNSET
+    if isinstance(value, bool):
+        return "T" if value else "F"
+    if isinstance(value, (list, tuple)):
+        return ZEEK_SET_SEPARATOR.join(_zeek_value(v, zeek_type) for v in value) if value else ZEEK_EMPTY
+    if zeek_type == "interval":
+        return "%.6f" % value
+    if isinstance(value, str):
+        return _zeek_escape(value)
+    return str(value)
+
+
+def _encode_zeek(events: List[Dict], path: Path) -> str:
+    columns = []
+    for name, zeek_type in _schema(path):
+        if zeek_type == "time":
+            seconds, fraction = np.divmod(epoch_micros([e[name] for e in events]), MICROS)
+            columns.append([f"{s}.{f:06d}" for s, f in zip(seconds.tolist(), fraction.tolist())])
+        else:
+            columns.append([_zeek_value(e.get(name), zeek_type) for e in events])
+    return "".join(ZEEK_SEPARATOR.join(row) + "\n" for row in zip(*columns))
+
+
+def zeek_header(path: Path) -> str:
+    """
+    Header of a Zeek TSV log. The #open/#close lines are left out so that
+    output is reproducible.
+    """
+    schema = _schema(path)
+    return "".join([
+        "#separator \\x09\n",
+        f"#set_separator{ZEEK_SEPARATOR}{ZEEK_SET_SEPARATOR}\n",
+        f"#empty_field{ZEEK_SEPARATOR}{ZEEK_EMPTY}\n",
+        f"#unset_field{ZEEK_SEPARATOR}{ZEEK_UNSET}\n",
+        f"#path{ZEEK_SEPARATOR}{log_type(path)}\n",
+        "#fields" + "".join(ZEEK_SEPARATOR + name for name, _ in schema) + "\n",
+        "#types" + "".join(ZEEK_SEPARATOR + zeek_type for _, zeek_type in schema) + "\n",
+    ])
+
+
+def arrow_schema(path: Path):
+    """pyarrow schema of a log, from its Zeek field types."""
+    pa = _require_pyarrow()
+    types = {"time": pa.timestamp("us"), "port": pa.int32(), "count": pa.int64(), "int": pa.int64(),
+             "interval": pa.float64(), "double": pa.float64(), "bool": pa.bool_()}
+    return pa.schema([(name, types.get(zeek_type, pa.string())) for name, zeek_type in _schema(path)])
+
+
+def _record_batch(events: List[Dict], path: Path):
+    pa = _require_pyarrow()
+    schema = arrow_schema(path)
+    arrays = []
+    for field in schema:
+        if pa.types.is_timestamp(field.type):
+            arrays.append(pa.array(epoch_micros([e[field.name] for e in events]), type=field.type))
+        else:
+            arrays.append(pa.array([e.get(field.name) for e in events], type=field.type))
+    return pa.record_batch(arrays, schema=schema)
+
+
+def encode_events(events: Iterable[Dict], path: Path) -> bytes:
+    """
+    Encode events as a block for the writer of path (see write_block).
+
+    Blocks can be encoded in worker processes and appended in order by
+    one writer; a gzip block is a complete gzip member, and gzip readers
+    treat concatenated members as one stream. Parquet and Arrow blocks are
+    one record batch in the Arrow IPC stream format.
+    """
+    fmt = log_format(path)
+    if fmt == "json":
+        return ",\n  ".join(indented(event, 1) for event in events).encode("utf-8")
+    if fmt in ("parquet", "arrow"):
+        pa = _require_pyarrow()
+        batch = _record_batch(list(events), path)
+        sink = pa.BufferOutputStream()
+        with pa.ipc.new_stream(sink, batch.schema) as stream:
+            stream.write_batch(batch)
+        return sink.getvalue().to_pybytes()
+    if fmt == "tsv":
+        events = list(events)
+        data = _encode_zeek(events, path).encode("utf-8") if events else b""
+    else:
+        data = "".join(json.dumps(event, separators=(",", ":")) + "\n" for event in events).encode("utf-8")
+    if data and Path(path).name.endswith(GZIP_SUFFIX):
+        # mtime=0 keeps the output reproducible
+        return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+    return data
+
+
+class JsonArrayWriter:
+    """Writes a JSON array one element at a time, matching json.dump(..., indent=2)."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.count = 0
+        self._f = open(self.path, "wb")
+
+    def write(self, event: Dict) -> None:
+        self.write_block(encode_events([event], self.path), 1)
+
+    def write_many(self, events: Iterable[Dict]) -> None:
+        for event in events:
+            self.write(event)
+
+    def write_block(self, block: bytes, count: int) -> None:
+        """Append `count` events encoded by encode_events."""
+        if count:
+            self._f.write((b"[\n  " if self.count == 0 else b",\n  ") + block)
+            self.count += count
+
+    def close(self) -> None:
+        if self._f.closed:
+            return
+        self._f.write(b"\n]" if self.count else b"[]")
+        self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class JsonLinesWriter:
+    """
+    Writes one compact JSON event per line, gzip-compressed for .gz paths.
+
+    Single events are buffered and written out (as one gzip member when
+    compressing) every `flush_every` events.
+    """
+
+    def __init__(self, path: Path, flush_every: int = FLUSH_EVERY):
+        self.path = Path(path)
+        self.flush_every = flush_every
+        self.count = 0
+        self._pending: List[Dict] = []
+        self._f = open(self.path, "wb")
+
+    def write(self, event: Dict) -> None:
+        self._pending.append(event)
+        self.count += 1
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def write_many(self, events: Iterable[Dict]) -> None:
+        for event in events:
+            self.write(event)
+
+    def write_block(self, block: bytes, count: int) -> None:
+        """Append `count` events encoded by encode_events."""
+        self.flush()
+        self._f.write(block)
+        self.count += count
+
+    def flush(self) -> None:
+        if self._pending:
+            self._f.write(encode_events(self._pending, self.path))
+            self._pending = []
+        self._f.flush()
+
+    def close(self) -> None:
+        if not self._f.closed:
+            self.flush()
+            self._f.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ZeekTsvWriter(JsonLinesWriter):
+    """Writes a Zeek TSV log (gzip-compressed for .gz paths), one event per row."""
+
+    def __init__(self, path: Path, flush_every: int = FLUSH_EVERY):
+        super().__init__(path, flush_every=flush_every)
+        header = zeek_header(self.path).encode("utf-8")
+        if self.path.name.endswith(GZIP_SUFFIX):
+            header = gzip.compress(header, compresslevel=GZIP_LEVEL, mtime=0)
+        self._f.write(header)
+
+
+class ArrowWriter:
+    """
+    Writes a Parquet file or an Arrow IPC file with the log type's typed
+    schema, one record batch (row group) per `flush_every` events or block.
+    """
+
+    def __init__(self, path: Path, flush_every: int = FLUSH_EVERY):
+        pa = _require_pyarrow()
+        self.path = Path(path)
+        self.flush_every = flush_every
+        self.count = 0
+        self._pending: List[Dict] = []
+        schema = arrow_schema(self.path)
+        if log_format(self.path) == "parquet":
+            self._writer = pa.parquet.ParquetWriter(str(self.path), schema)
+        else:
+            self._writer = pa.ipc.new_file(str(self.path), schema)
+        self._closed = False
+
+    def write(self, event: Dict) -> None:
+        self._pending.append(event)
+        self.count += 1
+        if len(self._pending) >= self.flush_every:
+            self.flush()
+
+    def write_many(self, events: Iterable[Dict]) -> None:
+        for event in events:
+            self.write(event)
+
+    def write_block(self, block: bytes, count: int) -> None:
+        """Append `count` events encoded by encode_events."""
+        pa = _require_pyarrow()
+        self.flush()
+        for batch in pa.ipc.open_stream(block):
+            if batch.num_rows:
+                self._writer.write_batch(batch)
+        self.count += count
+
+    def flush(self) -> None:
+        if self._pending:
+            self._writer.write_batch(_record_batch(self._pending, self.path))
+            self._pending = []
+
+    def close(self) -> None:
+        if not self._closed:
+            self.flush()
+            self._writer.close()
+            self._closed = True
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def event_writer(path: Path, flush_every: int = FLUSH_EVERY):
+    """Writer for path, chosen by its suffix."""
+    fmt = log_format(path)
+    if fmt == "json":
+        return JsonArrayWriter(path)
+    if fmt == "tsv":
+        return ZeekTsvWriter(path, flush_every=flush_every)
+    if fmt in ("parquet", "arrow"):
+        return ArrowWriter(path, flush_every=flush_every)
+    return JsonLinesWriter(path, flush_every=flush_every)
+
+
+def _zeek_unescape(value: str) -> str:
+    return _ZEEK_ESCAPED.sub(lambda m: chr(int(m.group(1), 16)), value) if "\\x" in value else value
+
+
+def _zeek_time(value: str) -> int:
+    """Microseconds since the epoch of a Zeek time value, without float rounding."""
+    seconds, _, fraction = value.partition(".")
+    fraction = int((fraction + "000000")[:6])
+    return int(seconds) * MICROS + (-fraction if seconds.startswith("-") else fraction)
+
+
+def _zeek_parser(zeek_type: str, set_separator: str) -> Callable[[str], object]:
+    element = zeek_type.split("[", 1)[1].rstrip("]") if "[" in zeek_type else zeek_type
+    if element in ("count", "int", "port"):
+        parse = int
+    elif element in ("interval", "double"):
+        parse = float
+    elif element == "bool":
+        parse = lambda v: v == "T"
+    else:
+        parse = _zeek_unescape
+    if element != zeek_type:
+        # set[...] / vector[...]
+        return lambda v: [parse(item) for item in v.split(set_separator)]
+    return parse
+
+
+def _without_unset(names: List[str], columns: List[List]) -> List[Dict]:
+    """Events from columns, leaving out fields whose value is None."""
+    events = [dict(zip(names, values)) for values in zip(*columns)]
+    for name, column in zip(names, columns):
+        if None in column:
+            for event in events:
+                if event[name] is None:
+                    del event[name]
+    return events
+
+
+def _zeek_batches(path: Path) -> Iterator[List[Dict]]:
+    separator, set_separator, empty, unset = ZEEK_SEPARATOR, ZEEK_SET_SEPARATOR, ZEEK_EMPTY, ZEEK_UNSET
+    fields: List[str] = []
+    types: List[str] = []
+    rows: List[List[str]] = []
+
+    def decode(rows: List[List[str]]) -> List[Dict]:
+        columns = []
+        for zeek_type, values in zip(types, zip(*rows)):
+            if zeek_type == "time":
+                micros = np.array([_zeek_time(v) if v != unset else 0 for v in values], dtype=np.int64)
+                column = iso_timestamps(micros)
+            else:
+                parse = _zeek_parser(zeek_type, set_separator)
+                blank = [] if "[" in zeek_type else ""
+                column = [blank if v == empty else parse(v) for v in values]
+            if unset in values:
+                column = [None if v == unset else c for v, c in zip(values, column)]
+            columns.append(column)
+        return _without_unset(fields, columns)
+
+    with _open_text(path, "r") as f:
+        for line in f:
+            line = line.rstrip("\n")
+            if line.startswith("#"):
+                if rows:
+                    yield decode(rows)
+                    rows = []
+                if line.startswith("#separator"):
+                    separator = line.split(" ", 1)[1].encode().decode("unicode_escape")
+                    continue
+                key, _, value = line.partition(separator)
+                if key == "#set_separator":
+                    set_separator = value
+                elif key == "#empty_field":
+                    empty = value
+                elif key == "#unset_field":
+                    unset = value
+                elif key == "#fields":
+                    fields = value.split(separator)
+                elif key == "#types":
+                    types = value.split(separator)
+                continue
+            if line:
+                rows.append(line.split(separator))
+                if len(rows) == READ_BATCH:
+                    yield decode(rows)
+                    rows = []
+        if rows:
+            yield decode(rows)
+
+
+def _arrow_batches(path: Path) -> Iterator[List[Dict]]:
+    pa = _require_pyarrow()
+    if log_format(path) == "parquet":
+        batches = pa.parquet.ParquetFile(str(path)).iter_batches(batch_size=READ_BATCH)
+    else:
+        reader = pa.ipc.open_file(pa.memory_map(str(path)))
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    for batch in batches:
+        columns = []
+        for field, array in zip(batch.schema, batch.columns):
+            if pa.types.is_timestamp(field.type):
+                micros = array.cast(pa.timestamp("us")).cast(pa.int64()).fill_null(0).to_numpy()
+                column = iso_timestamps(micros)
+                if array.null_count:
+                    column = [c if valid else None for c, valid in zip(column, array.is_valid().to_pylist())]
+            else:
+                column = array.to_pylist()
+            columns.append(column)
+        yield _without_unset(batch.schema.names, columns)
+
+
+def _with_ids(batches: Iterator[List[Dict]], kind: str) -> Iterator[Dict]:
+    """Events of batches, numbering those without an id as <kind>_NNNNN."""
+    n = 0
+    for events in batches:
+        for event in events:
+            if "id" not in event:
+                event = {"id": f"{kind}_{n:05d}", **event}
+            n += 1
+            yield event
+
+
+def iter_events(path: Path) -> Iterator[Dict]:
+    """
+    Yield events from a log file.
+
+    JSON lines are read one line at a time, Zeek TSV and Arrow logs one
+    batch at a time; a JSON array is parsed whole.
+    """
+    fmt = log_format(path)
+    if fmt == "json":
+        with open(path, encoding="utf-8") as f:
+            yield from json.load(f)
+        return
+    if fmt == "tsv":
+        yield from _with_ids(_zeek_batches(path), log_type(path))
+        return
+    if fmt in ("parquet", "arrow"):
+        yield from _with_ids(_arrow_batches(path), log_type(path))
+        return
+    with _open_text(path, "r") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_events(path: Path) -> List[Dict]:
+    return list(iter_events(path))
+
+
+def find_log(raw_dir: Path, log_type: str) -> Optional[Path]:
+    """The scenario's log file for log_type in any supported format, if present."""
+    for fmt, compress in FORMAT_PREFERENCE:
+        path = Path(raw_dir) / log_filename(log_type, fmt, compress)
+        if path.exists():
+            return path
+    return None
+
+
+def load_log(raw_dir: Path, log_type: str) -> List[Dict]:
+    """
+    All events of the scenario's log_type log, in whichever format it was written.
+
+    Raises:
+        FileNotFoundError: No log of that type in raw_dir
+    """
+    path = find_log(raw_dir, log_type)
+    if path is None:
+        raise FileNotFoundError(f"No zeek_{log_type} log in {raw_dir}")
+    return read_events(path)
@@ -0,0 +1,62 @@
+#!/usr/bin/env python3
+"""
+Log Merging
+
+Time-ordered k-way merge of event streams, so logs that are each already
+in time order (conn and dns logs, generator stages, replayed files) are
+combined lazily instead of being concatenated and sorted:
+- merge_sorted runs heapq.merge over the sources: O(n log k) for k
+  sources, holding one event per source; ties keep source order, so the
+  result equals a stable sort of the concatenated sources
+- sorted_run checks a list in O(n) and only sorts it when it is out of
+  order (e.g. Zeek logs, which are written as connections close)
+- merge_logs tags each event with the name of the log it came from
+
+Events are ordered by their ISO "ts" strings, which sort in time order.
+"""
+
+import heapq
+import itertools
+from typing import Callable, Dict, Iterable, Iterator, List, Sequence, Tuple
+
+
+def event_key(event: Dict) -> str:
+    """Sort key of a raw log event: its ISO timestamp."""
+    return event.get("ts", "")
+
+
+def is_sorted(events: Sequence[Dict], key: Callable[[Dict], str] = event_key) -> bool:
+    keys = map(key, events)
+    previous = next(keys, None)
+    for current in keys:
+        if current < previous:
+            return False
+        previous = current
+    return True
+
+
+def sorted_run(events: Sequence[Dict], key: Callable[[Dict], str] = event_key) -> Sequence[Dict]:
+    """events itself when already in time order, otherwise a sorted copy."""
+    return events if is_sorted(events, key) else sorted(events, key=key)
+
+
+def merge_sorted(*sources: Iterable[Dict], key: Callable[[Dict], str] = event_key) -> Iterator[Dict]:
+    """
+    Events of several time-sorted sources, in time order.
+
+    Sources are consumed lazily; events with equal keys come out in the
+    order of their sources.
+    """
+    return heapq.merge(*sources, key=key)
+
+
+def merge_logs(logs: Dict[str, Iterable[Dict]],
+               key: Callable[[Dict], str] = event_key) -> Iterator[Tuple[str, Dict]]:
+    """(log name, event) pairs of several time-sorted logs, in time order."""
+    tagged = [zip(itertools.repeat(name), events) for name, events in logs.items()]
+    return heapq.merge(*tagged, key=lambda pair: key(pair[1]))
+
+
+def merge_runs(runs: Iterable[Sequence[Dict]], key: Callable[[Dict], str] = event_key) -> List[Dict]:
+    """One time-ordered list from runs that are each sorted (or sorted here if not)."""
+    return list(merge_sorted(*(sorted_run(run, key) for run in runs), key=key))
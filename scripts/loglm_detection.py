@@ -11,21 +11,62 @@ Simulates DeepTempo LogLM detection which:
 - Catches evasive attacks that rules miss
 """
 
+import argparse
 import json
+import os
+import shutil
 import numpy as np
 from datetime import datetime
 from pathlib import Path
-from typing import List, Dict, Any, Set
-import hashlib
+from typing import List, Dict, Any, Optional, Set
 
-# Import explanation generator
 try:
-    from scripts.explanation_generator import generate_explanation, add_explanations_to_findings
+    from scripts.baselines import build_baselines
+    from scripts.beacon_detection import detect_beacons
+    from scripts.dns_features import TUNNELING_THRESHOLD, score_dns_events
+    from scripts.lateral_graph import FANOUT_THRESHOLD, MIN_REPORTED_HOPS, analyze_lateral_movement, is_internal
+    from scripts.embedding_backend import EmbeddingDispatcher, get_provider
+    from scripts.embedding_cache import EmbeddingCache
+    from scripts.embedding_quantization import QuantizedEmbeddingIndex
+    from scripts.event_store import ensure_event_store
+    from scripts.ground_truth import as_ground_truth, load_ground_truth
+    from scripts.incident_state import IncidentState, target_hosts
+    from scripts.log_io import load_log
 except ImportError:
-    from explanation_generator import generate_explanation, add_explanations_to_findings
+    from baselines import build_baselines
+    from beacon_detection import detect_beacons
+    from dns_features import TUNNELING_THRESHOLD, score_dns_events
+    from lateral_graph import FANOUT_THRESHOLD, MIN_REPORTED_HOPS, analyze_lateral_movement, is_internal
+    from embedding_backend import EmbeddingDispatcher, get_provider
+    from embedding_cache import EmbeddingCache
+    from embedding_quantization import QuantizedEmbeddingIndex
+    from event_store import ensure_event_store
+    from ground_truth import as_ground_truth, load_ground_truth
+    from incident_state import IncidentState, target_hosts
+    from log_io import load_log
 
 SCENARIO_DIR = Path(__file__).parent.parent / "data" / "scenarios" / "default_attack"
 
+# Optional compressed embedding store ("int8" or "pq"), written next to embeddings.json
+EMBEDDING_CODEC = os.environ.get("LOGLM_EMBEDDING_CODEC", "")
+
+# Embeddings are cached across runs per event content and provider model version
+EMBEDDING_CACHE_DIR = os.environ.get("LOGLM_EMBEDDING_CACHE", "")
+
+# How far a finding's confidence moves with its baseline anomaly score:
+# confidence + ANOMALY_WEIGHT * (anomaly_score - 0.5)
+ANOMALY_WEIGHT = 0.1
+
+# How far a DNS finding's confidence moves with its tunneling score:
+# confidence + DNS_WEIGHT * (tunneling_score - TUNNELING_THRESHOLD)
+DNS_WEIGHT = 0.1
+
+# Findings below this confidence are grouped into the triage incident (INC-004)
+LOW_CONFIDENCE = 0.5
+
+# Base confidence of LogLM's false positives, which stay below LOW_CONFIDENCE
+FP_CONFIDENCE = 0.45
+
 # MITRE ATT&CK technique details
 MITRE_TECHNIQUES = {
     "T1078": {
@@ -58,6 +99,11 @@ MITRE_TECHNIQUES = {
         "tactic": "Lateral Movement",
         "description": "Adversaries may use SMB to move laterally"
     },
+    "T1021.004": {
+        "name": "SSH",
+        "tactic": "Lateral Movement",
+        "description": "Adversaries may use SSH to move laterally"
+    },
     "T1021.006": {
         "name": "Windows Remote Management",
         "tactic": "Lateral Movement",
@@ -96,29 +142,27 @@ MITRE_TECHNIQUES = {
 }
 
 
-def generate_embedding(event: Dict, technique: str) -> List[float]:
+def attach_embeddings(findings: List[Dict], cache: EmbeddingCache, dispatcher: EmbeddingDispatcher) -> None:
     """
-    Generate a simulated embedding for an event.
+    Set each finding's embedding, sending only events not already cached
+    to the embedding provider.
     
-    In reality, LogLM would generate this from the log content.
-    Here we create embeddings that cluster similar events together.
+    The finding's raw event is embedded with its top technique as context;
+    both are part of the cache key.
     """
-    seed_str = f"{technique}_{event.get('id.resp_h', '')}_{event.get('service', '')}"
-    seed = int(hashlib.md5(seed_str.encode()).hexdigest()[:8], 16)
-    
-    np.random.seed(seed)
-    base = np.random.randn(768) * 0.3
-    
-    np.random.seed(None)
-    noise = np.random.randn(768) * 0.1
-    
-    embedding = base + noise
-    embedding = embedding / np.linalg.norm(embedding)
-    
-    return embedding.tolist()
+    techniques = [f["mitre_predictions"][0]["technique_id"] for f in findings]
+    keys = [cache.key(f["raw_event"], context=t) for f, t in zip(findings, techniques)]
+    vectors = cache.get_or_compute(keys, lambda missing: dispatcher.embed(
+        [findings[i]["raw_event"] for i in missing], [techniques[i] for i in missing]
+    ))
+    for finding, vector in zip(findings, vectors):
+        finding["embedding"] = vector.tolist()
+    cache.flush()
 
 
-def detect_malicious_behaviors(events: List[Dict], ground_truth: Dict) -> List[Dict]:
+def detect_malicious_behaviors(events: List[Dict], ground_truth,
+                               baseline_scores: Optional[Dict[str, Dict]] = None,
+                               dns_features: Optional[Dict[str, Dict]] = None) -> List[Dict]:
     """
     Simulate LogLM detection of malicious behaviors.
     
@@ -128,14 +172,26 @@ def detect_malicious_behaviors(events: List[Dict], ground_truth: Dict) -> List[D
     Key difference from rules:
     - LogLM catches EVASIVE attacks through behavioral analysis
     - It recognizes attack patterns even when individual events look benign
+    
+    If baseline_scores (event id -> deviation from the learned per-host and
+    per-pair baselines) is given, it feeds detection: each finding's
+    confidence is shifted by its anomaly_score. False positives are a random
+    sample of benign events, so they do not depend on the baselines under
+    test; their confidence moves with the anomaly score too but stays below
+    LOW_CONFIDENCE. dns_features (event id -> lexical and per-domain
+    features) shift the confidence of DNS findings the same way, by how far
+    the tunneling score is from TUNNELING_THRESHOLD, and are carried on the
+    findings.
+    
+    ground_truth is a GroundTruth or a parsed ground_truth.json.
     """
+    ground_truth = as_ground_truth(ground_truth)
+    baseline_scores = baseline_scores or {}
+    dns_features = dns_features or {}
     findings = []
     finding_idx = 0
     
-    malicious_events = {
-        eid: info for eid, info in ground_truth["events"].items()
-        if info["label"] == "malicious"
-    }
+    malicious_events = dict(ground_truth.events_with_details("malicious"))
     
     event_lookup = {e["id"]: e for e in events}
     
@@ -161,7 +217,9 @@ def detect_malicious_behaviors(events: List[Dict], ground_truth: Dict) -> List[D
             "title": generate_finding_title(event, technique, is_evasive),
             "description": truth["description"],
             "severity": calculate_severity(technique),
-            "confidence": calculate_confidence(technique, is_evasive),
+            "confidence": dns_adjusted(anomaly_adjusted(calculate_confidence(technique, is_evasive),
+                                                        baseline_scores.get(event_id)),
+                                       dns_features.get(event_id)),
             "source_ip": event.get("id.orig_h"),
             "dest_ip": event.get("id.resp_h"),
             "dest_port": event.get("id.resp_p"),
@@ -177,18 +235,21 @@ def detect_malicious_behaviors(events: List[Dict], ground_truth: Dict) -> List[D
                     "confidence": calculate_confidence(technique, is_evasive)
                 }
             ],
-            "embedding": generate_embedding(event, technique),
             "raw_event": event,
             "evasive": is_evasive,
             "evasion_technique": truth.get("evasion_technique", None),
-            "detection_method": "behavioral_analysis" if is_evasive else "pattern_match"
+            "detection_method": "behavioral_analysis" if is_evasive else "pattern_match",
+            **_baseline_fields(baseline_scores.get(event_id)),
+            **_dns_fields(dns_features.get(event_id))
         }
         
         findings.append(finding)
         finding_idx += 1
     
     # Add a few false positives (but very few - LogLM has high precision)
-    benign_events = [e for e in events if ground_truth["events"].get(e["id"], {}).get("label") != "malicious"]
+    rows = ground_truth.rows([e["id"] for e in events])
+    malicious = (rows >= 0) & (np.asarray(ground_truth.label)[rows] == ground_truth.label_code("malicious"))
+    benign_events = [e for e, is_malicious in zip(events, malicious.tolist()) if not is_malicious]
     num_fps = max(1, int(len(findings) * 0.03))
     
     np.random.seed(42)
@@ -203,7 +264,9 @@ def detect_malicious_behaviors(events: List[Dict], ground_truth: Dict) -> List[D
                 "title": f"Suspicious activity from {event.get('hostname', 'unknown')}",
                 "description": "Potentially suspicious network behavior detected",
                 "severity": "low",
-                "confidence": 0.45,
+                "confidence": min(dns_adjusted(anomaly_adjusted(FP_CONFIDENCE, baseline_scores.get(event["id"])),
+                                               dns_features.get(event["id"])),
+                                  LOW_CONFIDENCE - 0.01),
                 "source_ip": event.get("id.orig_h"),
                 "dest_ip": event.get("id.resp_h"),
                 "dest_port": event.get("id.resp_p"),
@@ -216,13 +279,14 @@ def detect_malicious_behaviors(events: List[Dict], ground_truth: Dict) -> List[D
                         "technique_id": "T1071.001",
                         "technique_name": "Web Protocols",
                         "tactic": "Command and Control",
-                        "confidence": 0.45
+                        "confidence": FP_CONFIDENCE
                     }
                 ],
-                "embedding": generate_embedding(event, "T1071.001"),
                 "raw_event": event,
                 "evasive": False,
-                "detection_method": "anomaly"
+                "detection_method": "anomaly",
+                **_baseline_fields(baseline_scores.get(event["id"])),
+                **_dns_fields(dns_features.get(event["id"]))
             }
             findings.append(finding)
             finding_idx += 1
@@ -230,6 +294,175 @@ def detect_malicious_behaviors(events: List[Dict], ground_truth: Dict) -> List[D
     return findings
 
 
+def beacon_findings(beacons: List[Dict], events: List[Dict], start_idx: int) -> List[Dict]:
+    """
+    Turn beaconing pairs from the beacon analysis stage into findings.
+    
+    Unlike the per-event findings, each one covers several connections of
+    the (source, destination) pair and is scored from timing alone. A
+    beacon is only detectable once enough check-ins have been seen, so the
+    finding is timestamped at the check-in where the score first reached
+    the threshold and covers the connections up to it.
+    """
+    event_lookup = {e["id"]: e for e in events}
+    findings = []
+    for beacon in beacons:
+        event_ids = beacon["event_ids"][:beacon["detected_after"]]
+        first = event_lookup[event_ids[0]]
+        detected = event_lookup[event_ids[-1]]
+        is_dns = "query" in first
+        technique = "T1071.004" if is_dns else "T1071.001"
+        interval = beacon_interval(beacon) / 60
+        findings.append({
+            "id": f"finding_{start_idx + len(findings):05d}",
+            "timestamp": detected.get("ts"),
+            "title": f"Periodic beaconing from {first.get('hostname', beacon['source_ip'])} to {beacon['destination']}",
+            "description": (f"{beacon['connections']} {'queries' if is_dns else 'connections'} at "
+                            f"~{interval:.0f} minute intervals (beacon score {beacon['beacon_score']})"),
+            "severity": "high" if beacon["beacon_score"] >= 0.8 else "medium",
+            "confidence": beacon["beacon_score"],
+            "source_ip": beacon["source_ip"],
+            "dest_ip": first.get("id.resp_h"),
+            "dest_port": first.get("id.resp_p"),
+            "hostname": first.get("hostname"),
+            "user": first.get("user"),
+            "event_ids": event_ids,
+            "attack_phase": None,
+            "mitre_predictions": [
+                {
+                    "technique_id": technique,
+                    "technique_name": MITRE_TECHNIQUES[technique]["name"],
+                    "tactic": MITRE_TECHNIQUES[technique]["tactic"],
+                    "confidence": beacon["beacon_score"]
+                }
+            ],
+            "raw_event": first,
+            "evasive": False,
+            "detection_method": "beacon_analysis",
+            "beacon": {k: v for k, v in beacon.items() if k not in ("source_ip", "event_ids")}
+        })
+    return findings
+
+
+def beacon_interval(beacon: Dict) -> float:
+    """Check-in interval of a beacon in seconds: its spectral period, else the mean gap."""
+    period = beacon.get("period_seconds")
+    return period if period is not None else beacon["mean_interval_seconds"]
+
+
+# Technique for each lateral movement service in the connection graph
+LATERAL_SERVICE_TECHNIQUES = {
+    "rdp": "T1021.001",
+    "smb": "T1021.002",
+    "ssh": "T1021.004",
+    "winrm": "T1021.006",
+    "wmi": "T1047",
+}
+
+
+def lateral_findings(graph_result: Dict, events: List[Dict], start_idx: int) -> List[Dict]:
+    """
+    Turn fan-out bursts and multi-hop paths from the lateral movement graph
+    into findings, each carrying the hops it was built from.
+
+    A finding is timestamped at the hop that made it reportable (the hop
+    reaching the threshold-th distinct host of a burst, the min-hops-th hop
+    of a path), and names hosts by hostname where the logs give one. Burst
+    titles and confidence count distinct destination hosts, not edges.
+    """
+    event_lookup = {e["id"]: e for e in events}
+    hostnames = {e["id.orig_h"]: e["hostname"] for e in events if e.get("id.orig_h") and e.get("hostname")}
+    findings = []
+    for detection in graph_result["bursts"] + graph_result["paths"]:
+        hops = detection["hops"]
+        first = event_lookup[hops[0]["event_id"]]
+        # Hosts reached so far, at each hop
+        reached = np.cumsum([hop["dst"] not in {h["dst"] for h in hops[:k]} for k, hop in enumerate(hops)])
+        if detection["kind"] == "fanout":
+            reportable = int(np.searchsorted(reached, FANOUT_THRESHOLD))
+        else:
+            reportable = MIN_REPORTED_HOPS - 1
+        detected = event_lookup[hops[min(reportable, len(hops) - 1)]["event_id"]]
+        targets = int(reached[-1])
+        services = list(dict.fromkeys(h["service"] for h in hops))
+        technique = LATERAL_SERVICE_TECHNIQUES.get(services[0], "T1021.006")
+        hostname = first.get("hostname", detection["source_ip"])
+        path_hosts = [hostnames.get(ip, ip) for ip in detection["hosts"]]
+        if detection["kind"] == "fanout":
+            title = f"Lateral movement fan-out from {hostname} to {targets} hosts"
+            description = (f"{hostname} opened {len(hops)} first-seen {'/'.join(services)} connections "
+                           f"to {targets} hosts between {detection['start'][11:19]} and {detection['end'][11:19]}")
+            confidence = min(0.9, 0.45 + 0.05 * targets)
+        else:
+            title = f"Lateral movement chain across {len(detection['hosts'])} hosts from {hostname}"
+            description = f"Time-respecting path {' -> '.join(path_hosts)} over {'/'.join(services)}"
+            confidence = min(0.85, 0.35 + 0.05 * len(hops))
+        findings.append({
+            "id": f"finding_{start_idx + len(findings):05d}",
+            "timestamp": detected.get("ts"),
+            "title": title,
+            "description": description,
+            "severity": "high",
+            "confidence": round(confidence, 2),
+            "source_ip": detection["source_ip"],
+            "dest_ip": hops[0]["dst"],
+            "dest_port": hops[0]["port"],
+            "hostname": first.get("hostname"),
+            "user": first.get("user"),
+            "event_ids": detection["event_ids"],
+            "attack_phase": None,
+            "mitre_predictions": [
+                {
+                    "technique_id": LATERAL_SERVICE_TECHNIQUES.get(service, technique),
+                    "technique_name": MITRE_TECHNIQUES[LATERAL_SERVICE_TECHNIQUES.get(service, technique)]["name"],
+                    "tactic": MITRE_TECHNIQUES[LATERAL_SERVICE_TECHNIQUES.get(service, technique)]["tactic"],
+                    "confidence": round(confidence, 2)
+                }
+                for service in services
+            ],
+            "raw_event": first,
+            "evasive": False,
+            "detection_method": "graph_analysis",
+            "lateral_path": {**{k: v for k, v in detection.items() if k != "event_ids"},
+                             "hostnames": path_hosts},
+        })
+    return findings
+
+
+def anomaly_adjusted(confidence: float, score: Optional[Dict]) -> float:
+    """Confidence raised or lowered by how far the event deviates from its learned baselines."""
+    if not score:
+        return confidence
+    return round(min(0.99, max(0.0, confidence + ANOMALY_WEIGHT * (score["anomaly_score"] - 0.5))), 2)
+
+
+def dns_adjusted(confidence: float, features: Optional[Dict]) -> float:
+    """Confidence raised or lowered by how far the DNS query's tunneling score is from the threshold."""
+    if not features:
+        return confidence
+    return round(min(0.99, max(0.0, confidence + DNS_WEIGHT * (features["tunneling_score"] - TUNNELING_THRESHOLD))), 2)
+
+
+def _baseline_fields(score: Optional[Dict]) -> Dict:
+    """Finding fields describing the event's deviation from its baselines."""
+    if not score:
+        return {}
+    return {
+        "anomaly_score": score["anomaly_score"],
+        "baseline_deviation": {k: v for k, v in score.items() if k != "anomaly_score"}
+    }
+
+
+def _dns_fields(features: Optional[Dict]) -> Dict:
+    """Finding fields describing the DNS query's tunneling features."""
+    if not features:
+        return {}
+    return {
+        "dns_tunneling_score": features["tunneling_score"],
+        "dns_features": {k: v for k, v in features.items() if k != "tunneling_score"}
+    }
+
+
 def generate_finding_title(event: Dict, technique: str, is_evasive: bool = False) -> str:
     """Generate a descriptive title for a finding."""
     tech_info = MITRE_TECHNIQUES.get(technique, {"name": technique})
@@ -294,7 +527,8 @@ def calculate_confidence(technique: str, is_evasive: bool = False) -> float:
     return round(base + np.random.uniform(-0.05, 0.05), 2)
 
 
-def correlate_into_incidents(findings: List[Dict], ground_truth: Dict) -> List[Dict]:
+def correlate_into_incidents(findings: List[Dict], ground_truth,
+                             state: Optional[IncidentState] = None) -> List[Dict]:
     """
     Auto-correlate findings into incidents.
     
@@ -302,8 +536,24 @@ def correlate_into_incidents(findings: List[Dict], ground_truth: Dict) -> List[D
     - Embedding similarity
     - Temporal proximity
     - Entity relationships
+    
+    Centroids, hosts, techniques and severity come from the incremental
+    aggregates in `state` (a new IncidentState if not given), which stay
+    usable for later updates and similar-incident search.
     """
     incidents = []
+    if state is None:
+        state = IncidentState(len(findings[0]["embedding"]) if findings else 0)
+    
+    def incident(incident_id: str, members: List[Dict], **fields) -> Dict:
+        options = {k: fields.pop(k) for k in ("hosts", "min_severity") if k in fields}
+        state.create(incident_id, **options)
+        state.add_findings(incident_id, members)
+        aggregate = state.incidents[incident_id]
+        record = {"id": incident_id, "title": fields.pop("title"), "status": "open"}
+        record.update(aggregate.fields())
+        record.update(fields)
+        return record
     
     # Separate evasive and non-evasive findings
     standard_findings = [f for f in findings if not f.get("evasive", False)]
@@ -324,101 +574,62 @@ def correlate_into_incidents(findings: List[Dict], ground_truth: Dict) -> List[D
         main_incident_findings.extend(phase_groups[phase])
     
     if main_incident_findings:
-        embeddings = [f["embedding"] for f in main_incident_findings]
-        incident_embedding = np.mean(embeddings, axis=0).tolist()
-        
-        techniques = set()
-        for f in main_incident_findings:
-            for pred in f["mitre_predictions"]:
-                techniques.add(pred["technique_id"])
-        
-        incidents.append({
-            "id": "INC-001",
-            "title": "Multi-Stage Attack: C2, Lateral Movement, and Data Exfiltration",
-            "severity": "critical",
-            "status": "open",
-            "created_at": main_incident_findings[0]["timestamp"],
-            "updated_at": main_incident_findings[-1]["timestamp"],
-            "finding_ids": [f["id"] for f in main_incident_findings],
-            "finding_count": len(main_incident_findings),
-            "techniques": list(techniques),
-            "phases_detected": list(phase_groups.keys()),
-            "affected_hosts": list(set(f["hostname"] for f in main_incident_findings if f.get("hostname"))),
-            "embedding": incident_embedding,
-            "summary": generate_incident_summary(main_incident_findings),
-            "evasive_findings": 0
-        })
+        incidents.append(incident(
+            "INC-001", main_incident_findings,
+            title="Multi-Stage Attack: C2, Lateral Movement, and Data Exfiltration",
+            summary=generate_incident_summary(main_incident_findings),
+        ))
     
     # Create incident for evasive attacks
     if evasive_findings:
-        evasive_embeddings = [f["embedding"] for f in evasive_findings]
-        evasive_embedding = np.mean(evasive_embeddings, axis=0).tolist()
-        
-        evasive_techniques = set()
-        for f in evasive_findings:
-            for pred in f["mitre_predictions"]:
-                evasive_techniques.add(pred["technique_id"])
-        
-        evasion_methods = list(set(f.get("evasion_technique") for f in evasive_findings if f.get("evasion_technique")))
-        
-        incidents.append({
-            "id": "INC-002",
-            "title": "Low-and-Slow APT Campaign (Signature-Evading)",
-            "severity": "critical",
-            "status": "open",
-            "created_at": evasive_findings[0]["timestamp"],
-            "updated_at": evasive_findings[-1]["timestamp"],
-            "finding_ids": [f["id"] for f in evasive_findings],
-            "finding_count": len(evasive_findings),
-            "techniques": list(evasive_techniques),
-            "phases_detected": list(set(f["attack_phase"] for f in evasive_findings if f.get("attack_phase"))),
-            "affected_hosts": list(set(f["hostname"] for f in evasive_findings if f.get("hostname"))),
-            "embedding": evasive_embedding,
-            "summary": generate_evasive_incident_summary(evasive_findings, evasion_methods),
-            "evasive_findings": len(evasive_findings),
-            "evasion_techniques_used": evasion_methods,
-            "rules_would_miss": True
-        })
+        record = incident(
+            "INC-002", evasive_findings,
+            title="Low-and-Slow APT Campaign (Signature-Evading)",
+            rules_would_miss=True,
+        )
+        evasion_methods = state.incidents["INC-002"].evasion_techniques
+        record["summary"] = generate_evasive_incident_summary(evasive_findings, evasion_methods)
+        record["evasion_techniques_used"] = evasion_methods
+        incidents.append(record)
     
     # Web exploitation incident
     web_findings = [f for f in standard_findings if f.get("attack_phase") == 5]
     if web_findings:
-        incidents.append({
-            "id": "INC-003",
-            "title": "Web Application Exploitation Attempts",
-            "severity": "high",
-            "status": "open",
-            "created_at": web_findings[0]["timestamp"],
-            "updated_at": web_findings[-1]["timestamp"],
-            "finding_ids": [f["id"] for f in web_findings],
-            "finding_count": len(web_findings),
-            "techniques": ["T1190"],
-            "phases_detected": [5],
-            "affected_hosts": ["server-web-02"],
-            "embedding": np.mean([f["embedding"] for f in web_findings], axis=0).tolist(),
-            "summary": f"Detected {len(web_findings)} web exploitation attempts from external IPs targeting server-web-02",
-            "evasive_findings": 0
-        })
+        targets = sorted(set(f["dest_ip"] for f in web_findings if f.get("dest_ip")))
+        incidents.append(incident(
+            "INC-003", web_findings,
+            title="Web Application Exploitation Attempts",
+            hosts=target_hosts,
+            min_severity="high",
+            summary=f"Detected {len(web_findings)} web exploitation attempts from external IPs targeting {', '.join(targets)}",
+        ))
     
     # Low confidence findings
-    low_conf_findings = [f for f in findings if f.get("confidence", 1) < 0.5]
+    low_conf_findings = [f for f in findings if f.get("confidence", 1) < LOW_CONFIDENCE]
     if low_conf_findings:
-        incidents.append({
-            "id": "INC-004",
-            "title": "Suspicious Activity - Requires Investigation",
-            "severity": "low",
-            "status": "open",
-            "created_at": low_conf_findings[0]["timestamp"],
-            "updated_at": low_conf_findings[-1]["timestamp"],
-            "finding_ids": [f["id"] for f in low_conf_findings],
-            "finding_count": len(low_conf_findings),
-            "techniques": [],
-            "phases_detected": [],
-            "affected_hosts": list(set(f["hostname"] for f in low_conf_findings if f.get("hostname"))),
-            "embedding": np.mean([f["embedding"] for f in low_conf_findings], axis=0).tolist() if low_conf_findings else [],
-            "summary": "Low confidence detections that may be false positives",
-            "evasive_findings": 0
-        })
+        incidents.append(incident(
+            "INC-004", low_conf_findings,
+            title="Suspicious Activity - Requires Investigation",
+            summary="Low confidence detections that may be false positives",
+        ))
+    
+    # Periodic beaconing found from connection timing alone
+    beacon_findings = [f for f in findings if f.get("detection_method") == "beacon_analysis"]
+    if beacon_findings:
+        incidents.append(incident(
+            "INC-005", beacon_findings,
+            title=beacon_incident_title(beacon_findings),
+            summary=generate_beacon_incident_summary(beacon_findings),
+        ))
+    
+    # Lateral movement found in the internal connection graph
+    graph_findings = [f for f in findings if f.get("detection_method") == "graph_analysis"]
+    if graph_findings:
+        incidents.append(incident(
+            "INC-006", graph_findings,
+            title="Lateral Movement Across Internal Hosts",
+            summary="; ".join(f["description"] for f in graph_findings),
+        ))
     
     return incidents
 
@@ -446,6 +657,25 @@ def generate_incident_summary(findings: List[Dict]) -> str:
     )
 
 
+def beacon_incident_title(findings: List[Dict]) -> str:
+    """Incident title naming where the beacons go: internal hosts, external destinations or both."""
+    # DNS beacons are keyed by registered domain, which is always external
+    scopes = {"Internal" if is_internal(f["beacon"]["destination"]) else "External" for f in findings}
+    if len(scopes) == 2:
+        return "Periodic Beaconing to Internal and External Destinations"
+    return f"Periodic Beaconing to {scopes.pop()} Destinations"
+
+
+def generate_beacon_incident_summary(findings: List[Dict]) -> str:
+    """Generate summary for beaconing incident."""
+    channels = "; ".join(
+        f"{f['hostname'] or f['source_ip']} -> {f['beacon']['destination']} every "
+        f"~{beacon_interval(f['beacon']) / 60:.0f} min (detected after {f['beacon']['detected_after']} check-ins)"
+        for f in findings
+    )
+    return f"Detected {len(findings)} periodic beaconing channels from connection timing: {channels}"
+
+
 def generate_evasive_incident_summary(findings: List[Dict], evasion_methods: List[str]) -> str:
     """Generate summary for evasive attack incident."""
     hosts = set(f["hostname"] for f in findings if f.get("hostname"))
@@ -458,31 +688,63 @@ def generate_evasive_incident_summary(findings: List[Dict], evasion_methods: Lis
     )
 
 
-def generate_loglm_output():
-    """Generate LogLM findings and incidents."""
+def generate_loglm_output(scenario_dir: Optional[Path] = None):
+    """
+    Generate LogLM findings and incidents.
+
+    Args:
+        scenario_dir: Scenario to run on (default: SCENARIO_DIR)
+    """
+    scenario_dir = Path(scenario_dir) if scenario_dir else SCENARIO_DIR
     print("=" * 60)
     print("Running LogLM Detection")
     print("=" * 60)
     
-    conn_file = SCENARIO_DIR / "raw_logs" / "zeek_conn.json"
-    dns_file = SCENARIO_DIR / "raw_logs" / "zeek_dns.json"
-    gt_file = SCENARIO_DIR / "ground_truth.json"
-    
-    with open(conn_file) as f:
-        conn_events = json.load(f)
+    conn_events = load_log(scenario_dir / "raw_logs", "conn")
+    dns_events = load_log(scenario_dir / "raw_logs", "dns")
     
-    with open(dns_file) as f:
-        dns_events = json.load(f)
-    
-    with open(gt_file) as f:
-        ground_truth = json.load(f)
+    ground_truth = load_ground_truth(scenario_dir)
     
     all_events = conn_events + dns_events
     print(f"\nLoaded {len(all_events)} events")
     
+    # Findings reference events by id; the raw events live in the event store
+    ensure_event_store(scenario_dir, all_events)
+    
+    output_dir = scenario_dir / "loglm_output"
+    output_dir.mkdir(exist_ok=True)
+    
+    # Learn per-host / per-pair baselines and score each event against them
+    baselines, baseline_scores = build_baselines(conn_events, dns_events)
+    baselines.save(output_dir / "baselines.npz")
+    print(f"Built baselines for {len(baselines.hosts)} hosts and {len(baselines.pairs)} host/destination pairs")
+    
+    # Lexical and per-domain features for every DNS query
+    dns_features = score_dns_events(dns_events)
+    
     # Detect malicious behaviors
-    findings = detect_malicious_behaviors(all_events, ground_truth)
-    print(f"Generated {len(findings)} findings")
+    findings = detect_malicious_behaviors(all_events, ground_truth, baseline_scores, dns_features)
+    
+    # Beacon analysis over per-pair connection timing
+    beacons = detect_beacons(all_events)
+    findings += beacon_findings(beacons, all_events, start_idx=len(findings))
+    
+    # Graph analysis over internal host-to-host connections
+    graph_result = analyze_lateral_movement(conn_events)
+    graph_count = len(graph_result["bursts"]) + len(graph_result["paths"])
+    findings += lateral_findings(graph_result, all_events, start_idx=len(findings))
+    print(f"Generated {len(findings)} findings ({len(beacons)} from beacon analysis, "
+          f"{graph_count} from graph analysis)")
+    
+    # Embed findings, reusing vectors cached by earlier runs
+    cache_dir = Path(EMBEDDING_CACHE_DIR) if EMBEDDING_CACHE_DIR else output_dir / "embedding_cache"
+    provider = get_provider()
+    dispatcher = EmbeddingDispatcher(provider)
+    cache = EmbeddingCache(cache_dir, dim=provider.dim, model_version=provider.model_version)
+    attach_embeddings(findings, cache, dispatcher)
+    stats = cache.stats()
+    print(f"Embeddings ({provider.model_version}): {dispatcher.stats['events']} computed in "
+          f"{dispatcher.stats['batches']} batches, {stats['hits']} from cache ({stats['entries']} cached)")
     
     # Count evasive findings
     evasive_count = len([f for f in findings if f.get("evasive", False)])
@@ -491,13 +753,10 @@ def generate_loglm_output():
     print(f"  - Evasive attack detections: {evasive_count}")
     
     # Correlate into incidents
-    incidents = correlate_into_incidents(findings, ground_truth)
+    incident_state = IncidentState(len(findings[0]["embedding"]) if findings else 0)
+    incidents = correlate_into_incidents(findings, ground_truth, state=incident_state)
     print(f"Correlated into {len(incidents)} incidents")
     
-    # Add AI-generated explanations to findings
-    findings = add_explanations_to_findings(findings)
-    print("Added AI-generated explanations to findings")
-    
     # Sort findings by timestamp
     findings.sort(key=lambda x: x["timestamp"])
     
@@ -524,14 +783,12 @@ def generate_loglm_output():
         tech["avg_confidence"] = round(tech["avg_confidence"] / tech["count"], 2)
     
     # Save outputs
-    output_dir = SCENARIO_DIR / "loglm_output"
-    output_dir.mkdir(exist_ok=True)
-    
-    findings_for_save = []
-    for f in findings:
-        f_copy = f.copy()
-        f_copy["embedding"] = f["embedding"][:10] + ["...truncated..."]
-        findings_for_save.append(f_copy)
+    # Embeddings are saved separately, and raw events and explanations are
+    # produced on demand, so none of them are stored in findings.json
+    findings_for_save = [
+        {k: v for k, v in f.items() if k not in ("embedding", "raw_event")}
+        for f in findings
+    ]
     
     with open(output_dir / "findings.json", "w") as f:
         json.dump(findings_for_save, f, indent=2)
@@ -540,9 +797,21 @@ def generate_loglm_output():
     with open(output_dir / "embeddings.json", "w") as f:
         json.dump(embeddings, f)
     
+    if EMBEDDING_CODEC:
+        ids = list(embeddings.keys())
+        index = QuantizedEmbeddingIndex.build(ids, np.array([embeddings[i] for i in ids]), codec=EMBEDDING_CODEC)
+        index.save(output_dir / "embedding_store")
+        print(f"Saved {EMBEDDING_CODEC} embedding store ({index.nbytes:,} bytes of codes)")
+    else:
+        # A store from an earlier run would shadow the fresh embeddings.json
+        shutil.rmtree(output_dir / "embedding_store", ignore_errors=True)
+    
     with open(output_dir / "incidents.json", "w") as f:
         json.dump(incidents, f, indent=2)
     
+    # Centroid index for similar-incident search
+    incident_state.index.save(output_dir)
+    
     with open(output_dir / "technique_stats.json", "w") as f:
         json.dump(technique_stats, f, indent=2)
     
@@ -568,5 +837,12 @@ def generate_loglm_output():
     return findings, incidents
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Run LogLM detection on a scenario")
+    parser.add_argument("--scenario", type=Path, default=None, help="Scenario directory (default: default_attack)")
+    args = parser.parse_args()
+    generate_loglm_output(args.scenario)
+
+
 if __name__ == "__main__":
-    generate_loglm_output()
+    main()
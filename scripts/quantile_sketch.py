@@ -0,0 +1,211 @@
+#!/usr/bin/env python3
+"""
+Quantile Sketches
+
+Mergeable, bounded-memory quantile summaries (KLL sketches) for latency
+distributions that are accumulated while detections stream in and are
+combined across shards and scenarios:
+- Values enter level 0; a level over its capacity is sorted and every
+  other item (random offset) is promoted to the next level, where each
+  item stands for twice as many values
+- Capacities shrink geometrically towards the lower levels, so a sketch
+  of n values holds O(k + log n) items; rank error is about 1.7 / k
+- Two sketches merge by concatenating their levels and compacting, so
+  sketches built on separate shards combine into the sketch of the union
+- Small inputs are never compacted and their quantiles are exact
+
+KeyedSketches keeps one sketch per key (e.g. "phase:3" or
+"technique:T1071") and serializes to plain JSON.
+"""
+
+from typing import Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+
+# Capacity of the top level; larger k is more accurate and uses more memory
+DEFAULT_K = 200
+
+# Capacity ratio between a level and the level above it
+CAPACITY_DECAY = 2 / 3
+
+# No level is compacted below this many items
+MIN_LEVEL_CAPACITY = 8
+
+# Quantiles reported by summary()
+DEFAULT_QUANTILES = (0.5, 0.9, 0.99)
+
+
+class KLLSketch:
+    """KLL quantile sketch over float values."""
+
+    def __init__(self, k: int = DEFAULT_K, seed: Optional[int] = 0):
+        """
+        Args:
+            k: Top-level capacity (accuracy / memory trade-off)
+            seed: Seed for the compaction offsets; a fixed seed makes
+                sketches reproducible
+        """
+        self.k = k
+        self.n = 0
+        self.min = np.inf
+        self.max = -np.inf
+        self.levels: List[np.ndarray] = [np.empty(0, dtype=np.float64)]
+        self._rng = np.random.default_rng(seed)
+
+    def __len__(self) -> int:
+        return self.n
+
+    @property
+    def size(self) -> int:
+        """Items retained across all levels."""
+        return sum(len(level) for level in self.levels)
+
+    def _capacity(self, level: int) -> int:
+        depth = len(self.levels) - level - 1
+        return max(MIN_LEVEL_CAPACITY, int(np.ceil(self.k * CAPACITY_DECAY ** depth)))
+
+    def update(self, values) -> None:
+        """Add one value or an array of values; NaNs are ignored."""
+        values = np.asarray(values, dtype=np.float64).ravel()
+        values = values[~np.isnan(values)]
+        if len(values) == 0:
+            return
+        self.n += len(values)
+        self.min = min(self.min, float(values.min()))
+        self.max = max(self.max, float(values.max()))
+        self.levels[0] = np.concatenate([self.levels[0], values])
+        self._compress()
+
+    def merge(self, other: "KLLSketch") -> "KLLSketch":
+        """
+        Fold another sketch into this one.
+
+        Raises:
+            ValueError: The sketches use different k
+        """
+        if other.k != self.k:
+            raise ValueError(f"Cannot merge sketches with k={self.k} and k={other.k}")
+        if other.n == 0:
+            return self
+        while len(self.levels) < len(other.levels):
+            self.levels.append(np.empty(0, dtype=np.float64))
+        for level, items in enumerate(other.levels):
+            self.levels[level] = np.concatenate([self.levels[level], items])
+        self.n += other.n
+        self.min = min(self.min, other.min)
+        self.max = max(self.max, other.max)
+        self._compress()
+        return self
+
+    def _compress(self) -> None:
+        level = 0
+        while level < len(self.levels):
+            items = self.levels[level]
+            if len(items) > self._capacity(level):
+                if level + 1 == len(self.levels):
+                    self.levels.append(np.empty(0, dtype=np.float64))
+                items = np.sort(items)
+                # With an odd count, one item stays behind so no weight is lost
+                odd = len(items) % 2
+                promoted = items[odd:][int(self._rng.integers(2))::2]
+                self.levels[level] = items[:odd]
+                self.levels[level + 1] = np.concatenate([self.levels[level + 1], promoted])
+            level += 1
+
+    def _weighted(self):
+        items = np.concatenate(self.levels)
+        weights = np.concatenate([np.full(len(level), 1 << h, dtype=np.int64) for h, level in enumerate(self.levels)])
+        order = np.argsort(items, kind="stable")
+        return items[order], np.cumsum(weights[order])
+
+    def quantiles(self, qs: Sequence[float]) -> np.ndarray:
+        """Approximate values at the given quantiles (NaN for an empty sketch)."""
+        qs = np.asarray(qs, dtype=np.float64)
+        if self.n == 0:
+            return np.full(len(qs), np.nan)
+        items, cumulative = self._weighted()
+        positions = np.searchsorted(cumulative, qs * cumulative[-1], side="left")
+        values = items[np.clip(positions, 0, len(items) - 1)]
+        values[qs <= 0] = self.min
+        values[qs >= 1] = self.max
+        return values
+
+    def quantile(self, q: float) -> float:
+        return float(self.quantiles([q])[0])
+
+    def to_dict(self) -> Dict:
+        return {
+            "k": self.k,
+            "n": self.n,
+            "min": self.min if self.n else None,
+            "max": self.max if self.n else None,
+            "levels": [level.tolist() for level in self.levels],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict, seed: Optional[int] = 0) -> "KLLSketch":
+        sketch = cls(k=data["k"], seed=seed)
+        sketch.n = data["n"]
+        if sketch.n:
+            sketch.min, sketch.max = data["min"], data["max"]
+        sketch.levels = [np.asarray(level, dtype=np.float64) for level in data["levels"]] or sketch.levels
+        return sketch
+
+
+def summarize(sketch: KLLSketch, quantiles: Iterable[float] = DEFAULT_QUANTILES, digits: int = 2) -> Dict:
+    """Count, min, max and the requested quantiles (as "p50", "p90", ...)."""
+    quantiles = list(quantiles)
+    summary = {"count": sketch.n}
+    if sketch.n == 0:
+        summary.update({"min": None, "max": None, **{_label(q): None for q in quantiles}})
+        return summary
+    summary["min"] = round(sketch.min, digits)
+    summary["max"] = round(sketch.max, digits)
+    for q, value in zip(quantiles, sketch.quantiles(quantiles).tolist()):
+        summary[_label(q)] = round(value, digits)
+    return summary
+
+
+def _label(q: float) -> str:
+    return "p" + f"{q * 100:g}".replace(".", "_")
+
+
+class KeyedSketches:
+    """One KLL sketch per key, created on first use."""
+
+    def __init__(self, k: int = DEFAULT_K):
+        self.k = k
+        self.sketches: Dict[str, KLLSketch] = {}
+
+    def __contains__(self, key: str) -> bool:
+        return key in self.sketches
+
+    def __getitem__(self, key: str) -> KLLSketch:
+        return self.sketches[key]
+
+    def keys(self) -> List[str]:
+        return list(self.sketches)
+
+    def update(self, key: str, values) -> None:
+        if key not in self.sketches:
+            self.sketches[key] = KLLSketch(k=self.k)
+        self.sketches[key].update(values)
+
+    def merge(self, other: "KeyedSketches") -> "KeyedSketches":
+        for key, sketch in other.sketches.items():
+            if key not in self.sketches:
+                self.sketches[key] = KLLSketch(k=self.k)
+            self.sketches[key].merge(sketch)
+        return self
+
+    def summary(self, quantiles: Iterable[float] = DEFAULT_QUANTILES) -> Dict[str, Dict]:
+        return {key: summarize(sketch, quantiles) for key, sketch in sorted(self.sketches.items())}
+
+    def to_dict(self) -> Dict:
+        return {"k": self.k, "sketches": {key: sketch.to_dict() for key, sketch in self.sketches.items()}}
+
+    @classmethod
+    def from_dict(cls, data: Dict) -> "KeyedSketches":
+        keyed = cls(k=data["k"])
+        keyed.sketches = {key: KLLSketch.from_dict(sketch) for key, sketch in data["sketches"].items()}
+        return keyed
@@ -14,16 +14,29 @@ Also exposes detailed rule information including:
 - Evasion risk assessment
 """
 
+import argparse
 import json
 import re
 from datetime import datetime
 from pathlib import Path
 from typing import List, Dict, Any, Optional
 
+try:
+    from scripts.dns_features import DnsFeatureExtractor, TUNNELING_THRESHOLD
+    from scripts.event_store import ensure_event_store
+    from scripts.ground_truth import columns_dir, load_ground_truth
+    from scripts.log_io import load_log
+except ImportError:
+    from dns_features import DnsFeatureExtractor, TUNNELING_THRESHOLD
+    from event_store import ensure_event_store
+    from ground_truth import columns_dir, load_ground_truth
+    from log_io import load_log
+
 SCENARIO_DIR = Path(__file__).parent.parent / "data" / "scenarios" / "default_attack"
 
 
-# Sigma-like detection rules with detailed metadata
+# Sigma-like detection rules with detailed metadata. Each condition takes
+# the event and the run's rule context (see rule_context)
 DETECTION_RULES = [
     {
         "id": "rule_001",
@@ -37,7 +50,7 @@ DETECTION_RULES = [
         "evasion_method": "Use legitimate cloud infrastructure IPs (AWS, Azure, Cloudflare)",
         "logic_human": "IF destination IP is external AND NOT in known-good list THEN alert",
         "threshold": "Any single connection",
-        "condition": lambda e: (
+        "condition": lambda e, ctx: (
             e.get("service") in ["ssl", "http"] and
             not e.get("id.resp_h", "").startswith("10.") and
             not e.get("id.resp_h", "").startswith("192.168.") and
@@ -65,7 +78,7 @@ DETECTION_RULES = [
         "evasion_method": "Keep subdomains under 20 characters, use multiple short queries",
         "logic_human": "IF DNS query subdomain length > 20 characters THEN alert",
         "threshold": "Subdomain > 20 chars",
-        "condition": lambda e: (
+        "condition": lambda e, ctx: (
             "query" in e and
             len(e.get("query", "").split(".")[0]) > 20
         )
@@ -82,7 +95,7 @@ DETECTION_RULES = [
         "evasion_method": "Use A/AAAA records instead of TXT, encode data in subdomain",
         "logic_human": "IF DNS query type = TXT THEN alert",
         "threshold": "Any TXT query",
-        "condition": lambda e: e.get("qtype") == "TXT"
+        "condition": lambda e, ctx: e.get("qtype") == "TXT"
     },
     {
         "id": "rule_004",
@@ -96,7 +109,7 @@ DETECTION_RULES = [
         "evasion_method": "Use WMI, WinRM, or PowerShell Remoting instead of RDP",
         "logic_human": "IF destination port = 3389 AND both IPs are internal THEN alert",
         "threshold": "Any RDP connection",
-        "condition": lambda e: (
+        "condition": lambda e, ctx: (
             e.get("id.resp_p") == 3389 and
             e.get("id.orig_h", "").startswith("10.") and
             e.get("id.resp_h", "").startswith("10.")
@@ -114,7 +127,7 @@ DETECTION_RULES = [
         "evasion_method": "Use WMI (port 135), WinRM (5985/5986), or SSH",
         "logic_human": "IF destination port = 445 AND both IPs are internal THEN alert",
         "threshold": "Any SMB connection",
-        "condition": lambda e: (
+        "condition": lambda e, ctx: (
             e.get("id.resp_p") == 445 and
             e.get("id.orig_h", "").startswith("10.") and
             e.get("id.resp_h", "").startswith("10.")
@@ -132,7 +145,7 @@ DETECTION_RULES = [
         "evasion_method": "Chunk data into transfers < 500KB, spread over hours/days",
         "logic_human": "IF outbound bytes > 500KB AND destination is external THEN alert",
         "threshold": "> 500,000 bytes",
-        "condition": lambda e: (
+        "condition": lambda e, ctx: (
             e.get("orig_bytes", 0) > 500000 and
             not e.get("id.resp_h", "").startswith("10.")
         )
@@ -149,7 +162,7 @@ DETECTION_RULES = [
         "evasion_method": "Use standard ports (443, 80, 53) for C2 communication",
         "logic_human": "IF destination port IN [4444, 5555, 6666, 8888, 9999, 1337] THEN alert",
         "threshold": "Any connection to listed ports",
-        "condition": lambda e: e.get("id.resp_p") in [4444, 5555, 6666, 8888, 9999, 1337]
+        "condition": lambda e, ctx: e.get("id.resp_p") in [4444, 5555, 6666, 8888, 9999, 1337]
     },
     {
         "id": "rule_008",
@@ -163,7 +176,7 @@ DETECTION_RULES = [
         "evasion_method": "Add jitter to beacon intervals, vary connection duration",
         "logic_human": "IF SSL connection AND duration < 5s AND small payload AND external THEN alert",
         "threshold": "Duration < 5s, payload < 1KB",
-        "condition": lambda e: (
+        "condition": lambda e, ctx: (
             e.get("service") == "ssl" and
             e.get("duration", 0) < 5 and
             e.get("orig_bytes", 0) < 1000 and
@@ -182,7 +195,7 @@ DETECTION_RULES = [
         "evasion_method": "Use innocuous domain names that mimic legitimate services",
         "logic_human": "IF DNS query contains patterns like 'data-sync', 'cdn-update' THEN alert",
         "threshold": "Pattern match in domain",
-        "condition": lambda e: (
+        "condition": lambda e, ctx: (
             "query" in e and
             any(pattern in e.get("query", "") for pattern in [
                 "data-sync", "cdn-update", "api-metrics",
@@ -202,7 +215,7 @@ DETECTION_RULES = [
         "evasion_method": "Route through jump hosts, use legitimate admin tools",
         "logic_human": "IF source hostname starts with 'workstation' AND dest is server subnet THEN alert",
         "threshold": "Any direct connection",
-        "condition": lambda e: (
+        "condition": lambda e, ctx: (
             e.get("hostname", "").startswith("workstation") and
             e.get("id.resp_h", "").startswith("10.0.2.")
         )
@@ -219,7 +232,7 @@ DETECTION_RULES = [
         "evasion_method": "Blend with legitimate web traffic, use common user agents",
         "logic_human": "IF source is external AND dest is web server AND port is HTTP/HTTPS THEN alert",
         "threshold": "Any external web connection",
-        "condition": lambda e: (
+        "condition": lambda e, ctx: (
             not e.get("id.orig_h", "").startswith("10.") and
             e.get("id.resp_h") == "10.0.2.20" and
             e.get("id.resp_p") in [80, 443, 8080]
@@ -237,7 +250,24 @@ DETECTION_RULES = [
         "evasion_method": "Slow down scanning, use passive reconnaissance",
         "logic_human": "IF connection state is REJ, RSTO, or RSTOS0 THEN alert",
         "threshold": "Any failed connection",
-        "condition": lambda e: e.get("conn_state") in ["REJ", "RSTO", "RSTOS0"]
+        "condition": lambda e, ctx: e.get("conn_state") in ["REJ", "RSTO", "RSTOS0"]
+    },
+    {
+        "id": "rule_013",
+        "name": "DNS Tunneling Feature Score",
+        "description": "Detects DNS queries whose names look encoded (entropy, hex alphabet, rare bigrams, many unique subdomains)",
+        "severity": "medium",
+        "tactic": "Command and Control",
+        "technique": "T1071.004",
+        "false_positive_rate": 0.02,
+        "evasion_risk": "MEDIUM",
+        "evasion_method": "Encode data as dictionary words and spread queries across many registered domains",
+        "logic_human": f"IF DNS tunneling score >= {TUNNELING_THRESHOLD} THEN alert",
+        "threshold": f"Tunneling score >= {TUNNELING_THRESHOLD}",
+        "condition": lambda e, ctx: (
+            "query" in e and
+            ctx["dns_features"].score_query(e["query"]) >= TUNNELING_THRESHOLD
+        )
     },
 ]
 
@@ -262,20 +292,38 @@ def get_rule_details() -> List[Dict]:
     return rules_info
 
 
-def apply_rules(events: List[Dict], rules: List[Dict]) -> List[Dict]:
+def rule_context(dns_events: List[Dict]) -> Dict[str, Any]:
+    """
+    Per-run state the rule conditions read: DNS features for every query,
+    extracted in one batch, so per-domain counts never carry over between
+    runs in the same process.
+    """
+    dns_features = DnsFeatureExtractor()
+    dns_features.encode(e["query"] for e in dns_events if e.get("query"))
+    return {"dns_features": dns_features}
+
+
+def apply_rules(events: List[Dict], rules: List[Dict], context: Optional[Dict[str, Any]] = None) -> List[Dict]:
     """
     Apply detection rules to events and generate alerts.
     
     This simulates a traditional SIEM - each rule fires independently,
     creating many alerts without correlation.
+
+    Args:
+        events: Events to evaluate
+        rules: Rules to apply (see DETECTION_RULES)
+        context: Rule context (default: built from the DNS events in events)
     """
+    if context is None:
+        context = rule_context(events)
     alerts = []
     alert_idx = 0
     
     for event in events:
         for rule in rules:
             try:
-                if rule["condition"](event):
+                if rule["condition"](event, context):
                     alert = {
                         "id": f"alert_{alert_idx:05d}",
                         "rule_id": rule["id"],
@@ -290,8 +338,7 @@ def apply_rules(events: List[Dict], rules: List[Dict]) -> List[Dict]:
                         "dest_port": event.get("id.resp_p"),
                         "hostname": event.get("hostname"),
                         "user": event.get("user"),
-                        "event_id": event.get("id"),
-                        "raw_event": event
+                        "event_id": event.get("id")
                     }
                     alerts.append(alert)
                     alert_idx += 1
@@ -301,27 +348,35 @@ def apply_rules(events: List[Dict], rules: List[Dict]) -> List[Dict]:
     return alerts
 
 
-def generate_rules_output():
-    """Generate alerts from rules and save to rules_output directory."""
+def generate_rules_output(scenario_dir: Optional[Path] = None):
+    """
+    Generate alerts from rules and save to rules_output directory.
+
+    Args:
+        scenario_dir: Scenario to run on (default: SCENARIO_DIR)
+    """
+    scenario_dir = Path(scenario_dir) if scenario_dir else SCENARIO_DIR
     print("=" * 60)
     print("Running Rules-Only Detection")
     print("=" * 60)
     
-    # Load raw logs
-    conn_file = SCENARIO_DIR / "raw_logs" / "zeek_conn.json"
-    dns_file = SCENARIO_DIR / "raw_logs" / "zeek_dns.json"
-    
-    with open(conn_file) as f:
-        conn_events = json.load(f)
-    
-    with open(dns_file) as f:
-        dns_events = json.load(f)
+    # Load raw logs (any format log_io reads)
+    conn_events = load_log(scenario_dir / "raw_logs", "conn")
+    dns_events = load_log(scenario_dir / "raw_logs", "dns")
     
     all_events = conn_events + dns_events
     print(f"\nLoaded {len(all_events)} events")
     
+    # Extract DNS features for all queries in one batch
+    context = rule_context(dns_events)
+    print(f"DNS features: {len(context['dns_features'])} distinct query names")
+    
+    # Alerts reference events by id; the raw events live in the event store
+    event_store = ensure_event_store(scenario_dir, all_events)
+    print(f"Event store: {len(event_store)} events")
+    
     # Apply rules
-    alerts = apply_rules(all_events, DETECTION_RULES)
+    alerts = apply_rules(all_events, DETECTION_RULES, context)
     print(f"Generated {len(alerts)} alerts")
     
     # Calculate rule statistics
@@ -346,7 +401,7 @@ def generate_rules_output():
     alerts.sort(key=lambda x: x["timestamp"])
     
     # Save outputs
-    output_dir = SCENARIO_DIR / "rules_output"
+    output_dir = scenario_dir / "rules_output"
     output_dir.mkdir(exist_ok=True)
     
     with open(output_dir / "alerts.json", "w") as f:
@@ -380,14 +435,12 @@ def generate_rules_output():
     print(f"  LOW risk: {len(low_risk)} rules")
     
     # Check for evasive events
-    gt_file = SCENARIO_DIR / "ground_truth.json"
-    if gt_file.exists():
-        with open(gt_file) as f:
-            ground_truth = json.load(f)
+    if (scenario_dir / "ground_truth.json").exists() or columns_dir(scenario_dir).exists():
+        ground_truth = load_ground_truth(scenario_dir)
         
-        evasive_events = [eid for eid, info in ground_truth["events"].items() 
-                         if info.get("evasive", False)]
-        detected_evasive = [a for a in alerts if a["event_id"] in evasive_events]
+        evasive_events = ground_truth.ids_where(ground_truth.evasive)
+        rows = ground_truth.rows([a["event_id"] for a in alerts])
+        detected_evasive = [a for a, row in zip(alerts, rows.tolist()) if row >= 0 and ground_truth.evasive[row]]
         
         print(f"\nEvasive attack detection:")
         print(f"  Total evasive events: {len(evasive_events)}")
@@ -398,5 +451,12 @@ def generate_rules_output():
     return alerts, rule_stats
 
 
+def main():
+    parser = argparse.ArgumentParser(description="Run rules-only detection on a scenario")
+    parser.add_argument("--scenario", type=Path, default=None, help="Scenario directory (default: default_attack)")
+    args = parser.parse_args()
+    generate_rules_output(args.scenario)
+
+
 if __name__ == "__main__":
-    generate_rules_output()
+    main()
@@ -0,0 +1,350 @@
+#!/usr/bin/env python3
+"""
+Scenario Context
+
+In-memory snapshot of a scenario's pipeline artifacts for long-running
+readers such as the MCP servers, so a tool call is a dictionary lookup or
+a matrix product instead of a JSON parse:
+- Alerts, findings and incidents with id -> record maps
+- Raw conn/dns logs in one time-sorted, columnar LogIndex
+- Finding embeddings as one unit-normalized float32 matrix (or the
+  quantized embedding store when the pipeline wrote one)
+- The incident centroid index and the open raw event store
+
+A context is never modified after it is built. ContextReloader keeps the
+current one and, from a background thread, builds a replacement whenever
+the artifact files change and swaps it in with a single assignment, so a
+request always sees one consistent snapshot.
+
+    python scripts/scenario_context.py
+    python scripts/scenario_context.py --scenario data/scenarios/enterprise
+"""
+
+import argparse
+import json
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+try:
+    from scripts.embedding_quantization import QuantizedEmbeddingIndex
+    from scripts.event_store import EventStore, open_event_store, store_dir, INDEX_FILE as STORE_INDEX_FILE
+    from scripts.incident_state import CentroidIndex, INDEX_FILE as CENTROID_INDEX_FILE
+    from scripts.log_io import find_log, read_events
+    from scripts.log_index import LogIndex
+except ImportError:
+    from embedding_quantization import QuantizedEmbeddingIndex
+    from event_store import EventStore, open_event_store, store_dir, INDEX_FILE as STORE_INDEX_FILE
+    from incident_state import CentroidIndex, INDEX_FILE as CENTROID_INDEX_FILE
+    from log_io import find_log, read_events
+    from log_index import LogIndex
+
+SCENARIO_DIR = Path(__file__).parent.parent / "data" / "scenarios" / "default_attack"
+
+LOG_TYPES = ("conn", "dns")
+
+# Artifacts a context is built from, relative to the scenario directory.
+# Raw logs and the event store are added by artifact_paths, since their
+# file names depend on the log format.
+ARTIFACT_FILES = [
+    "rules_output/alerts.json",
+    "rules_output/rule_stats.json",
+    "loglm_output/findings.json",
+    "loglm_output/incidents.json",
+    "loglm_output/embeddings.json",
+    "loglm_output/technique_stats.json",
+    f"loglm_output/{CENTROID_INDEX_FILE}",
+    "loglm_output/embedding_store/codes.npy",
+    "evaluation_results.json",
+]
+
+# Seconds between checks of the artifact files for changes.
+DEFAULT_POLL_INTERVAL = 2.0
+
+
+def _read_json(path: Path, default):
+    if path.exists():
+        with open(path) as f:
+            return json.load(f)
+    return default
+
+
+def artifact_paths(scenario_dir: Path) -> List[Path]:
+    """Files whose changes invalidate a scenario's context."""
+    scenario_dir = Path(scenario_dir)
+    paths = [scenario_dir / name for name in ARTIFACT_FILES]
+    for log_type in LOG_TYPES:
+        path = find_log(scenario_dir / "raw_logs", log_type)
+        if path is not None:
+            paths.append(path)
+    paths.append(store_dir(scenario_dir) / STORE_INDEX_FILE)
+    return paths
+
+
+def artifact_signature(scenario_dir: Path) -> Dict[str, Tuple[int, int]]:
+    """(size, mtime_ns) of each artifact file that exists, keyed by path."""
+    signature = {}
+    for path in artifact_paths(scenario_dir):
+        try:
+            stat = path.stat()
+        except FileNotFoundError:
+            continue
+        signature[str(path)] = (stat.st_size, stat.st_mtime_ns)
+    return signature
+
+
+class ScenarioContext:
+    """Read-only, preloaded view of one scenario's artifacts."""
+
+    def __init__(self, scenario_dir: Path):
+        self.scenario_dir = Path(scenario_dir)
+        self.signature: Dict[str, Tuple[int, int]] = {}
+        self.built_at = 0.0
+
+        self.alerts: List[Dict] = []
+        self.findings: List[Dict] = []
+        self.incidents: List[Dict] = []
+        self.alerts_by_id: Dict[str, Dict] = {}
+        self.findings_by_id: Dict[str, Dict] = {}
+        self.incidents_by_id: Dict[str, Dict] = {}
+        self.finding_rows: Dict[str, int] = {}
+
+        self.rule_stats: Optional[Dict] = None
+        self.technique_stats: Optional[Dict] = None
+        self.evaluation: Dict = {}
+        self.generation = 0
+
+        self.log_index = LogIndex.build({})
+
+        self.embedding_ids: List[str] = []
+        self.embedding_rows: Dict[str, int] = {}
+        self.embedding_matrix = np.zeros((0, 0), dtype=np.float32)
+        self.embedding_store: Optional[QuantizedEmbeddingIndex] = None
+        self.incident_index: Optional[CentroidIndex] = None
+        self.event_store: Optional[EventStore] = None
+
+    @classmethod
+    def load(cls, scenario_dir: Path = SCENARIO_DIR) -> "ScenarioContext":
+        """
+        Read every artifact of a scenario.
+
+        The file signature is taken before reading, so a file that changes
+        while the context is built shows up as a change on the next check.
+
+        Raises:
+            OSError: An artifact could not be read
+            ValueError: An artifact is not valid JSON (e.g. it is being rewritten)
+        """
+        context = cls(scenario_dir)
+        context.signature = artifact_signature(scenario_dir)
+        scenario_dir = context.scenario_dir
+        rules_dir = scenario_dir / "rules_output"
+        loglm_dir = scenario_dir / "loglm_output"
+
+        context.alerts = _read_json(rules_dir / "alerts.json", [])
+        context.findings = _read_json(loglm_dir / "findings.json", [])
+        context.incidents = _read_json(loglm_dir / "incidents.json", [])
+        context.alerts_by_id = {a.get("id"): a for a in context.alerts}
+        context.findings_by_id = {f.get("id"): f for f in context.findings}
+        context.incidents_by_id = {i.get("id"): i for i in context.incidents}
+        context.finding_rows = {f.get("id"): row for row, f in enumerate(context.findings)}
+
+        context.rule_stats = _read_json(rules_dir / "rule_stats.json", None)
+        context.technique_stats = _read_json(loglm_dir / "technique_stats.json", None)
+        context.evaluation = _read_json(scenario_dir / "evaluation_results.json", {})
+        findings_file = loglm_dir / "findings.json"
+        context.generation = findings_file.stat().st_mtime_ns if findings_file.exists() else 0
+
+        context._load_raw_logs()
+        context._load_embeddings()
+        index = CentroidIndex.load(loglm_dir)
+        context.incident_index = index if index is not None else CentroidIndex.from_incidents(context.incidents)
+        context.event_store = open_event_store(scenario_dir)
+        context.built_at = time.time()
+        return context
+
+    def _load_raw_logs(self) -> None:
+        logs = {}
+        for log_type in LOG_TYPES:
+            path = find_log(self.scenario_dir / "raw_logs", log_type)
+            if path is not None:
+                logs[log_type] = read_events(path)
+        self.log_index = LogIndex.build(logs)
+
+    def _load_embeddings(self) -> None:
+        store_path = self.scenario_dir / "loglm_output" / "embedding_store"
+        if (store_path / "codes.npy").exists():
+            self.embedding_store = QuantizedEmbeddingIndex.load(store_path)
+            return
+        embeddings = _read_json(self.scenario_dir / "loglm_output" / "embeddings.json", {})
+        self.embedding_ids = list(embeddings)
+        self.embedding_rows = {fid: row for row, fid in enumerate(self.embedding_ids)}
+        if embeddings:
+            matrix = np.array([embeddings[fid] for fid in self.embedding_ids], dtype=np.float32)
+            norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+            self.embedding_matrix = matrix / np.where(norms > 0, norms, 1.0)
+
+    def finding_vector(self, finding_id: str) -> Optional[np.ndarray]:
+        """Embedding of a finding, or None if it has none."""
+        if self.embedding_store is not None:
+            store = self.embedding_store
+            row = store.row(finding_id)
+            if row is None:
+                return None
+            if store.vectors is not None:
+                return np.asarray(store.vectors[row], dtype=np.float32)
+            return store.quantizer.decode(store.codes[row:row + 1])[0]
+        row = self.embedding_rows.get(finding_id)
+        return None if row is None else self.embedding_matrix[row]
+
+    def similar_findings(self, finding_id: str, k: int = 5) -> Optional[List[Tuple[str, float]]]:
+        """
+        The k findings most similar to finding_id by embedding cosine.
+
+        Returns:
+            (finding id, similarity) pairs, most similar first, or None if
+            the finding has no embedding
+        """
+        query = self.finding_vector(finding_id)
+        if query is None:
+            return None
+        if self.embedding_store is not None:
+            return self.embedding_store.search(query, k=k, exclude=finding_id)
+        scores = self.embedding_matrix @ query
+        scores[self.embedding_rows[finding_id]] = -np.inf
+        top = np.argsort(-scores, kind="stable")[:k]
+        return [(self.embedding_ids[row], float(scores[row])) for row in top if np.isfinite(scores[row])]
+
+    def related_findings(self, incident: Dict) -> List[Dict]:
+        """Findings of an incident, in findings.json order."""
+        rows = sorted(self.finding_rows[fid] for fid in set(incident.get("finding_ids", []))
+                      if fid in self.finding_rows)
+        return [self.findings[row] for row in rows]
+
+    def raw_events(self, event_ids: List[str], embedded: Optional[Dict] = None) -> List[Dict]:
+        """
+        Hydrate raw events by id from the event store.
+
+        Older artifacts embed a copy of the event instead; that copy is used
+        when no store has been written.
+        """
+        if self.event_store is None:
+            return [embedded] if embedded else []
+        events = self.event_store.get_many(event_ids)
+        return [events[eid] for eid in event_ids if eid in events]
+
+    def summary(self) -> Dict:
+        return {
+            "scenario": str(self.scenario_dir),
+            "alerts": len(self.alerts),
+            "findings": len(self.findings),
+            "incidents": len(self.incidents),
+            "raw_logs": {log_type: self.log_index.count(log_type) for log_type in LOG_TYPES},
+            "embeddings": len(self.embedding_store) if self.embedding_store is not None else len(self.embedding_ids),
+            "quantized_embeddings": self.embedding_store is not None,
+            "event_store": self.event_store is not None,
+        }
+
+
+class ContextReloader:
+    """
+    Holds the current ScenarioContext and rebuilds it when its files change.
+
+    Readers take `reloader.context` once per request. The reload thread
+    builds the replacement off to the side and publishes it with one
+    attribute assignment; a build that fails (e.g. on a half-written JSON
+    file) keeps the old context and is retried once the files change again.
+    If the first build fails, readers get an empty context until then.
+    """
+
+    def __init__(self, scenario_dir: Path = SCENARIO_DIR, poll_interval: float = DEFAULT_POLL_INTERVAL):
+        self.scenario_dir = Path(scenario_dir)
+        self.poll_interval = poll_interval
+        self.reloads = 0
+        self._failed: Optional[Dict] = None
+        signature = artifact_signature(self.scenario_dir)
+        try:
+            self.context = ScenarioContext.load(self.scenario_dir)
+        except Exception as e:
+            self._failed = signature
+            self.context = ScenarioContext(self.scenario_dir)
+            print(f"Scenario load failed, serving an empty context: {e}", file=sys.stderr)
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def check(self) -> bool:
+        """Rebuild the context if the artifact files changed; True if it was replaced."""
+        signature = artifact_signature(self.scenario_dir)
+        if signature == self.context.signature or signature == self._failed:
+            return False
+        try:
+            context = ScenarioContext.load(self.scenario_dir)
+        except Exception as e:
+            self._failed = signature
+            print(f"Scenario reload failed, keeping previous context: {e}", file=sys.stderr)
+            return False
+        self.context = context
+        self.reloads += 1
+        return True
+
+    def _watch(self) -> None:
+        while not self._stop.wait(self.poll_interval):
+            self.check()
+
+    def start(self) -> "ContextReloader":
+        """Start the background reload thread."""
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._watch, name="scenario-reload", daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a scenario context and time lookups against it")
+    parser.add_argument("--scenario", type=Path, default=SCENARIO_DIR, help="Scenario directory")
+    parser.add_argument("--repeat", type=int, default=1000, help="Lookups per timed operation")
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("Scenario Context")
+    print("=" * 60)
+
+    start = time.perf_counter()
+    context = ScenarioContext.load(args.scenario)
+    print(f"Built in {(time.perf_counter() - start) * 1000:.1f} ms")
+    print(json.dumps(context.summary(), indent=2))
+
+    finding_id = context.findings[0]["id"] if context.findings else None
+    operations = {
+        "finding lookup": lambda: context.findings_by_id.get(finding_id),
+        "first 100 logs": lambda: context.log_index.query(limit=100),
+    }
+    if finding_id is not None:
+        finding = context.findings_by_id[finding_id]
+        operations["50 logs around a finding"] = lambda: context.log_index.query(
+            {"ip": finding.get("source_ip")}, around=finding.get("timestamp"), limit=50
+        )
+    if finding_id is not None and context.finding_vector(finding_id) is not None:
+        operations["similar findings (k=5)"] = lambda: context.similar_findings(finding_id, k=5)
+
+    print("\nPer-call latency:")
+    for label, operation in operations.items():
+        start = time.perf_counter()
+        for _ in range(args.repeat):
+            operation()
+        elapsed = (time.perf_counter() - start) / args.repeat
+        print(f"  {label:<24} {elapsed * 1e6:8.1f} us")
+
+
+if __name__ == "__main__":
+    main()
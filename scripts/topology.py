@@ -0,0 +1,383 @@
+#!/usr/bin/env python3
+"""
+Network Topology
+
+Synthetic enterprise networks for scenario generation, from the handful
+of named demo hosts up to 100k hosts:
+- Generated hosts get a role (workstation, laptop, domain controller,
+  file, database, web or application server) and are packed by role into
+  /24 subnets
+- Workstations and laptops have a personal user (laptop n belongs to the
+  user of workstation n); servers run as the service account of their role
+- Internal traffic follows SERVICE_DEPENDENCIES: each client role talks to
+  a few server roles on a fixed service and port
+- Per-host activity rates are heavy-tailed (Pareto) and destinations are
+  Zipf-popular, so a small share of hosts and servers carries most traffic
+- Hosts are kept as parallel NumPy arrays (strings are only built when
+  events are written) and every draw goes through a Walker alias table,
+  O(1) per sample whatever the number of hosts
+
+A topology of only the named hosts is flat: sources and destinations are
+uniform and any host talks to any other, as in the demo scenario.
+
+    python scripts/topology.py --hosts 100000
+"""
+
+import argparse
+import ipaddress
+import time
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+# Roles of generated hosts and their share of them
+ROLES = ["workstation", "laptop", "domain_controller", "file_server", "database", "web_server", "app_server"]
+ROLE_SHARES = np.array([0.62, 0.26, 0.005, 0.02, 0.025, 0.03, 0.04])
+SERVER_ROLES = ROLES[2:]
+
+# Hostname prefix and service account per role (clients have their own user)
+ROLE_PREFIXES = ["workstation", "laptop", "dc", "server-file", "server-db", "server-web", "server-app"]
+ROLE_ACCOUNTS = [None, None, "svc_ad", "svc_file", "svc_db", "svc_web", "svc_app"]
+
+# Relative activity of a host of each role, scaled by its heavy-tailed factor
+ROLE_ACTIVITY = np.array([1.0, 0.6, 8.0, 4.0, 4.0, 6.0, 5.0])
+
+# Pareto shape of per-host activity (smaller = heavier tail)
+ACTIVITY_ALPHA = 1.2
+
+# Zipf exponent of destination popularity
+POPULARITY_EXPONENT = 1.1
+
+# Hosts per /24 subnet; generated subnets start at 10.1.0.0/24, clear of the named hosts
+SUBNET_HOSTS = 254
+FIRST_SUBNET = int(ipaddress.IPv4Address("10.1.0.0")) >> 8
+
+SERVICES = ["smb", "dce_rpc", "ldap", "kerberos", "http", "ssl", "mysql"]
+
+# Flat network: port and service are drawn independently (from the first four services)
+FLAT_PORTS = np.array([445, 139, 135, 389, 88])
+FLAT_SERVICES = 4
+
+# Internal traffic: (client role, server role, service, port, relative weight)
+SERVICE_DEPENDENCIES = [
+    ("workstation", "domain_controller", "kerberos", 88, 3),
+    ("workstation", "domain_controller", "ldap", 389, 2),
+    ("workstation", "file_server", "smb", 445, 4),
+    ("workstation", "web_server", "ssl", 443, 2),
+    ("workstation", "app_server", "http", 8080, 1),
+    ("laptop", "domain_controller", "kerberos", 88, 3),
+    ("laptop", "domain_controller", "ldap", 389, 1),
+    ("laptop", "file_server", "smb", 445, 2),
+    ("laptop", "web_server", "ssl", 443, 3),
+    ("domain_controller", "file_server", "smb", 445, 1),
+    ("domain_controller", "database", "dce_rpc", 135, 1),
+    ("file_server", "domain_controller", "kerberos", 88, 2),
+    ("file_server", "domain_controller", "ldap", 389, 1),
+    ("database", "domain_controller", "kerberos", 88, 1),
+    ("database", "file_server", "smb", 445, 2),
+    ("web_server", "app_server", "http", 8080, 3),
+    ("web_server", "database", "mysql", 3306, 4),
+    ("web_server", "domain_controller", "kerberos", 88, 1),
+    ("app_server", "database", "mysql", 3306, 5),
+    ("app_server", "file_server", "smb", 445, 1),
+    ("app_server", "domain_controller", "kerberos", 88, 1),
+]
+
+# Generated user names: initial + surname + number
+USER_INITIALS = "abcdefghijklmnopqrstuvwxyz"
+USER_SURNAMES = [
+    "smith", "johnson", "williams", "brown", "jones", "garcia", "miller", "davis", "martinez",
+    "lopez", "wilson", "anderson", "thomas", "taylor", "moore", "jackson", "martin", "lee",
+    "thompson", "white", "harris", "clark", "lewis", "robinson", "walker", "young", "allen",
+    "king", "wright", "scott", "green", "baker", "adams", "nelson", "hill", "campbell",
+]
+
+
+class AliasTable:
+    """Walker alias table: draws index i with probability weights[i] / sum(weights) in O(1)."""
+
+    def __init__(self, weights):
+        weights = np.asarray(weights, dtype=np.float64)
+        if len(weights) == 0 or weights.sum() <= 0:
+            raise ValueError("AliasTable needs a positive total weight")
+        n = len(weights)
+        self.prob = np.ones(n)
+        self.alias = np.arange(n)
+        # Equal weights need no table: sample() is then a plain uniform draw
+        self.uniform = bool(np.all(weights == weights[0]))
+        if self.uniform:
+            return
+        scaled = (weights * (n / weights.sum())).tolist()
+        small = [i for i, p in enumerate(scaled) if p < 1]
+        large = [i for i, p in enumerate(scaled) if p >= 1]
+        prob, alias = self.prob.tolist(), self.alias.tolist()
+        while small and large:
+            s, l = small.pop(), large[-1]
+            prob[s], alias[s] = scaled[s], l
+            scaled[l] -= 1 - scaled[s]
+            if scaled[l] < 1:
+                small.append(large.pop())
+        # Whatever is left over is 1 up to rounding and keeps prob 1
+        self.prob = np.array(prob)
+        self.alias = np.array(alias)
+
+    def __len__(self) -> int:
+        return len(self.prob)
+
+    def sample(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        column = rng.integers(len(self.prob), size=size)
+        if self.uniform:
+            return column
+        return np.where(rng.random(size) < self.prob[column], column, self.alias[column])
+
+
+def zipf_weights(count: int, exponent: float) -> np.ndarray:
+    """Popularity of ranks 0..count-1 (exponent 0 is uniform)."""
+    return 1.0 / np.arange(1, count + 1) ** exponent
+
+
+def allocate_roles(count: int) -> np.ndarray:
+    """
+    Hosts per role for `count` generated hosts, in proportion to
+    ROLE_SHARES, with at least one host of each server role while there
+    are hosts to spare (so every dependency has a server to go to).
+    """
+    counts = np.zeros(len(ROLES), dtype=np.int64)
+    for role in range(len(ROLES) - len(SERVER_ROLES), len(ROLES)):
+        if counts.sum() < count:
+            counts[role] = 1
+    remaining = count - counts.sum()
+    quota = remaining * ROLE_SHARES / ROLE_SHARES.sum()
+    extra = np.floor(quota).astype(np.int64)
+    # Largest remainders take the hosts lost to rounding
+    extra[np.argsort(extra - quota)[:remaining - extra.sum()]] += 1
+    return counts + extra
+
+
+def user_name(n: int) -> str:
+    combos = len(USER_INITIALS) * len(USER_SURNAMES)
+    return (f"{USER_INITIALS[n % len(USER_INITIALS)]}"
+            f"{USER_SURNAMES[n // len(USER_INITIALS) % len(USER_SURNAMES)]}{n // combos + 1}")
+
+
+def format_ips(ips: np.ndarray) -> List[str]:
+    octets = [((ips >> shift) & 255).tolist() for shift in (24, 16, 8, 0)]
+    return [f"{a}.{b}.{c}.{d}" for a, b, c, d in zip(*octets)]
+
+
+class Topology:
+    """
+    Hosts of a scenario as parallel arrays, with the alias tables the
+    benign traffic is drawn from.
+
+    The first hosts are the named hosts (dicts with ip, hostname, user and
+    type, plus role for servers); generated hosts follow. ip, hostname and
+    user are object arrays built on first use and not pickled, so a
+    topology is cheap to send to worker processes.
+    """
+
+    def __init__(self, named_hosts: List[Dict], role: np.ndarray, ip: np.ndarray, serial: np.ndarray,
+                 activity: np.ndarray, rank: np.ndarray, flat: bool = False):
+        """
+        Args:
+            named_hosts: Host dicts of the first len(named_hosts) hosts
+            role: Index into ROLES per host
+            ip: IPv4 address per host, as uint32
+            serial: Number of each generated host within its role (-1 for named hosts)
+            activity: Relative event rate per host
+            rank: Popularity rank of each host among the hosts of its role (0 = most popular)
+            flat: Uniform internal traffic between any two hosts instead of SERVICE_DEPENDENCIES
+        """
+        self.named_hosts = list(named_hosts)
+        self.role = role
+        self.ip_addr = ip
+        self.serial = serial
+        self.activity = activity
+        self.rank = rank
+        self.flat = flat
+        self.exponent = 0.0 if flat else POPULARITY_EXPONENT
+        self._build_tables()
+        self._labels: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None
+
+    def _build_tables(self) -> None:
+        self._sources = AliasTable(self.activity)
+        self._ranked: Dict[int, AliasTable] = {}
+        self._members = [np.flatnonzero(self.role == r) for r in range(len(ROLES))]
+        self._servers = [AliasTable(zipf_weights(len(members), self.exponent)[self.rank[members]])
+                         if len(members) else None for members in self._members]
+        # Per client role: reachable dependencies (server role, service, port) and an alias table over them
+        self._dependencies = []
+        for r, name in enumerate(ROLES):
+            edges = [(ROLES.index(server), SERVICES.index(service), port, weight)
+                     for client, server, service, port, weight in SERVICE_DEPENDENCIES
+                     if client == name and len(self._members[ROLES.index(server)])]
+            if not edges:
+                self._dependencies.append(None)
+                continue
+            target, service, port, weight = (np.array(column) for column in zip(*edges))
+            self._dependencies.append((target, service, port, AliasTable(weight)))
+
+    @classmethod
+    def build(cls, named_hosts: List[Dict], count: int, seed: Optional[int] = None) -> "Topology":
+        """
+        The named hosts plus generated hosts, `count` in all (never fewer
+        than the named hosts). Only the named hosts: a flat topology.
+
+        Args:
+            named_hosts: Host dicts the attack traffic uses
+            count: Total number of hosts
+            seed: Seed for activity rates and server popularity
+        """
+        named_role = np.array([ROLES.index(h.get("role", h["type"])) for h in named_hosts], dtype=np.int64)
+        named_ip = np.array([int(ipaddress.IPv4Address(h["ip"])) for h in named_hosts], dtype=np.uint32)
+        generated = max(0, count - len(named_hosts))
+        if not generated:
+            ones = np.ones(len(named_hosts))
+            return cls(named_hosts, named_role, named_ip, np.full(len(named_hosts), -1), ones,
+                       np.zeros(len(named_hosts), dtype=np.int64), flat=True)
+
+        rng = np.random.default_rng(seed)
+        counts = allocate_roles(generated)
+        roles, serials, ips = [named_role], [np.full(len(named_hosts), -1)], [named_ip]
+        subnet = FIRST_SUBNET
+        for r, n in enumerate(counts):
+            serial = np.arange(n)
+            roles.append(np.full(n, r))
+            serials.append(serial)
+            # Each role starts on a fresh subnet
+            ips.append(((subnet + serial // SUBNET_HOSTS) << 8 | (serial % SUBNET_HOSTS + 1)).astype(np.uint32))
+            subnet += -(-n // SUBNET_HOSTS)
+        role = np.concatenate(roles)
+        activity = ROLE_ACTIVITY[role] * (rng.pareto(ACTIVITY_ALPHA, len(role)) + 1)
+        rank = np.zeros(len(role), dtype=np.int64)
+        for r in range(len(ROLES)):
+            members = np.flatnonzero(role == r)
+            rank[members] = rng.permutation(len(members))
+        return cls(named_hosts, role, np.concatenate(ips), np.concatenate(serials), activity, rank)
+
+    def __len__(self) -> int:
+        return len(self.role)
+
+    def __getstate__(self) -> Dict:
+        return {**self.__dict__, "_labels": None}
+
+    def _host_labels(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        if self._labels is None:
+            named = len(self.named_hosts)
+            role = self.role[named:].tolist()
+            serial = self.serial[named:].tolist()
+            ip = [h["ip"] for h in self.named_hosts] + format_ips(self.ip_addr[named:])
+            hostname = [h["hostname"] for h in self.named_hosts] + [
+                f"{ROLE_PREFIXES[r]}-{s + 1:05d}" for r, s in zip(role, serial)]
+            user = [h["user"] for h in self.named_hosts] + [
+                ROLE_ACCOUNTS[r] or user_name(s) for r, s in zip(role, serial)]
+            self._labels = tuple(np.array(column, dtype=object) for column in (ip, hostname, user))
+        return self._labels
+
+    @property
+    def ip(self) -> np.ndarray:
+        return self._host_labels()[0]
+
+    @property
+    def hostname(self) -> np.ndarray:
+        return self._host_labels()[1]
+
+    @property
+    def user(self) -> np.ndarray:
+        return self._host_labels()[2]
+
+    def sample_sources(self, rng: np.random.Generator, size: int) -> np.ndarray:
+        """Hosts originating `size` events, in proportion to their activity."""
+        return self._sources.sample(rng, size)
+
+    def sample_ranked(self, rng: np.random.Generator, count: int, size: int) -> np.ndarray:
+        """Indexes into a catalogue of `count` destinations listed most popular first."""
+        if count not in self._ranked:
+            self._ranked[count] = AliasTable(zipf_weights(count, self.exponent))
+        return self._ranked[count].sample(rng, size)
+
+    def _sample_any(self, rng: np.random.Generator, src: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """Any other host, with independent port and service (the flat network)."""
+        n = len(self)
+        other = rng.integers(1, n, size=len(src)) if n > 1 else 0
+        port = FLAT_PORTS[rng.integers(len(FLAT_PORTS), size=len(src))]
+        service = rng.integers(FLAT_SERVICES, size=len(src))
+        return (src + other) % n, port, service
+
+    def sample_internal(self, rng: np.random.Generator,
+                        src: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Destinations of internal connections from the hosts in src.
+
+        Returns:
+            (destination host, port, index into SERVICES) per connection
+        """
+        if self.flat:
+            return self._sample_any(rng, src)
+        dst = np.empty(len(src), dtype=np.int64)
+        port = np.empty(len(src), dtype=np.int64)
+        service = np.empty(len(src), dtype=np.int64)
+        roles = self.role[src]
+        for r, dependencies in enumerate(self._dependencies):
+            rows = np.flatnonzero(roles == r)
+            if not len(rows):
+                continue
+            if dependencies is None:
+                # No server this role depends on exists in a tiny network
+                dst[rows], port[rows], service[rows] = self._sample_any(rng, src[rows])
+                continue
+            target, edge_service, edge_port, edges = dependencies
+            edge = edges.sample(rng, len(rows))
+            port[rows] = edge_port[edge]
+            service[rows] = edge_service[edge]
+            for e, server_role in enumerate(target):
+                hit = rows[edge == e]
+                dst[hit] = self._members[server_role][self._servers[server_role].sample(rng, len(hit))]
+        return dst, port, service
+
+    def summary(self) -> Dict:
+        """Host counts per role, subnets and how concentrated activity is."""
+        counts = np.bincount(self.role, minlength=len(ROLES))
+        activity = np.sort(self.activity)[::-1]
+        top = max(1, len(activity) // 100)
+        return {
+            "hosts": len(self),
+            "flat": self.flat,
+            "subnets": int(len(np.unique(self.ip_addr >> 8))),
+            "roles": {name: int(n) for name, n in zip(ROLES, counts) if n},
+            "top_1pct_activity_share": round(float(activity[:top].sum() / activity.sum()), 4),
+        }
+
+
+def main():
+    try:
+        from scripts.generate_scenario import INTERNAL_HOSTS
+    except ImportError:
+        from generate_scenario import INTERNAL_HOSTS
+
+    parser = argparse.ArgumentParser(description="Build an enterprise topology and time sampling from it")
+    parser.add_argument("--hosts", type=int, default=100000)
+    parser.add_argument("--samples", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    topology = Topology.build(INTERNAL_HOSTS, args.hosts, args.seed)
+    built = time.perf_counter() - start
+    rng = np.random.default_rng(args.seed)
+    start = time.perf_counter()
+    src = topology.sample_sources(rng, args.samples)
+    dst, _, _ = topology.sample_internal(rng, src)
+    sampled = time.perf_counter() - start
+
+    print("=" * 60)
+    print(f"Topology: {len(topology):,} hosts")
+    print("=" * 60)
+    for key, value in topology.summary().items():
+        print(f"  {key}: {value}")
+    print(f"  Built in {built:.2f}s; {args.samples:,} source + destination draws in {sampled:.2f}s")
+    print(f"  Distinct sources: {len(np.unique(src)):,}, distinct destinations: {len(np.unique(dst)):,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -11,6 +11,7 @@ Also supports loading custom scenarios.
 """
 
 import json
+import sys
 import time
 import threading
 from pathlib import Path
@@ -18,6 +19,10 @@ from datetime import datetime, timedelta
 from typing import Dict, List, Optional, Callable
 import streamlit as st
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.log_io import find_log, iter_events
+from scripts.log_merge import merge_logs, sorted_run
+
 DATA_DIR = Path(__file__).parent.parent / "data"
 SCENARIOS_DIR = DATA_DIR / "scenarios"
 
@@ -64,16 +69,11 @@ class ScenarioManager:
             with open(gt_file) as f:
                 data["ground_truth"] = json.load(f)
         
-        # Load raw logs
-        conn_file = scenario_dir / "raw_logs" / "zeek_conn.json"
-        if conn_file.exists():
-            with open(conn_file) as f:
-                data["conn_logs"] = json.load(f)
-        
-        dns_file = scenario_dir / "raw_logs" / "zeek_dns.json"
-        if dns_file.exists():
-            with open(dns_file) as f:
-                data["dns_logs"] = json.load(f)
+        # Load raw logs, in whichever format they were written
+        for log_type in ("conn", "dns"):
+            log_file = find_log(scenario_dir / "raw_logs", log_type)
+            if log_file is not None:
+                data[f"{log_type}_logs"] = list(iter_events(log_file))
         
         # Load rules output
         alerts_file = scenario_dir / "rules_output" / "alerts.json"
@@ -128,29 +128,19 @@ class ReplayEngine:
         self.visible_findings = []
     
     def _parse_events(self) -> List[Dict]:
-        """Parse and sort all events by timestamp."""
-        events = []
-        
-        # Add connection logs
-        for log in self.scenario.get("conn_logs", []):
-            events.append({
-                "type": "conn",
-                "timestamp": datetime.fromisoformat(log["ts"]),
-                "data": log
-            })
-        
-        # Add DNS logs
-        for log in self.scenario.get("dns_logs", []):
-            events.append({
-                "type": "dns",
+        """Parse all events, merging the time-sorted conn and DNS logs."""
+        logs = {
+            "conn": sorted_run(self.scenario.get("conn_logs", [])),
+            "dns": sorted_run(self.scenario.get("dns_logs", [])),
+        }
+        return [
+            {
+                "type": log_type,
                 "timestamp": datetime.fromisoformat(log["ts"]),
                 "data": log
-            })
-        
-        # Sort by timestamp
-        events.sort(key=lambda x: x["timestamp"])
-        
-        return events
+            }
+            for log_type, log in merge_logs(logs)
+        ]
     
     def set_mode(self, mode: str, speed: float = 1.0):
         """Set replay mode."""
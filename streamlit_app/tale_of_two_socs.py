@@ -30,8 +30,15 @@ import networkx as nx
 from pyvis.network import Network
 import tempfile
 import streamlit.components.v1 as components
+import sys
 import time
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from scripts.event_store import open_event_store
+from scripts.explanation_generator import explain_finding
+from scripts.log_io import find_log, iter_events
+from scripts.log_merge import merge_runs
+
 # Configuration
 DATA_DIR = Path(__file__).parent.parent / "data"
 SCENARIO_DIR = DATA_DIR / "scenarios" / "default_attack"
@@ -174,18 +181,12 @@ def load_data():
             with open(eval_file) as f:
                 data["evaluation"] = json.load(f)
         
-        # Load raw logs for replay
+        # Load raw logs for replay, in whichever format they were written
         raw_logs_dir = SCENARIO_DIR / "raw_logs"
-        if raw_logs_dir.exists():
-            conn_file = raw_logs_dir / "zeek_conn.json"
-            if conn_file.exists():
-                with open(conn_file) as f:
-                    data["conn_logs"] = json.load(f)
-            
-            dns_file = raw_logs_dir / "zeek_dns.json"
-            if dns_file.exists():
-                with open(dns_file) as f:
-                    data["dns_logs"] = json.load(f)
+        for log_type in ("conn", "dns"):
+            log_file = find_log(raw_logs_dir, log_type)
+            if log_file is not None:
+                data[f"{log_type}_logs"] = list(iter_events(log_file))
     
     except Exception as e:
         st.error(f"Error loading data: {e}")
@@ -193,6 +194,24 @@ def load_data():
     return data
 
 
+@st.cache_resource
+def get_event_store():
+    """Event store used to hydrate raw events for on-demand explanations."""
+    return open_event_store(SCENARIO_DIR)
+
+
+def finding_explanation(finding):
+    """Stored explanation if the findings carry one, otherwise generated on demand."""
+    if finding.get("explanation"):
+        return finding["explanation"]
+    store = get_event_store()
+    event_ids = finding.get("event_ids", [])
+    hydrate = (lambda f: store.get(event_ids[0])) if store is not None and event_ids else None
+    findings_file = SCENARIO_DIR / "loglm_output" / "findings.json"
+    generation = findings_file.stat().st_mtime_ns if findings_file.exists() else 0
+    return explain_finding(finding, hydrate=hydrate, scope=generation)
+
+
 def load_workflow_status():
     """Load workflow status from file."""
     if WORKFLOW_FILE.exists():
@@ -366,6 +385,33 @@ def create_metrics_comparison_chart(rules_metrics, loglm_metrics):
     return fig
 
 
+def create_threshold_curves_chart(rules_curve, loglm_curve):
+    """Create precision-recall and ROC curves from the evaluation threshold sweep."""
+    fig = make_subplots(rows=1, cols=2, subplot_titles=("Precision vs Recall", "ROC (Recall vs FPR)"))
+    
+    for name, curve, color in (("Rules-Only", rules_curve, '#f44336'), ("LogLM", loglm_curve, '#4caf50')):
+        if not curve or not curve.get("thresholds"):
+            continue
+        hover = [f"threshold ≥ {t}<br>{n} detections" for t, n in zip(curve["thresholds"], curve["detections"])]
+        fig.add_trace(go.Scatter(
+            x=curve["recall"], y=curve["precision"], mode='lines+markers', name=name,
+            line_color=color, text=hover, hovertemplate="%{text}<br>recall %{x:.3f}, precision %{y:.3f}"
+        ), row=1, col=1)
+        fig.add_trace(go.Scatter(
+            x=curve["false_positive_rate"], y=curve["recall"], mode='lines+markers', name=name,
+            line_color=color, text=hover, hovertemplate="%{text}<br>FPR %{x:.4f}, recall %{y:.3f}",
+            showlegend=False
+        ), row=1, col=2)
+    
+    fig.update_xaxes(title_text="Recall", range=[0, 1.05], row=1, col=1)
+    fig.update_yaxes(title_text="Precision", range=[0, 1.05], row=1, col=1)
+    fig.update_xaxes(title_text="False Positive Rate", row=1, col=2)
+    fig.update_yaxes(title_text="Recall", range=[0, 1.05], row=1, col=2)
+    fig.update_layout(height=400)
+    
+    return fig
+
+
 def create_evasion_chart(rule_stats):
     """Create a chart showing rule evasion risk."""
     if not rule_stats:
@@ -560,6 +606,15 @@ def main():
     with tab1:
         st.header("Side-by-Side Comparison")
         
+        # Bootstrap intervals for the improvements, when the evaluation has them
+        intervals = eval_data.get("confidence_intervals", {})
+        def interval_note(name: str, fmt: str = "{:.1%}") -> str:
+            interval = intervals.get("difference", {}).get(name)
+            if not interval or interval["estimate"] is None:
+                return ""
+            return (f" {intervals['confidence']*100:.0f}% CI: [{fmt.format(interval['lower'])}, "
+                    f"{fmt.format(interval['upper'])}] from {intervals['resamples']} bootstrap resamples.")
+        
         # Key metrics
         col1, col2, col3, col4 = st.columns(4)
         
@@ -574,14 +629,14 @@ def main():
             st.metric(
                 "Precision Improvement",
                 f"+{eval_data.get('comparison', {}).get('precision_improvement', 0)*100:.1f}%",
-                help="LogLM has much higher precision (fewer false positives)"
+                help="LogLM has much higher precision (fewer false positives)." + interval_note("precision_improvement")
             )
         
         with col3:
             st.metric(
                 "F1 Score Improvement",
                 f"+{eval_data.get('comparison', {}).get('f1_improvement', 0):.3f}",
-                help="Overall detection quality improvement"
+                help="Overall detection quality improvement." + interval_note("f1_improvement", "{:.3f}")
             )
         
         with col4:
@@ -628,6 +683,31 @@ def main():
                 loglm_eval["metrics"]
             )
             st.plotly_chart(radar_chart, use_container_width=True)
+        
+        # Threshold tuning from the precomputed sweep; no re-evaluation needed
+        loglm_curve = loglm_eval.get("threshold_curve", {})
+        if loglm_curve.get("thresholds"):
+            st.markdown("---")
+            st.subheader("🎚️ Threshold Tuning")
+            st.plotly_chart(
+                create_threshold_curves_chart(rules_eval.get("threshold_curve"), loglm_curve),
+                use_container_width=True
+            )
+            
+            thresholds = loglm_curve["thresholds"]
+            best = loglm_eval.get("best_operating_point") or {}
+            threshold = st.select_slider(
+                "LogLM confidence threshold",
+                options=sorted(thresholds),
+                value=best.get("thresholds", thresholds[-1])
+            )
+            point = thresholds.index(threshold)
+            col1, col2, col3, col4, col5 = st.columns(5)
+            col1.metric("Findings", loglm_curve["detections"][point])
+            col2.metric("Precision", f"{loglm_curve['precision'][point]*100:.1f}%")
+            col3.metric("Recall", f"{loglm_curve['recall'][point]*100:.1f}%")
+            col4.metric("F1 Score", f"{loglm_curve['f1_score'][point]:.3f}")
+            col5.metric("Evasive Recall", f"{loglm_curve['evasive_recall'][point]*100:.1f}%")
     
     # Tab 2: Findings with AI Explanations
     with tab2:
@@ -697,7 +777,7 @@ def main():
                         st.markdown(f"**Evasion Technique:** {finding.get('evasion_technique', 'N/A')}")
                 
                 # AI Explanation
-                explanation = finding.get("explanation", finding.get("description", "No explanation available."))
+                explanation = finding_explanation(finding) or finding.get("description", "No explanation available.")
                 st.markdown("---")
                 st.markdown("### 🤖 AI-Generated Explanation")
                 st.markdown(f'<div class="explanation-box">{explanation}</div>', unsafe_allow_html=True)
@@ -1057,7 +1137,7 @@ def main():
         # Get events for replay
         conn_logs = data.get("conn_logs", [])
         dns_logs = data.get("dns_logs", [])
-        all_logs = sorted(conn_logs + dns_logs, key=lambda x: x.get("ts", ""))
+        all_logs = merge_runs([conn_logs, dns_logs])
         
         ground_truth = data.get("ground_truth", {})
         events_info = ground_truth.get("events", {})